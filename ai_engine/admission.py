@@ -0,0 +1,247 @@
+# In ai_engine/admission.py
+import copy
+import threading
+import time
+from collections import deque
+from functools import wraps
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import JsonResponse
+
+CLUSTER_COUNTER_KEY = 'ai_admission:inflight'
+BUSY_MESSAGE = "AI analysis is busy right now. Please try again shortly."
+
+
+class AdmissionGate:
+    """
+    Per-process limit on concurrent AI-bound requests with a short wait queue.
+    Up to `limit` requests run at once, up to `queue_size` more wait at most
+    `timeout` seconds for a slot; anything beyond that is rejected immediately.
+    """
+
+    def __init__(self, limit, queue_size, timeout):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self._recent_waits = deque(maxlen=500)
+
+    def acquire(self):
+        started = time.monotonic()
+        with self._cond:
+            if self.active >= self.limit or self.waiting:
+                if self.waiting >= self.queue_size:
+                    self.rejected += 1
+                    return False
+                self.waiting += 1
+                deadline = started + self.timeout
+                try:
+                    while self.active >= self.limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            return False
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            self.active += 1
+            self.admitted += 1
+            waited = time.monotonic() - started
+            self.wait_seconds_total += waited
+            self._recent_waits.append(waited)
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._recent_waits)
+            p95 = waits[int(len(waits) * 0.95)] if len(waits) >= 20 else (waits[-1] if waits else 0.0)
+            return {
+                'limit': self.limit,
+                'active': self.active,
+                'queue_depth': self.waiting,
+                'queue_size': self.queue_size,
+                'admitted_total': self.admitted,
+                'rejected_total': self.rejected,
+                'wait_seconds_total': round(self.wait_seconds_total, 4),
+                'wait_seconds_p95': round(p95, 4),
+            }
+
+
+_gate = None
+_gate_lock = threading.Lock()
+
+
+def get_gate():
+    global _gate
+    with _gate_lock:
+        if _gate is None:
+            _gate = AdmissionGate(
+                settings.AI_MAX_CONCURRENCY_PER_PROCESS,
+                settings.AI_QUEUE_SIZE,
+                settings.AI_QUEUE_TIMEOUT_SECONDS,
+            )
+        return _gate
+
+
+def _count(cache, key, ttl):
+    """Atomically increments a counter that starts at 0, returning the new value."""
+    cache.add(key, 0, ttl)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.add(key, 0, ttl)
+        return cache.incr(key)
+
+
+def _cluster_enter():
+    """
+    Cluster-wide in-flight counter in the shared cache (AI_ADMISSION_CACHE; see
+    ai_engine.checks). Every admission pushes the key's expiry AI_CLUSTER_COUNTER_TTL
+    into the future, so it can't lapse under a request still in flight (keep the TTL
+    above the longest AI request), yet slots leaked by a crashed worker clear once
+    the cluster has been idle that long.
+    """
+    cache = caches[settings.AI_ADMISSION_CACHE]
+    inflight = _count(cache, CLUSTER_COUNTER_KEY, settings.AI_CLUSTER_COUNTER_TTL)
+    cache.touch(CLUSTER_COUNTER_KEY, settings.AI_CLUSTER_COUNTER_TTL)
+    if inflight > settings.AI_CLUSTER_MAX_CONCURRENCY:
+        _cluster_exit()
+        return False
+    return True
+
+
+def _cluster_exit():
+    cache = caches[settings.AI_ADMISSION_CACHE]
+    try:
+        if cache.decr(CLUSTER_COUNTER_KEY) < 0:
+            cache.set(CLUSTER_COUNTER_KEY, 0, settings.AI_CLUSTER_COUNTER_TTL)
+    except ValueError:
+        pass
+
+
+def _take_user_token(user_id):
+    """
+    Per-user rate limit: AI_USER_BURST requests at once, AI_USER_RATE_PER_MINUTE on
+    average. A sliding-window counter over windows of AI_USER_BURST / rate: this
+    window's count plus the previous window's, weighted by how much of it still
+    overlaps. Only atomic add/incr/decr touch the cache, so concurrent requests from
+    one user can't overspend it. Returns (0, key of the slot spent) if allowed, else
+    (seconds until a retry should succeed, None). AI_USER_RATE_PER_MINUTE=0 turns
+    the limit off.
+    """
+    rate = settings.AI_USER_RATE_PER_MINUTE / 60.0
+    if rate <= 0:
+        return 0, None
+    cache = caches[settings.AI_ADMISSION_CACHE]
+    burst = settings.AI_USER_BURST
+    window = burst / rate
+    slot, elapsed = divmod(time.time(), window)
+    key = f'ai_admission:user:{user_id}:{int(slot)}'
+
+    count = _count(cache, key, int(window * 2) + 1)
+    previous = cache.get(f'ai_admission:user:{user_id}:{int(slot) - 1}', 0)
+    overlap = 1 - elapsed / window
+    if count + previous * overlap <= burst:
+        return 0, key
+
+    _refund_user_token(key)
+    if count > burst or not previous:
+        return window - elapsed, None
+    # The previous window's weight fades linearly; wait until it leaves room for one more
+    return max(1.0, window * (overlap - (burst - count) / previous)), None
+
+
+def _refund_user_token(key):
+    """Gives back a slot spent by _take_user_token (no-op for None)."""
+    if key is None:
+        return
+    try:
+        caches[settings.AI_ADMISSION_CACHE].decr(key)
+    except ValueError:
+        pass
+
+
+def _reject(request, status, message, retry_after, json_errors=False, page=None):
+    """
+    API callers get a JSON 429/503. A browser form post gets the same status with
+    `page(request)` rendered as for a GET and the reason as a message. The posted
+    fields stay in request.POST, so the view can refill its form.
+    """
+    retry_after = max(1, round(retry_after))
+    wants_json = json_errors or 'application/json' in request.headers.get('Accept', '') \
+        or request.content_type == 'application/json'
+    if wants_json:
+        response = JsonResponse({'error': message}, status=status)
+    else:
+        messages.warning(request, f"{message} (You can retry in about {retry_after} seconds.)")
+        request.POST  # parse the body now; a GET request wouldn't
+        page_request = copy.copy(request)
+        page_request.method = 'GET'
+        response = page(page_request)
+        response.status_code = status
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ai_admission(view=None, when=None, json_errors=False):
+    """
+    Admission control for views that call Gemini/Groq. Applies to POSTs only (further
+    narrowed by the optional `when(request)` predicate), so the page itself always
+    loads. Rejects with 429 when the user is over their rate and with 503 +
+    Retry-After when the AI workers and the wait queue are full, keeping the rest
+    of the site responsive during bursts. Views that only ever answer in JSON pass
+    json_errors=True; for the rest, see _reject.
+    """
+    if view is None:
+        return lambda v: ai_admission(v, when=when, json_errors=json_errors)
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method != 'POST' or (when is not None and not when(request)):
+            return view(request, *args, **kwargs)
+
+        def reject(status, message, retry_after):
+            page = lambda page_request: view(page_request, *args, **kwargs)
+            return _reject(request, status, message, retry_after, json_errors, page)
+
+        token = None
+        if request.user.is_authenticated:
+            wait, token = _take_user_token(request.user.pk)
+            if wait:
+                return reject(429, "You're running AI analyses too quickly. Please wait a moment.", wait)
+
+        gate = get_gate()
+        if not gate.acquire():
+            # Turned away for capacity, not for the user's rate: give their slot back
+            _refund_user_token(token)
+            return reject(503, BUSY_MESSAGE, settings.AI_RETRY_AFTER_SECONDS)
+        try:
+            if not _cluster_enter():
+                _refund_user_token(token)
+                return reject(503, BUSY_MESSAGE, settings.AI_RETRY_AFTER_SECONDS)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _cluster_exit()
+        finally:
+            gate.release()
+    return wrapped
+
+
+def admission_stats():
+    stats = get_gate().stats()
+    stats['cluster_inflight'] = caches[settings.AI_ADMISSION_CACHE].get(CLUSTER_COUNTER_KEY, 0)
+    return stats
@@ -0,0 +1,91 @@
+# In ai_engine/batch.py
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+from prepscore_project.metrics import current_view, using_view
+from profiles.models import Skill
+from profiles.scorer import calculate_ml_score
+from profiles.skills import find_missing_skills
+from .models import GapAnalysisResult
+from .utils import (
+    get_or_create_job_descriptions, compute_similarities, analyze_gap, blend_match_score
+)
+
+# Process-wide pool, so concurrent batches share one bound on in-flight Groq calls
+_EXPLAIN_POOL = ThreadPoolExecutor(
+    max_workers=settings.AI_BATCH_CONCURRENCY,
+    thread_name_prefix='gap-explain',
+)
+
+
+def _title(text):
+    """First non-empty line of the posting, used as a label in the ranking."""
+    for line in text.splitlines():
+        if line.strip():
+            return line.strip()[:120]
+    return ''
+
+
+def rank_job_descriptions(profile, job_descriptions):
+    """
+    Scores one resume against many JDs without calling the LLM.
+    JDs are embedded in batched calls (reusing stored vectors) and compared
+    with a single matrix product. Returns entries sorted best match first.
+    """
+    rf_score = calculate_ml_score(profile)
+    jds = [jd for jd in get_or_create_job_descriptions(job_descriptions) if jd.embedding is not None]
+    if not jds:
+        return []
+
+    similarities = compute_similarities(profile.resume_embedding, [jd.embedding for jd in jds])
+    skill_names = list(Skill.objects.filter(profile=profile).values_list('canonical_name', flat=True))
+
+    ranked = []
+    for jd, similarity in zip(jds, similarities):
+        similarity = float(similarity)
+        ranked.append({
+            'job_description': jd,
+            'job_description_id': jd.pk,
+            'title': _title(jd.text),
+            'rf_score': rf_score,
+            'similarity': round(similarity, 4),
+            'vector_score': round(similarity * 100),
+            'match_score': blend_match_score(rf_score, similarity),
+            'missing_skills': find_missing_skills(jd.text, profile.resume_text, skill_names),
+        })
+
+    ranked.sort(key=lambda entry: entry['similarity'], reverse=True)
+    return ranked
+
+
+def _explain_and_store(user, resume_text, entry, endpoint=''):
+    try:
+        # Pool threads don't inherit the request's context; keep ledger rows attributed to it
+        with using_view(endpoint):
+            ai_data = analyze_gap(resume_text, entry['job_description'].text, entry['missing_skills'])
+        return GapAnalysisResult.objects.create(
+            user=user,
+            job_description=entry['job_description'],
+            match_score=entry['match_score'],
+            missing_skills=entry['missing_skills'],
+            **ai_data,
+        )
+    except Exception as e:
+        print(f"Batch gap analysis error: {e}")
+        return None
+    finally:
+        # Worker threads hold their own DB connection; don't leak it between jobs
+        close_old_connections()
+
+
+def explain_top_matches(user, resume_text, ranked, top_k):
+    """
+    Queues LLM explanations for the first `top_k` ranked entries on the shared pool.
+    Each result is persisted as soon as its call completes. Returns the futures
+    (resolving to a GapAnalysisResult, or None on failure) for callers that want to wait.
+    """
+    endpoint = current_view()
+    return [
+        _EXPLAIN_POOL.submit(_explain_and_store, user, resume_text, entry, endpoint)
+        for entry in ranked[:top_k]
+    ]
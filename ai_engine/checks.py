@@ -0,0 +1,36 @@
+# In ai_engine/checks.py
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose contents only the current process can see
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _process_local(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """Cross-process coordination needs a cache every worker sees."""
+    errors = []
+    alias = settings.AI_SINGLE_FLIGHT_CACHE
+    if _process_local(alias):
+        errors.append(Error(
+            f"AI_SINGLE_FLIGHT_CACHE ('{alias}') is a per-process cache, so identical AI calls "
+            "in different workers are serialized but their results are never shared.",
+            hint="Set REDIS_URL (or point AI_SINGLE_FLIGHT_CACHE at another shared backend).",
+            id='ai_engine.E001',
+        ))
+    alias = settings.AI_ADMISSION_CACHE
+    if _process_local(alias):
+        errors.append(Error(
+            f"AI_ADMISSION_CACHE ('{alias}') is a per-process cache, so the cluster-wide "
+            "AI concurrency limit and the per-user rate limit only apply per worker.",
+            hint="Set REDIS_URL (or point AI_ADMISSION_CACHE at another shared backend).",
+            id='ai_engine.E002',
+        ))
+    return errors
@@ -0,0 +1,125 @@
+# In ai_engine/clients.py
+import importlib.util
+import os
+import threading
+import httpx
+from google import genai
+from google.genai import types as genai_types
+from groq import Groq
+from django.conf import settings
+
+# One SDK client per provider per process, each on its own keep-alive connection pool.
+# Reusing them skips client construction, DNS, TCP and TLS setup on every AI request.
+
+_lock = threading.Lock()
+_clients = {}
+_stats = {}
+_pid = os.getpid()
+
+
+def _reset_after_fork():
+    # A forked child must never share the parent's sockets; drop (don't close) them
+    global _lock, _pid
+    _lock = threading.Lock()
+    _clients.clear()
+    _stats.clear()
+    _pid = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def http2_enabled():
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])."""
+    return settings.AI_HTTP2 and importlib.util.find_spec('h2') is not None
+
+
+def _http_client(provider):
+    stats = _stats.setdefault(provider, {'requests': 0, 'connections_opened': 0})
+    stats_lock = threading.Lock()
+
+    def trace(event_name, info):
+        # httpcore emits this once per new TCP connection; reused connections skip it
+        if event_name == 'connection.connect_tcp.complete':
+            with stats_lock:
+                stats['connections_opened'] += 1
+
+    def on_request(request):
+        with stats_lock:
+            stats['requests'] += 1
+        request.extensions['trace'] = trace
+
+    return httpx.Client(
+        http2=http2_enabled(),
+        timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.AI_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        event_hooks={'request': [on_request]},
+    )
+
+
+def _build_gemini():
+    http_options = genai_types.HttpOptions(
+        timeout=int(settings.AI_REQUEST_TIMEOUT_SECONDS * 1000),
+        base_url=settings.GEMINI_BASE_URL or None,
+        httpx_client=_http_client('gemini'),
+    )
+    return genai.Client(api_key=settings.GEMINI_API_KEY, http_options=http_options)
+
+
+def _build_groq():
+    return Groq(
+        api_key=settings.GROQ_API_KEY,
+        base_url=settings.GROQ_BASE_URL or None,
+        timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+        # The SDK's own retries are disabled; call_with_resilience owns retry policy
+        max_retries=0,
+        http_client=_http_client('groq'),
+    )
+
+
+_BUILDERS = {
+    'gemini': _build_gemini,
+    'groq': _build_groq,
+}
+
+
+def get_client(provider):
+    """Returns this process's shared client for `provider`, creating it on first use."""
+    if os.getpid() != _pid:
+        # Fallback for platforms without register_at_fork
+        _reset_after_fork()
+    client = _clients.get(provider)
+    if client is None:
+        with _lock:
+            client = _clients.get(provider)
+            if client is None:
+                client = _clients[provider] = _BUILDERS[provider]()
+    return client
+
+
+def gemini_client():
+    return get_client('gemini')
+
+
+def groq_client():
+    return get_client('groq')
+
+
+def client_stats():
+    """Per-provider request and new-connection counts; reuse_ratio near 1.0 means pooling works."""
+    out = {}
+    for provider, stats in list(_stats.items()):
+        requests = stats['requests']
+        opened = stats['connections_opened']
+        out[provider] = {
+            'requests': requests,
+            'connections_opened': opened,
+            'reuse_ratio': round(1 - opened / requests, 4) if requests else None,
+            'http2': http2_enabled(),
+        }
+    return out
@@ -0,0 +1,167 @@
+# In ai_engine/compaction.py
+import math
+import re
+from collections import Counter
+from profiles.skills import extract_skills
+
+# Lines that start a new resume section ("EXPERIENCE", "Technical Skills:", ...)
+SECTION_HEADERS = re.compile(
+    r'^\s*(summary|profile|profile summary|professional summary|objective|career objective|about me|'
+    r'experience|work experience|professional experience|employment|internships?|'
+    r'education|academics?|skills|technical skills|core competencies|'
+    r'projects|personal projects|certifications?|licenses|awards|achievements|publications|'
+    r'volunteering|languages|interests|hobbies|references)\s*:?\s*$',
+    re.IGNORECASE,
+)
+
+# Sections that rarely help a hiring-manager style comparison
+LOW_VALUE_SECTIONS = {'interests', 'hobbies', 'references', 'languages'}
+
+STOPWORDS = frozenset("""
+a about above after again all also an and any are as at be because been being below between both
+but by can could did do does doing down during each few for from further had has have having he her
+here hers him his how i if in into is it its itself just me more most my no nor not of off on once
+only or other our ours out over own same she should so some such than that the their theirs them
+then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours etc e.g i.e including within across per
+we're you'll you're role team work working looking candidate candidates ideal join company
+""".split())
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+
+# Aim for chunks around this size so the packer has reasonable granularity
+CHUNK_TOKENS = 80
+
+
+def estimate_tokens(text):
+    """
+    Approximates a Llama-3 style BPE count without shipping a tokenizer:
+    punctuation is one token, words cost one token per ~4 characters.
+    """
+    if not text:
+        return 0
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PIECE.findall(text))
+
+
+def _terms(text):
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def _split_long_line(line, max_tokens):
+    """PDF extraction sometimes yields whole paragraphs on one line; cut them by sentence, then by words."""
+    pieces, current = [], []
+    for word in re.split(r'(?<=[.;!?•])\s+|\s+(?=•)', line):
+        for part in ([word] if estimate_tokens(word) <= max_tokens else word.split()):
+            if current and estimate_tokens(' '.join(current + [part])) > max_tokens:
+                pieces.append(' '.join(current))
+                current = []
+            current.append(part)
+    if current:
+        pieces.append(' '.join(current))
+    return pieces
+
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    """
+    Splits text into ordered chunks that never cross a section header or a blank
+    line, and are cut at line boundaries once they reach `max_tokens`.
+    Returns dicts with the chunk text, its section and its token estimate.
+    """
+    chunks = []
+    section = ''
+    lines, size = [], 0
+
+    def flush():
+        nonlocal lines, size
+        body = '\n'.join(lines).strip()
+        if body:
+            chunks.append({'text': body, 'section': section, 'tokens': estimate_tokens(body)})
+        lines, size = [], 0
+
+    for raw in (text or '').splitlines():
+        line = raw.strip()
+        header = SECTION_HEADERS.match(line)
+        if header:
+            flush()
+            section = header.group(1).lower()
+            lines, size = [line], estimate_tokens(line)
+            continue
+        if not line:
+            flush()
+            continue
+        for piece in ([line] if estimate_tokens(line) <= max_tokens else _split_long_line(line, max_tokens)):
+            piece_tokens = estimate_tokens(piece)
+            if size and size + piece_tokens > max_tokens:
+                flush()
+            lines.append(piece)
+            size += piece_tokens
+    flush()
+    return chunks
+
+
+def rank_chunks(chunks, query_text, k1=1.2, b=0.75):
+    """
+    Scores each chunk against the query with BM25 over plain word terms, plus a
+    bonus for every vocabulary skill (alias-aware) the chunk shares with the query.
+    Returns one float per chunk.
+    """
+    if not chunks:
+        return []
+
+    docs = [_terms(c['text']) for c in chunks]
+    query = Counter(_terms(query_text))
+    query_skills = set(extract_skills(query_text))
+
+    n = len(docs)
+    avg_len = (sum(len(d) for d in docs) / n) or 1.0
+    doc_freq = Counter(term for d in docs for term in set(d))
+
+    scores = []
+    for chunk, doc in zip(chunks, docs):
+        tf = Counter(doc)
+        score = 0.0
+        for term, q_count in query.items():
+            if term not in tf:
+                continue
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            norm = tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(doc) / avg_len))
+            score += idf * norm * min(q_count, 3)
+
+        score += 2.0 * len(query_skills.intersection(extract_skills(chunk['text'])))
+        if chunk['section'] in LOW_VALUE_SECTIONS:
+            score *= 0.25
+        scores.append(score)
+    return scores
+
+
+def pack_chunks(chunks, scores, budget):
+    """
+    Greedily keeps the best-scoring chunks that fit in `budget` tokens, then
+    restores document order. Gaps between kept chunks are marked with "...".
+    """
+    order = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+    kept, used = set(), 0
+    for i in order:
+        # Reserve room for the newline and a possible "..." gap marker
+        cost = chunks[i]['tokens'] + 5
+        if used + cost <= budget:
+            kept.add(i)
+            used += cost
+
+    parts = []
+    previous = -1
+    for i in sorted(kept):
+        if parts and i != previous + 1:
+            parts.append('...')
+        parts.append(chunks[i]['text'])
+        previous = i
+    return '\n'.join(parts)
+
+
+def compact_text(text, query_text, budget):
+    """Returns `text` unchanged if it fits the token budget, else its most relevant chunks."""
+    if estimate_tokens(text) <= budget:
+        return (text or '').strip()
+    chunks = split_into_chunks(text)
+    return pack_chunks(chunks, rank_chunks(chunks, query_text), budget)
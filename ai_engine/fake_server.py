@@ -0,0 +1,134 @@
+# In ai_engine/fake_server.py
+"""
+Local stand-ins for the Gemini embedding and Groq chat-completion endpoints.
+Point GEMINI_BASE_URL / GROQ_BASE_URL (or AI_FAKE_SERVER) at a running instance
+to exercise the real SDKs, connection pools and resilience code without quota.
+Outputs are deterministic: the same input always yields the same vector/answer.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+
+class FakeAIConfig:
+    def __init__(self, latency_ms=250.0, latency_sigma=0.5, error_rate=0.0, hang_rate=0.0,
+                 hang_seconds=60.0, dimensions=768, seed=None):
+        # Latency is log-normal around `latency_ms`, like real API response times
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.dimensions = dimensions
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def sample_latency(self):
+        with self.lock:
+            self.requests += 1
+            if self.latency_ms <= 0:
+                return 0.0
+            return self.random.lognormvariate(np.log(self.latency_ms / 1000.0), self.latency_sigma)
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+
+def fake_embedding(text, dimensions=768):
+    """Unit vector seeded by the text's hash, so identical texts embed identically."""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big')
+    vec = np.random.default_rng(seed).standard_normal(dimensions)
+    return (vec / np.linalg.norm(vec)).round(6).tolist()
+
+
+def fake_gap_answer(prompt):
+    """Deterministic JSON answer in the shape the gap-analysis prompt asks for."""
+    match = re.search(r'SKILL GAPS ALREADY DETECTED:\s*\n(.*)', prompt)
+    gaps = [g.strip() for g in (match.group(1) if match else '').split(',') if g.strip() and g.strip() != 'None detected']
+    digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+    questions = [f"How would you get up to speed with {g} in your first month?" for g in gaps[:3]]
+    questions.append("Walk me through the project on your resume you're most proud of.")
+    return json.dumps({
+        'interview_questions': questions,
+        'summary': f"Candidate covers the core of the role with {len(gaps)} skill gap(s) to address (ref {digest}).",
+    })
+
+
+def _texts_from_contents(contents):
+    texts = []
+    for content in contents if isinstance(contents, list) else [contents]:
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.append(''.join(part.get('text', '') for part in content.get('parts', [])))
+    return texts
+
+
+def make_handler(config):
+    class FakeAIHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return self._send_json(400, {'error': {'code': 400, 'message': 'Invalid JSON'}})
+
+            time.sleep(config.sample_latency())
+            if config.roll(config.hang_rate):
+                time.sleep(config.hang_seconds)
+            if config.roll(config.error_rate):
+                return self._send_json(503, {'error': {'code': 503, 'message': 'Fake overload', 'status': 'UNAVAILABLE'}})
+
+            path = self.path.split('?')[0]
+            if path.endswith(':batchEmbedContents'):
+                texts = [t for req in payload.get('requests', []) for t in _texts_from_contents(req.get('content', {}))]
+                return self._send_json(200, {'embeddings': [{'values': fake_embedding(t, config.dimensions)} for t in texts]})
+            if path.endswith(':embedContent'):
+                texts = _texts_from_contents(payload.get('content', {}))
+                return self._send_json(200, {'embedding': {'values': fake_embedding(texts[0] if texts else '', config.dimensions)}})
+            if path.endswith('/chat/completions'):
+                prompt = '\n'.join(str(m.get('content', '')) for m in payload.get('messages', []))
+                answer = fake_gap_answer(prompt)
+                prompt_tokens, completion_tokens = len(prompt) // 4, len(answer) // 4
+                return self._send_json(200, {
+                    'id': 'chatcmpl-fake',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': payload.get('model', 'fake'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': answer}}],
+                    'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                              'total_tokens': prompt_tokens + completion_tokens},
+                })
+            return self._send_json(404, {'error': {'code': 404, 'message': f'No fake for {path}'}})
+
+    return FakeAIHandler
+
+
+def start_fake_server(config=None, host='127.0.0.1', port=0, background=True):
+    """Starts the fake server; returns it (server.server_port has the bound port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(config or FakeAIConfig()))
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
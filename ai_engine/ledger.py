@@ -0,0 +1,166 @@
+# In ai_engine/ledger.py
+import atexit
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from prepscore_project.metrics import current_view
+from .resilience import CircuitOpenError
+
+
+class CallEntry:
+    """One outbound call (or cache hit) being recorded; becomes an AICallRecord row."""
+
+    def __init__(self, provider, model, operation, input_chars=0, input_items=1):
+        self.provider = provider
+        self.model = model
+        self.operation = operation
+        self.endpoint = current_view()
+        self.input_chars = input_chars
+        self.input_items = input_items
+        self.output_chars = 0
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.latency_ms = 0.0
+        self.attempts = 0
+        # Stays True unless the provider was actually called for this entry
+        self.cache_hit = True
+        self.outcome = 'ok'
+        self.error_type = ''
+        self.created_at = timezone.now()
+
+    def fail(self, exc):
+        if isinstance(exc, CircuitOpenError):
+            self.outcome = 'circuit_open'
+        elif 'Timeout' in type(exc).__name__:
+            self.outcome = 'timeout'
+        else:
+            self.outcome = 'error'
+        self.error_type = type(exc).__name__[:100]
+
+    def as_fields(self):
+        return {k: v for k, v in vars(self).items()}
+
+
+class _LedgerWriter:
+    """
+    Buffers entries in memory and writes them with bulk_create from a daemon thread,
+    so the request path only pays for a queue put. If the database falls behind,
+    entries beyond AI_LEDGER_MAX_PENDING are dropped (and counted) rather than
+    growing memory without bound.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=settings.AI_LEDGER_MAX_PENDING)
+        self.dropped = 0
+        self.written = 0
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        # Threads don't survive fork; start one per process on first use
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='ai-ledger', daemon=True)
+                self._thread.start()
+
+    def put(self, entry):
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < settings.AI_LEDGER_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self, batch=None):
+        from .models import AICallRecord
+
+        batch = self._drain() if batch is None else batch
+        if not batch:
+            return
+        try:
+            AICallRecord.objects.bulk_create([AICallRecord(**e.as_fields()) for e in batch])
+            self.written += len(batch)
+        except Exception as e:
+            print(f"AI ledger write error: {e}")
+        finally:
+            close_old_connections()
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=settings.AI_LEDGER_FLUSH_SECONDS)
+            except queue.Empty:
+                continue
+            # Give a burst a moment to accumulate into one INSERT
+            time.sleep(min(0.5, settings.AI_LEDGER_FLUSH_SECONDS))
+            self.flush(self._drain(first))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _LedgerWriter()
+            atexit.register(flush_ledger)
+        return _writer
+
+
+def flush_ledger():
+    """Writes whatever is buffered now (used at exit and by management commands)."""
+    if _writer is not None:
+        while not _writer.queue.empty():
+            _writer.flush()
+
+
+def record_entry(entry):
+    if settings.AI_LEDGER_ENABLED:
+        _get_writer().put(entry)
+
+
+def record_cache_hit(provider, model, operation, input_chars=0, input_items=1):
+    """
+    Records work served from storage instead of the provider (e.g. a reused stored
+    embedding), so the usage report can show what reuse saves. No call was made:
+    the entry has no attempts and cache_hit=True, which keeps it out of the
+    report's latency percentiles.
+    """
+    record_entry(CallEntry(provider, model, operation, input_chars, input_items))
+
+
+@contextmanager
+def ledger_call(provider, model, operation, input_chars=0, input_items=1):
+    """
+    Records the wrapped call in the AI call ledger. Code that actually reaches the
+    provider sets entry.cache_hit = False; exceptions mark the outcome and propagate.
+    """
+    entry = CallEntry(provider, model, operation, input_chars, input_items)
+    started = time.perf_counter()
+    try:
+        yield entry
+    except Exception as e:
+        entry.fail(e)
+        raise
+    finally:
+        entry.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        record_entry(entry)
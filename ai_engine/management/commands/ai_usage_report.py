@@ -0,0 +1,90 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Aggregate, Avg, Count, FloatField, Q, Sum
+from django.utils import timezone
+from ai_engine.ledger import flush_ledger
+from ai_engine.models import AICallRecord
+
+
+class PercentileCont(Aggregate):
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+def estimated_cost(row):
+    """USD for one report row, from AI_PRICING. Embedding tokens default to chars / 4."""
+    price = settings.AI_PRICING.get(row['model'])
+    if not price:
+        return None
+    prompt_tokens = row['prompt_tokens'] if row['prompt_tokens'] is not None else row['input_chars'] / 4
+    completion_tokens = row['completion_tokens'] or 0
+    return (prompt_tokens * price['input'] + completion_tokens * price['output']) / 1_000_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the AI call ledger per endpoint: call count, cache-hit and error rates, "
+        "retries, p50/p95/p99 latency of real (non-cached) calls, tokens and estimated cost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=7.0, help='Look back this many days.')
+        parser.add_argument('--endpoint', default=None, help='Only report this endpoint (URL name).')
+
+    def handle(self, *args, **options):
+        flush_ledger()
+        since = timezone.now() - timedelta(days=options['days'])
+        records = AICallRecord.objects.filter(created_at__gte=since)
+        if options['endpoint'] is not None:
+            records = records.filter(endpoint=options['endpoint'])
+
+        live = Q(cache_hit=False)
+        rows = (
+            records.values('endpoint', 'provider', 'model', 'operation')
+            .annotate(
+                calls=Count('id'),
+                hits=Count('id', filter=Q(cache_hit=True)),
+                errors=Count('id', filter=~Q(outcome='ok')),
+                avg_attempts=Avg('attempts', filter=live),
+                p50=PercentileCont('latency_ms', 0.50, filter=live),
+                p95=PercentileCont('latency_ms', 0.95, filter=live),
+                p99=PercentileCont('latency_ms', 0.99, filter=live),
+                input_chars=Sum('input_chars', filter=live),
+                prompt_tokens=Sum('prompt_tokens', filter=live),
+                completion_tokens=Sum('completion_tokens', filter=live),
+            )
+            .order_by('endpoint', 'provider', 'operation')
+        )
+
+        if not rows:
+            self.stdout.write(f"No AI calls recorded in the last {options['days']:g} days.")
+            return
+
+        self.stdout.write(
+            f"{'endpoint':<28}{'operation':<14}{'calls':>7}{'hit%':>7}{'err%':>7}{'tries':>7}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'tokens in':>11}{'tokens out':>11}{'cost $':>10}"
+        )
+        total_cost = 0.0
+        for row in rows:
+            row['input_chars'] = row['input_chars'] or 0
+            cost = estimated_cost(row)
+            total_cost += cost or 0.0
+            tokens_in = row['prompt_tokens'] if row['prompt_tokens'] is not None else row['input_chars'] // 4
+            self.stdout.write(
+                f"{(row['endpoint'] or '-')[:27]:<28}{row['operation'][:13]:<14}{row['calls']:>7}"
+                f"{100 * row['hits'] / row['calls']:>7.1f}{100 * row['errors'] / row['calls']:>7.1f}"
+                f"{row['avg_attempts'] or 0:>7.2f}"
+                f"{_ms(row['p50'])}{_ms(row['p95'])}{_ms(row['p99'])}"
+                f"{tokens_in:>11}{row['completion_tokens'] or 0:>11}"
+                f"{'?' if cost is None else f'{cost:.4f}':>10}"
+            )
+        self.stdout.write(f"\nEstimated total cost: ${total_cost:.4f}")
+
+
+def _ms(value):
+    return f"{'-':>9}" if value is None else f"{value:>9.0f}"
@@ -0,0 +1,54 @@
+from concurrent.futures import as_completed
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from profiles.models import Profile
+from ai_engine.batch import rank_job_descriptions, explain_top_matches
+
+
+class Command(BaseCommand):
+    help = "Rank one user's resume against many job descriptions, then explain the top matches with the LLM."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('paths', nargs='+', help='Text files, or directories of .txt files, one JD per file.')
+        parser.add_argument('--top-k', type=int, default=settings.AI_BATCH_TOP_K)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+            profile = Profile.objects.get(user=user)
+        except (User.DoesNotExist, Profile.DoesNotExist):
+            raise CommandError(f"No profile for user '{options['username']}'.")
+
+        if not profile.resume_text or profile.resume_embedding is None:
+            raise CommandError("This user has no processed resume.")
+
+        files = []
+        for raw in options['paths']:
+            path = Path(raw)
+            if path.is_dir():
+                files.extend(sorted(path.glob('*.txt')))
+            elif path.is_file():
+                files.append(path)
+            else:
+                raise CommandError(f"{raw} does not exist.")
+
+        job_descriptions = [f.read_text(encoding='utf-8', errors='ignore') for f in files]
+        ranked = rank_job_descriptions(profile, job_descriptions)
+        if not ranked:
+            raise CommandError("None of the job descriptions could be embedded.")
+
+        for position, entry in enumerate(ranked, start=1):
+            self.stdout.write(f"{position:>3}. {entry['match_score']:>3}%  (semantic {entry['vector_score']}%)  {entry['title']}")
+
+        futures = explain_top_matches(user, profile.resume_text, ranked, options['top_k'])
+        if futures:
+            self.stdout.write(f"\nExplaining top {len(futures)}...")
+        for future in as_completed(futures):
+            result = future.result()
+            if result is None:
+                self.stderr.write("  - explanation failed")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"  - saved #{result.pk}: {result.summary}"))
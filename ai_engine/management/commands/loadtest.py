@@ -0,0 +1,156 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+import httpx
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+SAMPLE_JOB_DESCRIPTIONS = [
+    "Backend Engineer\nBuild REST APIs with Python and Django on PostgreSQL. Docker, AWS and Git required.",
+    "Data Analyst\nSQL, Python (pandas), Tableau or Power BI. Strong communication and problem solving.",
+    "Machine Learning Engineer\nTrain and deploy models with PyTorch or TensorFlow. MLOps on GCP, Kubernetes a plus.",
+    "Frontend Developer\nReact, JavaScript/TypeScript, HTML and CSS. Experience with CI/CD and agile teams.",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive dashboard, gap analysis and resume uploads on a running server with concurrent "
+        "simulated users, then report throughput and p50/p95/p99 latency per endpoint. "
+        "Run the server with AI_FAKE_SERVER set to avoid spending real AI quota, and raise "
+        "AI_USER_RATE_PER_MINUTE there unless per-user 429s are what you want to measure."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=10, help='Concurrent simulated users.')
+        parser.add_argument('--duration', type=float, default=60.0, help='Seconds to run.')
+        parser.add_argument('--mix', default='dashboard=6,gap=3,upload=1',
+                            help='Relative weights of the dashboard, gap and upload scenarios.')
+        parser.add_argument('--think-ms', type=float, default=250.0, help='Mean pause between actions.')
+        parser.add_argument('--resume', default=None, help='PDF to upload (defaults to the first one in media/resumes).')
+        parser.add_argument('--password', default='loadtest-pass-123')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        mix = {}
+        for part in options['mix'].split(','):
+            name, _, weight = part.partition('=')
+            if name not in ('dashboard', 'gap', 'upload'):
+                raise CommandError(f"Unknown scenario '{name}' in --mix.")
+            mix[name] = float(weight or 1)
+
+        resume = Path(options['resume']) if options['resume'] else next(Path(settings.MEDIA_ROOT, 'resumes').glob('*.pdf'), None)
+        if resume is None or not resume.exists():
+            raise CommandError("No resume PDF to upload; pass --resume.")
+        resume_bytes = resume.read_bytes()
+
+        usernames = self._ensure_users(options['users'], options['password'])
+        self.stdout.write(f"Driving {options['base_url']} with {len(usernames)} users for {options['duration']:.0f}s...")
+
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+        rng = random.Random(options['seed'])
+
+        def record(name, started, ok):
+            with lock:
+                samples[name].append(time.monotonic() - started)
+                if not ok:
+                    errors[name] += 1
+
+        def simulated_user(username, seed):
+            user_rng = random.Random(seed)
+            with httpx.Client(base_url=options['base_url'], timeout=120.0) as client:
+                try:
+                    self._login(client, username, options['password'])
+                    # Every user needs a processed resume before gap analysis makes sense
+                    self._upload(client, resume.name, resume_bytes, record)
+                except httpx.HTTPError as e:
+                    self.stderr.write(f"{username}: setup failed: {e}")
+                    return
+
+                names, weights = list(mix), list(mix.values())
+                while time.monotonic() < deadline:
+                    scenario = user_rng.choices(names, weights)[0]
+                    try:
+                        if scenario == 'dashboard':
+                            started = time.monotonic()
+                            response = client.get('/dashboard/')
+                            record('dashboard', started, response.status_code == 200)
+                        elif scenario == 'gap':
+                            self._gap_analysis(client, user_rng.choice(SAMPLE_JOB_DESCRIPTIONS), record)
+                        else:
+                            self._upload(client, resume.name, resume_bytes, record)
+                    except httpx.HTTPError:
+                        with lock:
+                            errors[scenario] += 1
+                    time.sleep(user_rng.expovariate(1000.0 / options['think_ms']) if options['think_ms'] > 0 else 0)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=simulated_user, args=(u, rng.random())) for u in usernames]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+
+        self._report(samples, errors, elapsed)
+
+    def _ensure_users(self, count, password):
+        usernames = [f'loadtest_user_{i}' for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        for username in usernames:
+            if username not in existing:
+                User.objects.create_user(username, f'{username}@example.com', password)
+        return usernames
+
+    @staticmethod
+    def _csrf(client):
+        return client.cookies.get('csrftoken', '')
+
+    def _login(self, client, username, password):
+        client.get('/login/')
+        response = client.post('/login/', data={
+            'login': username, 'password': password, 'csrfmiddlewaretoken': self._csrf(client),
+        })
+        if response.status_code != 302:
+            raise httpx.HTTPError(f"login returned {response.status_code}")
+
+    def _upload(self, client, filename, content, record):
+        client.get('/profile/')
+        started = time.monotonic()
+        response = client.post(
+            '/profile/',
+            data={'location': 'Load Test City', 'csrfmiddlewaretoken': self._csrf(client)},
+            files={'resume_pdf': (filename, content, 'application/pdf')},
+        )
+        record('upload', started, response.status_code == 302)
+
+    def _gap_analysis(self, client, job_description, record):
+        client.get('/ai/gap-analysis/')
+        started = time.monotonic()
+        response = client.post('/ai/gap-analysis/', data={
+            'job_description': job_description, 'csrfmiddlewaretoken': self._csrf(client),
+        })
+        record('gap', started, response.status_code == 200)
+
+    def _report(self, samples, errors, elapsed):
+        total = sum(len(v) for v in samples.values())
+        self.stdout.write(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)\n")
+        self.stdout.write(f"{'endpoint':<12}{'count':>8}{'errors':>8}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name in sorted(set(samples) | set(errors)):
+            if not samples[name]:
+                self.stdout.write(f"{name:<12}{0:>8}{errors[name]:>8}")
+                continue
+            latencies = np.array(samples[name]) * 1000
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            self.stdout.write(
+                f"{name:<12}{len(latencies):>8}{errors[name]:>8}{len(latencies) / elapsed:>8.1f}"
+                f"{p50:>10.0f}{p95:>10.0f}{p99:>10.0f}"
+            )
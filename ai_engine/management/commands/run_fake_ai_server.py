@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from ai_engine.fake_server import FakeAIConfig, start_fake_server
+
+
+class Command(BaseCommand):
+    help = "Serve fake Gemini embedding and Groq chat-completion endpoints for local load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=250.0, help='Median response latency.')
+        parser.add_argument('--latency-sigma', type=float, default=0.5, help='Log-normal spread of latency.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503.')
+        parser.add_argument('--hang-rate', type=float, default=0.0, help='Fraction of requests that stall.')
+        parser.add_argument('--hang-seconds', type=float, default=60.0)
+        parser.add_argument('--dimensions', type=int, default=768)
+        parser.add_argument('--seed', type=int, default=None, help='Seed for latency/error sampling.')
+
+    def handle(self, *args, **options):
+        config = FakeAIConfig(
+            latency_ms=options['latency_ms'],
+            latency_sigma=options['latency_sigma'],
+            error_rate=options['error_rate'],
+            hang_rate=options['hang_rate'],
+            hang_seconds=options['hang_seconds'],
+            dimensions=options['dimensions'],
+            seed=options['seed'],
+        )
+        server = start_fake_server(config, options['host'], options['port'], background=False)
+        url = f"http://{options['host']}:{server.server_port}"
+        self.stdout.write(self.style.SUCCESS(f"Fake AI server on {url} — run the app with AI_FAKE_SERVER={url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served {config.requests} requests.")
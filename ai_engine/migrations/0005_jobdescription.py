@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:12
+
+import django.db.models.deletion
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0004_alter_resumeanalysis_embedding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobDescription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('embedding', pgvector.django.vector.VectorField(blank=True, dimensions=768, null=True)),
+                ('embedding_model', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='gapanalysisresult',
+            name='job',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='analyses', to='ai_engine.jobdescription'),
+        ),
+    ]
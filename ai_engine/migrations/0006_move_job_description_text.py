@@ -0,0 +1,47 @@
+import hashlib
+import re
+
+from django.db import migrations
+
+
+# Frozen copies of ai_engine.utils.normalize_job_description / job_description_hash
+# as of this migration, so replaying it never depends on the current app code.
+def normalize_job_description(text):
+    lines = [re.sub(r'[ \t\u00a0]+', ' ', line).strip() for line in (text or '').splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def job_description_hash(normalized_text):
+    return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+
+
+def forwards(apps, schema_editor):
+    GapAnalysisResult = apps.get_model('ai_engine', 'GapAnalysisResult')
+    JobDescription = apps.get_model('ai_engine', 'JobDescription')
+
+    for result in GapAnalysisResult.objects.all().iterator():
+        normalized = normalize_job_description(result.job_description)
+        jd, _ = JobDescription.objects.get_or_create(
+            content_hash=job_description_hash(normalized),
+            defaults={'text': normalized},
+        )
+        result.job = jd
+        result.save(update_fields=['job'])
+
+
+def backwards(apps, schema_editor):
+    GapAnalysisResult = apps.get_model('ai_engine', 'GapAnalysisResult')
+    for result in GapAnalysisResult.objects.select_related('job').iterator():
+        result.job_description = result.job.text
+        result.save(update_fields=['job_description'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0005_jobdescription'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
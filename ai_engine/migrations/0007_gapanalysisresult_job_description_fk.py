@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0006_move_job_description_text'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='gapanalysisresult',
+            name='job_description',
+        ),
+        migrations.RenameField(
+            model_name='gapanalysisresult',
+            old_name='job',
+            new_name='job_description',
+        ),
+        migrations.AlterField(
+            model_name='gapanalysisresult',
+            name='job_description',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='analyses', to='ai_engine.jobdescription'),
+        ),
+    ]
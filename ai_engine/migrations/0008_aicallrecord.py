@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0007_gapanalysisresult_job_description_fk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AICallRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=20)),
+                ('model', models.CharField(max_length=100)),
+                ('operation', models.CharField(max_length=30)),
+                ('endpoint', models.CharField(blank=True, max_length=100)),
+                ('input_items', models.IntegerField(default=1)),
+                ('input_chars', models.IntegerField(default=0)),
+                ('output_chars', models.IntegerField(default=0)),
+                ('prompt_tokens', models.IntegerField(blank=True, null=True)),
+                ('completion_tokens', models.IntegerField(blank=True, null=True)),
+                ('latency_ms', models.FloatField()),
+                ('attempts', models.IntegerField(default=0)),
+                ('cache_hit', models.BooleanField(default=False)),
+                ('outcome', models.CharField(max_length=20)),
+                ('error_type', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='aicall_created_idx')],
+            },
+        ),
+    ]
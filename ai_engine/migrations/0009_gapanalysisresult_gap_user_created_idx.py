@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0008_aicallrecord'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gapanalysisresult',
+            index=models.Index(fields=['user', '-created_at'], name='gap_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # ResumeAnalysis was removed from ai_engine/models.py before the JobDescription
+    # work. This only drops it from the migration state so makemigrations stays clean;
+    # the table and its rows are left in place until dropping them is reviewed separately.
+
+    dependencies = [
+        ('ai_engine', '0009_gapanalysisresult_gap_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.DeleteModel(name='ResumeAnalysis')],
+        ),
+    ]
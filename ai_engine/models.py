@@ -1,9 +1,21 @@
 from django.db import models
 from django.contrib.auth.models import User
+from pgvector.django import VectorField
+
+class JobDescription(models.Model):
+    # One row per distinct JD (after whitespace normalization), shared by every user
+    text = models.TextField()
+    content_hash = models.CharField(max_length=64, unique=True)
+    embedding = VectorField(dimensions=768, null=True, blank=True)
+    embedding_model = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"JD {self.content_hash[:12]} ({len(self.text)} chars)"
 
 class GapAnalysisResult(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    job_description = models.TextField()
+    job_description = models.ForeignKey(JobDescription, on_delete=models.PROTECT, related_name='analyses')
     match_score = models.IntegerField(default=0)
     missing_skills = models.JSONField(default=list)
     interview_questions = models.JSONField(default=list)
@@ -12,6 +24,31 @@ class GapAnalysisResult(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['user', '-created_at'], name='gap_user_created_idx')]
+
+    def __str__(self):
+        return f"Gap Analysis — {self.user.username} ({self.created_at.date()})"
+
+class AICallRecord(models.Model):
+    """Append-only ledger of outbound Gemini/Groq calls (written in batches by ai_engine.ledger)."""
+    provider = models.CharField(max_length=20)
+    model = models.CharField(max_length=100)
+    operation = models.CharField(max_length=30)
+    endpoint = models.CharField(max_length=100, blank=True)
+    input_items = models.IntegerField(default=1)
+    input_chars = models.IntegerField(default=0)
+    output_chars = models.IntegerField(default=0)
+    prompt_tokens = models.IntegerField(null=True, blank=True)
+    completion_tokens = models.IntegerField(null=True, blank=True)
+    latency_ms = models.FloatField()
+    attempts = models.IntegerField(default=0)
+    cache_hit = models.BooleanField(default=False)
+    outcome = models.CharField(max_length=20)
+    error_type = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['created_at'], name='aicall_created_idx')]
 
     def __str__(self):
-        return f"Gap Analysis — {self.user.username} ({self.created_at.date()})"
\ No newline at end of file
+        return f"{self.provider}/{self.operation} {self.outcome} {self.latency_ms:.0f}ms"
@@ -0,0 +1,195 @@
+# In ai_engine/resilience.py
+import socket
+import threading
+import time
+import httpx
+from django.conf import settings
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# HTTP statuses worth retrying: timeouts, rate limits and server-side failures
+TRANSIENT_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+# Don't start an attempt with less time than this left before the deadline
+MIN_ATTEMPT_SECONDS = 1.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker. After `failure_threshold` consecutive
+    failures it opens and rejects calls for `reset_timeout` seconds, then lets a
+    single trial call through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent traffic so a provider outage can't turn
+    every request into several. Each first attempt deposits `ratio` tokens, each
+    retry withdraws one; `min_per_second` keeps a trickle of retries available
+    when traffic is low. Shared by all providers in the process.
+    """
+
+    def __init__(self, ratio, min_per_second, max_tokens=10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+
+    def _add(self, amount):
+        self._tokens = min(self.max_tokens, self._tokens + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._add((now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self):
+        with self._lock:
+            self._refill()
+            self._add(self.ratio)
+
+    def try_withdraw(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+_retry_budget = None
+
+
+def get_breaker(provider):
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(
+                provider,
+                failure_threshold=settings.AI_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.AI_BREAKER_RESET_SECONDS,
+            )
+        return _breakers[provider]
+
+
+def get_retry_budget():
+    global _retry_budget
+    with _breakers_lock:
+        if _retry_budget is None:
+            _retry_budget = RetryBudget(settings.AI_RETRY_BUDGET_RATIO, settings.AI_RETRY_BUDGET_MIN_PER_SECOND)
+        return _retry_budget
+
+
+def is_transient(exc):
+    """True for errors a retry might fix: timeouts, dropped connections, 429s and 5xx."""
+    if isinstance(exc, (TimeoutError, ConnectionError, socket.timeout, httpx.TimeoutException, httpx.NetworkError)):
+        return True
+    # groq exposes status_code, google-genai exposes code
+    status = getattr(exc, 'status_code', None) or getattr(exc, 'code', None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUS_CODES
+    name = type(exc).__name__
+    return 'Timeout' in name or 'Connection' in name
+
+
+def call_with_resilience(provider, fn, entry=None):
+    """
+    Calls fn(timeout) behind the provider's circuit breaker, retrying transient
+    failures with jittered exponential backoff. Each attempt's timeout is
+    AI_REQUEST_TIMEOUT_SECONDS or whatever is left of AI_CALL_DEADLINE_SECONDS,
+    whichever is smaller, so the call as a whole (backoff included) ends by the
+    deadline; fn() must pass it on to the SDK as the request timeout.
+    Gives up once AI_MAX_ATTEMPTS is reached, less than MIN_ATTEMPT_SECONDS would be
+    left for the next attempt, or the shared retry budget runs dry.
+    Raises CircuitOpenError without calling fn() while the breaker is open.
+    If a ledger entry is given, its attempt count is kept up to date.
+    """
+    breaker = get_breaker(provider)
+    budget = get_retry_budget()
+    budget.deposit()
+    deadline = time.monotonic() + settings.AI_CALL_DEADLINE_SECONDS
+
+    def deadline_near(retry_state):
+        return deadline - time.monotonic() - retry_state.upcoming_sleep < MIN_ATTEMPT_SECONDS
+
+    def budget_exhausted(retry_state):
+        return not budget.try_withdraw()
+
+    def attempt():
+        if not breaker.allow():
+            raise CircuitOpenError(f"{provider} is temporarily unavailable (circuit open)")
+        if entry is not None:
+            entry.attempts += 1
+            entry.cache_hit = False
+        timeout = min(settings.AI_REQUEST_TIMEOUT_SECONDS, deadline - time.monotonic())
+        try:
+            result = fn(timeout)
+        except Exception as e:
+            if is_transient(e):
+                breaker.record_failure()
+            else:
+                # The provider answered; a bad request says nothing about its health
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+    retrying = Retrying(
+        # Budget is checked last so a token is only spent when a retry will really happen
+        stop=stop_after_attempt(settings.AI_MAX_ATTEMPTS) | deadline_near | budget_exhausted,
+        wait=wait_random_exponential(multiplier=0.5, max=4),
+        retry=retry_if_exception(is_transient),
+        reraise=True,
+        sleep=time.sleep,
+    )
+    return retrying(attempt)
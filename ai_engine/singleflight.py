@@ -0,0 +1,110 @@
+# In ai_engine/singleflight.py
+import hashlib
+import json
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+def request_key(namespace, *parts):
+    """Stable key for an outbound AI request: namespace plus a sha256 of its content."""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return f"singleflight:{namespace}:{digest}"
+
+
+def _advisory_lock_id(key):
+    # pg advisory locks take a signed 64-bit integer
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+
+def _share(cache, key, result):
+    # Failures (None) are never shared, so the next caller retries
+    if result is not None:
+        cache.set(key, result, settings.AI_SINGLE_FLIGHT_TTL)
+
+
+def _run_across_processes(key, fn):
+    """
+    Serializes identical calls across worker processes with a Postgres advisory lock.
+    Whoever gets the lock second finds the first one's result in the shared cache
+    (AI_SINGLE_FLIGHT_CACHE must be a backend every process sees; see ai_engine.checks).
+    """
+    cache = caches[settings.AI_SINGLE_FLIGHT_CACHE]
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    if connection.vendor != 'postgresql':
+        result = fn()
+        _share(cache, key, result)
+        return result
+
+    lock_id = _advisory_lock_id(key)
+    deadline = time.monotonic() + settings.AI_SINGLE_FLIGHT_WAIT
+    locked = False
+    with connection.cursor() as cursor:
+        # Poll instead of blocking, so a hung leader can't hold followers forever
+        while True:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+            locked = cursor.fetchone()[0]
+            if locked or time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+    try:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        result = fn()
+        # Publish while still holding the lock, so the next holder finds the result
+        _share(cache, key, result)
+        return result
+    finally:
+        if locked:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+
+def single_flight(key, fn):
+    """
+    Runs fn() once for all concurrent callers with the same key.
+    Callers that arrive while a call is in flight in this process wait for it and
+    get its result (or exception); callers in other processes coordinate through
+    _run_across_processes. A follower that waits longer than AI_SINGLE_FLIGHT_WAIT
+    stops waiting and makes its own call.
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        if call.done.wait(settings.AI_SINGLE_FLIGHT_WAIT):
+            if call.error is not None:
+                raise call.error
+            return call.result
+        return fn()
+
+    try:
+        call.result = _run_across_processes(key, fn)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.done.set()
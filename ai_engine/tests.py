@@ -1 +1,559 @@
- 
+import json
+import threading
+from concurrent.futures import Future
+from unittest import mock
+import httpx
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.core.checks import run_checks
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from profiles.models import Profile
+from profiles.scorer import calculate_ml_score
+from . import admission, batch, compaction, ledger, resilience, singleflight, utils
+from .models import GapAnalysisResult, JobDescription
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        # No Postgres needed for the in-process paths
+        patcher = mock.patch.object(singleflight, 'connection', mock.Mock(vendor='sqlite'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _start_leader(self, key, fn):
+        """Runs single_flight(key, fn) in a thread and waits until it's registered as in flight."""
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = singleflight.single_flight(key, fn)
+            except Exception as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        for _ in range(200):
+            if key in singleflight._calls:
+                break
+            threading.Event().wait(0.005)
+        return thread, outcome
+
+    def test_follower_shares_the_leaders_result(self):
+        release, calls = threading.Event(), []
+
+        def fn():
+            calls.append(1)
+            release.wait(2)
+            return 'answer'
+
+        key = singleflight.request_key('test', 'same prompt')
+        thread, outcome = self._start_leader(key, fn)
+        follower = threading.Thread(target=lambda: outcome.setdefault('follower', singleflight.single_flight(key, fn)))
+        follower.start()
+        release.set()
+        thread.join(2)
+        follower.join(2)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(outcome['result'], 'answer')
+        self.assertEqual(outcome['follower'], 'answer')
+        self.assertNotIn(key, singleflight._calls)
+
+    def test_follower_gets_the_leaders_exception_and_the_next_caller_retries(self):
+        release = threading.Event()
+
+        def failing():
+            release.wait(2)
+            raise ValueError('provider down')
+
+        key = singleflight.request_key('test', 'failing prompt')
+        thread, outcome = self._start_leader(key, failing)
+        follower_error = {}
+
+        def follow():
+            try:
+                singleflight.single_flight(key, lambda: 'unused')
+            except ValueError as e:
+                follower_error['error'] = e
+
+        follower = threading.Thread(target=follow)
+        follower.start()
+        release.set()
+        thread.join(2)
+        follower.join(2)
+
+        self.assertIs(follower_error['error'], outcome['error'])
+        self.assertEqual(singleflight.single_flight(key, lambda: 'recovered'), 'recovered')
+
+    def test_failed_results_are_not_shared(self):
+        key = singleflight.request_key('test', 'empty')
+        self.assertIsNone(singleflight.single_flight(key, lambda: None))
+        self.assertEqual(singleflight.single_flight(key, lambda: 'second try'), 'second try')
+        self.assertEqual(singleflight.single_flight(key, lambda: 'not called'), 'second try')
+
+    def test_result_is_published_before_the_advisory_lock_is_released(self):
+        events = []
+        cursor = mock.MagicMock()
+        cursor.execute.side_effect = lambda sql, params: events.append(sql.split('(')[0])
+        cursor.fetchone.return_value = (True,)
+        connection = mock.MagicMock(vendor='postgresql')
+        connection.cursor.return_value.__enter__.return_value = cursor
+        cache = mock.Mock()
+        cache.get.return_value = None
+        cache.set.side_effect = lambda *args: events.append('cache.set')
+
+        with mock.patch.object(singleflight, 'connection', connection), \
+                mock.patch.object(singleflight, 'caches', {'default': cache}), \
+                override_settings(AI_SINGLE_FLIGHT_CACHE='default'):
+            self.assertEqual(singleflight.single_flight('k', lambda: 'answer'), 'answer')
+
+        self.assertEqual(events, [
+            'SELECT pg_try_advisory_lock', 'cache.set', 'SELECT pg_advisory_unlock',
+        ])
+
+    def test_deploy_check_rejects_a_per_process_cache(self):
+        with override_settings(AI_SINGLE_FLIGHT_CACHE='default'):
+            ids = [e.id for e in run_checks(include_deployment_checks=True)]
+        self.assertIn('ai_engine.E001', ids)
+
+
+class FakeClock:
+    """Stands in for the time module in ai_engine.resilience; sleeping just advances it."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@override_settings(
+    AI_MAX_ATTEMPTS=3, AI_REQUEST_TIMEOUT_SECONDS=15, AI_CALL_DEADLINE_SECONDS=25,
+    AI_BREAKER_FAILURE_THRESHOLD=3, AI_BREAKER_RESET_SECONDS=30,
+)
+class ResilienceTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(resilience, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        resilience._breakers.clear()
+        resilience._retry_budget = None
+        self.addCleanup(resilience._breakers.clear)
+
+    def failing(self, exc, calls, elapsed=0):
+        def fn(timeout):
+            calls.append(timeout)
+            self.clock.sleep(elapsed or timeout)
+            raise exc
+        return fn
+
+    def test_transient_errors(self):
+        for exc in (TimeoutError(), ConnectionError(), httpx.ConnectTimeout('slow'),
+                    ProviderError(429), ProviderError(503)):
+            self.assertTrue(resilience.is_transient(exc), exc)
+        for exc in (ProviderError(400), ProviderError(401), ValueError('bad json')):
+            self.assertFalse(resilience.is_transient(exc), exc)
+
+    def test_attempt_timeouts_fit_inside_the_overall_deadline(self):
+        calls = []
+        started = self.clock.now
+        with override_settings(AI_MAX_ATTEMPTS=10):
+            with self.assertRaises(TimeoutError):
+                resilience.call_with_resilience('groq', self.failing(TimeoutError(), calls))
+
+        self.assertEqual(calls[0], 15)
+        self.assertGreater(len(calls), 1)
+        self.assertLess(calls[1], 10)  # what's left of 25s after the first attempt and backoff
+        self.assertLessEqual(self.clock.now - started, 25)
+
+    def test_non_transient_errors_are_not_retried(self):
+        calls = []
+        with self.assertRaises(ProviderError):
+            resilience.call_with_resilience('groq', self.failing(ProviderError(400), calls, elapsed=0.1))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(resilience.get_breaker('groq').state, 'closed')
+
+    def test_exhausted_retry_budget_stops_retries(self):
+        resilience._retry_budget = resilience.RetryBudget(ratio=0, min_per_second=0, max_tokens=0)
+        calls = []
+        with self.assertRaises(TimeoutError):
+            resilience.call_with_resilience('gemini', self.failing(TimeoutError(), calls, elapsed=0.1))
+        self.assertEqual(len(calls), 1)
+
+    def test_breaker_opens_then_lets_one_trial_through(self):
+        breaker = resilience.get_breaker('gemini')
+        for _ in range(3):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+
+        calls = []
+        with self.assertRaises(resilience.CircuitOpenError):
+            resilience.call_with_resilience('gemini', lambda timeout: calls.append(timeout))
+        self.assertEqual(calls, [])
+
+        self.clock.sleep(30)
+        self.assertEqual(breaker.state, 'half-open')
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one trial at a time
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+
+        self.clock.sleep(30)
+        self.assertEqual(resilience.call_with_resilience('gemini', lambda timeout: 'ok'), 'ok')
+        self.assertEqual(breaker.state, 'closed')
+
+
+@override_settings(AI_LEDGER_ENABLED=False, GEMINI_API_KEY='test-key', GROQ_API_KEY='test-key')
+class GapAnalysisFallbackTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('fallback', 'fallback@example.com', 'pw')
+        cls.profile = Profile.objects.create(user=cls.user, resume_text='Python developer with Django and SQL.')
+
+    def setUp(self):
+        caches['default'].clear()
+        resilience._breakers.clear()
+        self.addCleanup(resilience._breakers.clear)
+        # Both providers are down: their breakers are open, so nothing leaves the process
+        for provider in ('gemini', 'groq'):
+            breaker = resilience.get_breaker(provider)
+            for _ in range(breaker.failure_threshold):
+                breaker.record_failure()
+        self.client.force_login(self.user)
+
+    def test_gap_analysis_falls_back_to_the_profile_score(self):
+        response = self.client.post(reverse('gap_analysis'), {'job_description': 'Backend engineer, Python and Kubernetes.'})
+
+        self.assertEqual(response.status_code, 200)
+        rf_score = calculate_ml_score(self.profile)
+        self.assertEqual(response.context['result']['match_score'], rf_score)
+        self.assertIsNone(response.context['result']['vector_score'])
+        self.assertEqual(response.context['result']['interview_questions'], [])
+        self.assertIn('kubernetes', [s.lower() for s in response.context['result']['missing_skills']])
+        self.assertEqual(GapAnalysisResult.objects.get(user=self.user).match_score, rf_score)
+
+
+def vector(*head):
+    """A 768-dimension embedding that starts with `head` (zeros after)."""
+    return [float(x) for x in head] + [0.0] * (768 - len(head))
+
+
+class JobDescriptionTests(TestCase):
+    def setUp(self):
+        patches = {
+            'generate_embedding': mock.patch.object(utils, 'generate_embedding', return_value=vector(1)),
+            'generate_embeddings': mock.patch.object(
+                utils, 'generate_embeddings', side_effect=lambda texts: [vector(i + 1) for i in range(len(texts))]
+            ),
+            'record_cache_hit': mock.patch.object(utils, 'record_cache_hit'),
+        }
+        for name, patch in patches.items():
+            setattr(self, name, patch.start())
+            self.addCleanup(patch.stop)
+
+    def test_whitespace_variants_share_one_row_and_one_embedding(self):
+        first = utils.get_or_create_job_description('Backend  engineer\n\n\n\nPython,\tDjango ')
+        again = utils.get_or_create_job_description('Backend engineer\n\nPython, Django')
+
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(JobDescription.objects.count(), 1)
+        self.generate_embedding.assert_called_once_with('Backend engineer\n\nPython, Django')
+        self.record_cache_hit.assert_called_once_with('gemini', utils.EMBEDDING_MODEL, 'embed', len(first.text))
+
+    def test_missing_or_outdated_vector_is_embedded_again(self):
+        jd = utils.get_or_create_job_description('Data analyst, SQL')
+        JobDescription.objects.filter(pk=jd.pk).update(embedding_model='models/text-embedding-004')
+        utils.get_or_create_job_description('Data analyst, SQL')
+        JobDescription.objects.filter(pk=jd.pk).update(embedding=None)
+        utils.get_or_create_job_description('Data analyst, SQL')
+
+        self.assertEqual(self.generate_embedding.call_count, 3)
+        self.assertEqual(JobDescription.objects.get(pk=jd.pk).embedding_model, utils.EMBEDDING_MODEL)
+        self.record_cache_hit.assert_not_called()
+
+    def test_batch_dedups_and_only_embeds_rows_without_a_vector(self):
+        known = utils.get_or_create_job_description('Frontend engineer, React')
+        jds = utils.get_or_create_job_descriptions(
+            ['DevOps, Kubernetes', 'Frontend  engineer, React', 'DevOps,  Kubernetes', '  ', 'QA, Selenium']
+        )
+
+        self.assertEqual([jd.text for jd in jds], ['DevOps, Kubernetes', 'Frontend engineer, React', 'QA, Selenium'])
+        self.assertEqual(jds[1].pk, known.pk)
+        self.generate_embeddings.assert_called_once_with(['DevOps, Kubernetes', 'QA, Selenium'])
+        self.record_cache_hit.assert_called_once_with(
+            'gemini', utils.EMBEDDING_MODEL, 'embed_batch', len(known.text), 1,
+        )
+        self.assertEqual(JobDescription.objects.count(), 3)
+        self.assertFalse(JobDescription.objects.filter(embedding=None).exists())
+
+
+RESUME_PARAGRAPHS = [
+    "Organised the campus photography club and its yearly exhibition for three years running.",
+    "Deployed services on Kubernetes clusters and wrote Terraform modules for staging environments.",
+    "Tutored first-year students in calculus and linear algebra during evening sessions.",
+    "Volunteered at the city library, sorting donations and running a weekend reading hour.",
+    "Automated Kubernetes rollouts with Helm charts and Terraform pipelines in GitHub Actions.",
+    "Enjoys hiking, chess tournaments and baking sourdough bread on weekends.",
+]
+DEVOPS_JD = "DevOps engineer: Kubernetes, Terraform, Helm"
+
+
+class CompactionTests(SimpleTestCase):
+    text = '\n\n'.join(RESUME_PARAGRAPHS)
+
+    def test_text_that_fits_is_returned_unchanged(self):
+        self.assertEqual(compaction.compact_text(f"  {self.text}\n", DEVOPS_JD, 1000), self.text)
+
+    def test_output_stays_within_the_budget(self):
+        for budget in (30, 45, 60, 100):
+            compacted = compaction.compact_text(self.text, DEVOPS_JD, budget)
+            self.assertLessEqual(compaction.estimate_tokens(compacted), budget, budget)
+
+    def test_best_chunks_are_kept_in_document_order_with_gaps_marked(self):
+        compacted = compaction.compact_text(self.text, DEVOPS_JD, 60)
+        # The Helm paragraph ranks first, but the earlier one still comes first
+        self.assertEqual(compacted, '\n...\n'.join([RESUME_PARAGRAPHS[1], RESUME_PARAGRAPHS[4]]))
+
+    def test_adjacent_chunks_have_no_gap_marker(self):
+        chunks = compaction.split_into_chunks(self.text)
+        packed = compaction.pack_chunks(chunks, [0, 3, 2, 0, 1, 0], budget=chunks[1]['tokens'] + chunks[2]['tokens'] + 10)
+        self.assertEqual(packed, '\n'.join(RESUME_PARAGRAPHS[1:3]))
+
+
+class InlinePool:
+    """Stands in for batch._EXPLAIN_POOL: runs each job at once, on the test's connection."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+# Directions in the first two dimensions; the resume points along the first
+JD_VECTORS = {
+    'Python backend engineer': vector(1, 0.1),
+    'Data engineer, Python and SQL': vector(0.7, 0.7),
+    'Java developer': vector(0.1, 1),
+}
+
+
+@override_settings(AI_USER_RATE_PER_MINUTE=0, AI_ADMISSION_CACHE='default', AI_BATCH_MAX_JOBS=3, AI_BATCH_TOP_K=2)
+class BatchGapAnalysisTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('batch', 'batch@example.com', 'pw')
+        cls.profile = Profile.objects.create(
+            user=cls.user, resume_text='Python developer with Django and SQL.', resume_embedding=vector(1),
+        )
+
+    def setUp(self):
+        caches['default'].clear()
+        patches = [
+            mock.patch.object(utils, 'generate_embeddings', side_effect=lambda texts: [JD_VECTORS[t] for t in texts]),
+            mock.patch.object(batch, 'analyze_gap', return_value={
+                'interview_questions': ['Why Python?'], 'summary': 'Strong fit.',
+            }),
+            mock.patch.object(batch, '_EXPLAIN_POOL', InlinePool()),
+            # Closing connections would end the test's transaction
+            mock.patch.object(batch, 'close_old_connections'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client.force_login(self.user)
+
+    def post_json(self, payload):
+        return self.client.post(reverse('batch_gap_analysis'), payload, content_type='application/json')
+
+    def test_ranking_is_best_match_first(self):
+        ranked = batch.rank_job_descriptions(self.profile, list(JD_VECTORS)[::-1])
+
+        self.assertEqual([entry['title'] for entry in ranked], [
+            'Python backend engineer', 'Data engineer, Python and SQL', 'Java developer',
+        ])
+        self.assertEqual([entry['vector_score'] for entry in ranked], [100, 71, 10])
+        self.assertEqual(utils.generate_embeddings.call_count, 1)
+
+    def test_json_input_ranks_and_explains_the_top_k(self):
+        response = self.post_json({'job_descriptions': list(JD_VECTORS), 'top_k': 1})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([r['title'] for r in body['results']][0], 'Python backend engineer')
+        self.assertEqual(body['explaining'], [body['results'][0]['job_description_id']])
+        analysis = GapAnalysisResult.objects.get(user=self.user)
+        self.assertEqual(analysis.job_description_id, body['results'][0]['job_description_id'])
+        self.assertEqual((analysis.match_score, analysis.summary), (body['results'][0]['match_score'], 'Strong fit.'))
+
+    def test_form_input_uses_the_default_top_k(self):
+        response = self.client.post(reverse('batch_gap_analysis'), {'job_descriptions': list(JD_VECTORS)})
+
+        self.assertEqual(len(response.json()['explaining']), 2)
+        self.assertEqual(GapAnalysisResult.objects.filter(user=self.user).count(), 2)
+
+    def test_top_k_is_clamped_to_the_batch(self):
+        for top_k, explained in ((99, 3), (-4, 0)):
+            response = self.post_json({'job_descriptions': list(JD_VECTORS), 'top_k': top_k})
+            self.assertEqual(len(response.json()['explaining']), explained, top_k)
+
+    def test_invalid_input_is_rejected(self):
+        too_many = list(JD_VECTORS) + ['Go developer']
+        for payload, error in (
+            ({'job_descriptions': []}, 'at least one'),
+            ({'job_descriptions': ['  ', 7]}, 'at least one'),
+            ({'job_descriptions': too_many}, 'At most 3'),
+            ({'job_descriptions': list(JD_VECTORS), 'top_k': 'all'}, 'top_k'),
+        ):
+            response = self.post_json(payload)
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertIn(error, response.json()['error'])
+        response = self.client.post(reverse('batch_gap_analysis'), b'{not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        utils.generate_embeddings.assert_not_called()
+        self.assertFalse(GapAnalysisResult.objects.exists())
+
+    def test_failed_explanations_are_not_stored(self):
+        batch.analyze_gap.side_effect = RuntimeError('groq down')
+        ranked = batch.rank_job_descriptions(self.profile, list(JD_VECTORS))
+        futures = batch.explain_top_matches(self.user, self.profile.resume_text, ranked, 2)
+
+        self.assertEqual([f.result() for f in futures], [None, None])
+        self.assertFalse(GapAnalysisResult.objects.exists())
+
+
+@override_settings(
+    AI_ADMISSION_CACHE='default', AI_USER_BURST=3, AI_USER_RATE_PER_MINUTE=6,
+    AI_MAX_CONCURRENCY_PER_PROCESS=4, AI_QUEUE_SIZE=8, AI_CLUSTER_MAX_CONCURRENCY=2,
+)
+class AdmissionTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        admission._gate = None
+        self.addCleanup(setattr, admission, '_gate', None)
+
+    def test_gate_queues_then_rejects(self):
+        gate = admission.AdmissionGate(limit=1, queue_size=1, timeout=2)
+        self.assertTrue(gate.acquire())
+
+        waiter = {}
+        thread = threading.Thread(target=lambda: waiter.setdefault('admitted', gate.acquire()))
+        thread.start()
+        for _ in range(200):
+            if gate.stats()['queue_depth']:
+                break
+            threading.Event().wait(0.005)
+        self.assertFalse(gate.acquire())  # queue full: rejected without waiting
+        gate.release()
+        thread.join(2)
+
+        self.assertTrue(waiter['admitted'])
+        self.assertEqual(gate.stats()['rejected_total'], 1)
+        self.assertFalse(admission.AdmissionGate(limit=0, queue_size=1, timeout=0.01).acquire())
+
+    def test_user_rate_allows_the_burst_then_asks_to_wait(self):
+        self.assertEqual([admission._take_user_token(7)[0] for _ in range(3)], [0, 0, 0])
+        self.assertGreater(admission._take_user_token(7)[0], 0)
+        self.assertEqual(admission._take_user_token(8)[0], 0)  # other users are unaffected
+
+    def test_concurrent_requests_cannot_overspend_the_rate(self):
+        results, start = [], threading.Barrier(20)
+
+        def take():
+            start.wait()
+            results.append(admission._take_user_token(9)[0])
+
+        threads = [threading.Thread(target=take) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(2)
+        self.assertEqual(results.count(0), 3)
+
+    def test_cluster_limit_and_ttl_refresh(self):
+        cache = caches['default']
+        with mock.patch.object(cache, 'touch', wraps=cache.touch) as touch:
+            self.assertTrue(admission._cluster_enter())
+            self.assertTrue(admission._cluster_enter())
+            self.assertFalse(admission._cluster_enter())
+        self.assertEqual(touch.call_count, 3)
+        self.assertEqual(cache.get(admission.CLUSTER_COUNTER_KEY), 2)
+        admission._cluster_exit()
+        self.assertTrue(admission._cluster_enter())
+
+    def post(self, view, **headers):
+        request = RequestFactory().post('/ai/gap-analysis/', {'job_description': 'Python role'}, **headers)
+        request.user = mock.Mock(is_authenticated=True, pk=42)
+        request._messages = CookieStorage(request)
+        return view(request), request
+
+    @staticmethod
+    def page(request):
+        if request.method == 'POST':
+            return HttpResponse('analysed')
+        return HttpResponse(f"form: {request.POST.get('job_description', '')}")
+
+    @override_settings(AI_USER_BURST=1)
+    def test_form_posts_get_the_page_back_with_the_status_and_a_message(self):
+        view = admission.ai_admission(self.page)
+        self.assertEqual(self.post(view)[0].content, b'analysed')
+
+        response, request = self.post(view)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.content, b'form: Python role')  # the posted JD is kept
+        self.assertIn('Retry-After', response)
+        self.assertIn('too quickly', [str(m) for m in get_messages(request)][0])
+
+        response, _ = self.post(view, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('error', json.loads(response.content))
+
+    @override_settings(AI_MAX_CONCURRENCY_PER_PROCESS=0, AI_QUEUE_SIZE=0, AI_RETRY_AFTER_SECONDS=10)
+    def test_busy_api_views_answer_503_json(self):
+        view = admission.ai_admission(json_errors=True)(lambda request: HttpResponse('analysed'))
+        response, _ = self.post(view)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '10')
+
+    @override_settings(AI_USER_BURST=1, AI_CLUSTER_MAX_CONCURRENCY=0, AI_RETRY_AFTER_SECONDS=10)
+    def test_capacity_rejections_refund_the_users_rate_slot(self):
+        view = admission.ai_admission(self.page)
+        for _ in range(3):
+            response, _ = self.post(view)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.content, b'form: Python role')
+        # Only the busy cluster turned these away, so the user's single slot is still free
+        self.assertEqual(admission._take_user_token(42)[0], 0)
+
+
+class LedgerTests(SimpleTestCase):
+    def test_cache_hits_are_recorded_without_a_call(self):
+        with mock.patch.object(ledger, 'record_entry') as record:
+            ledger.record_cache_hit('gemini', 'models/embed', 'embed_batch', input_chars=1200, input_items=3)
+        entry = record.call_args.args[0]
+        self.assertEqual((entry.cache_hit, entry.attempts, entry.outcome), (True, 0, 'ok'))
+        self.assertEqual((entry.operation, entry.input_chars, entry.input_items), ('embed_batch', 1200, 3))
+
+    def test_failed_calls_record_outcome_and_latency(self):
+        with mock.patch.object(ledger, 'record_entry') as record:
+            with self.assertRaises(resilience.CircuitOpenError):
+                with ledger.ledger_call('groq', 'llama', 'gap_analysis') as entry:
+                    entry.cache_hit = False
+                    raise resilience.CircuitOpenError('open')
+        entry = record.call_args.args[0]
+        self.assertEqual((entry.cache_hit, entry.outcome), (False, 'circuit_open'))
+        self.assertGreaterEqual(entry.latency_ms, 0)
@@ -3,4 +3,8 @@ from . import views
 
 urlpatterns = [
     path('gap-analysis/', views.gap_analysis_view, name='gap_analysis'),
-] 
+    path('gap-analysis/history/', views.gap_history_view, name='gap_analysis_history'),
+    path('gap-analysis/batch/', views.batch_gap_analysis_view, name='batch_gap_analysis'),
+    path('admission-stats/', views.admission_stats_view, name='ai_admission_stats'),
+    path('client-stats/', views.client_stats_view, name='ai_client_stats'),
+]
@@ -1,32 +1,94 @@
+import re
+import json
+import hashlib
 import fitz
 import numpy as np
-from google import genai
 from django.conf import settings
+from google.genai import types as genai_types
+from .singleflight import single_flight, request_key
+from .resilience import call_with_resilience
+from .clients import gemini_client, groq_client
+from .ledger import ledger_call, record_cache_hit
+from prepscore_project.metrics import timed
+
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+GAP_ANALYSIS_MODEL = "llama-3.1-8b-instant"
+# Questions + a one-line summary fit comfortably; caps runaway completions
+GAP_ANALYSIS_MAX_TOKENS = 400
+
+# Gemini accepts at most 100 contents per embed_content call
+EMBEDDING_BATCH_SIZE = 100
 
 def extract_text_from_pdf(pdf_path):
     text = ""
     try:
-        doc = fitz.open(pdf_path)
-        for page in doc:
-            text += page.get_text()
-        doc.close()
+        with timed('pdf'):
+            doc = fitz.open(pdf_path)
+            for page in doc:
+                text += page.get_text()
+            doc.close()
     except Exception as e:
         print(f"PDF extraction error: {e}")
     return text.strip()
 
+def embed_config(timeout):
+    """Per-request Gemini embed config carrying the attempt's timeout (the SDK takes ms)."""
+    return genai_types.EmbedContentConfig(http_options=genai_types.HttpOptions(timeout=int(timeout * 1000)))
+
+def _embed(text, entry):
+    try:
+        client = gemini_client()
+        with timed('embedding'):
+            result = call_with_resilience('gemini', lambda timeout: client.models.embed_content(
+                model=EMBEDDING_MODEL,
+                contents=text,
+                config=embed_config(timeout),
+            ), entry)
+        return result.embeddings[0].values
+    except Exception as e:
+        print(f"Embedding error: {e}")
+        entry.fail(e)
+        return None
+
 def generate_embedding(text):
     if not text:
         return None
+    # Identical texts embedded concurrently (double submits, shared JDs) share one call;
+    # only the caller that actually ran it is logged as a non-cache-hit
+    with ledger_call('gemini', EMBEDDING_MODEL, 'embed', len(text)) as entry:
+        return single_flight(request_key('embed', EMBEDDING_MODEL, text), lambda: _embed(text, entry))
+
+def generate_embeddings(texts):
+    """
+    Batched version of generate_embedding. Returns a list aligned with `texts`,
+    with None for any text (or batch) that could not be embedded.
+    """
+    embeddings = [None] * len(texts)
+    pending = [(i, t) for i, t in enumerate(texts) if t]
+    if not pending:
+        return embeddings
+
     try:
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        result = client.models.embed_content(
-            model="models/gemini-embedding-001",
-            contents=text,
-        )
-        return result.embeddings[0].values
+        client = gemini_client()
     except Exception as e:
         print(f"Embedding error: {e}")
-        return None
+        return embeddings
+
+    for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+        chunk = pending[start:start + EMBEDDING_BATCH_SIZE]
+        try:
+            with ledger_call('gemini', EMBEDDING_MODEL, 'embed_batch',
+                             sum(len(t) for _, t in chunk), len(chunk)) as entry, timed('embedding'):
+                result = call_with_resilience('gemini', lambda timeout: client.models.embed_content(
+                    model=EMBEDDING_MODEL,
+                    contents=[t for _, t in chunk],
+                    config=embed_config(timeout),
+                ), entry)
+            for (i, _), emb in zip(chunk, result.embeddings):
+                embeddings[i] = emb.values
+        except Exception as e:
+            print(f"Embedding error: {e}")
+    return embeddings
 
 def compute_similarity(embedding1, embedding2):
     if embedding1 is None or embedding2 is None:
@@ -43,4 +105,170 @@ def compute_similarity(embedding1, embedding2):
         return 0.0
         
     cosine_sim = np.dot(vec1, vec2) / (norm1 * norm2)
-    return float(cosine_sim)
\ No newline at end of file
+    return float(cosine_sim)
+
+def blend_match_score(rf_score, similarity):
+    """Overall fit: 60% profile strength (RF model), 40% semantic match."""
+    return round((rf_score * 0.6) + (similarity * 100 * 0.4))
+
+def compute_similarities(embedding, embeddings):
+    """Cosine similarity of one vector against many, as a single matrix product."""
+    if embedding is None or len(embeddings) == 0:
+        return np.zeros(len(embeddings))
+
+    vec = np.asarray(embedding, dtype=np.float64)
+    matrix = np.asarray(embeddings, dtype=np.float64)
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vec)
+    dots = matrix @ vec
+    # Zero vectors score 0.0, same as compute_similarity
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+def normalize_job_description(text):
+    """Collapses whitespace so copy-pasted variants of the same posting share one row."""
+    lines = [re.sub(r'[ \t\u00a0]+', ' ', line).strip() for line in (text or '').splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def job_description_hash(normalized_text):
+    return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+
+def get_or_create_job_description(text):
+    """
+    Returns the shared JobDescription row for this text, embedding it only if no
+    vector exists yet for the current EMBEDDING_MODEL. Each distinct JD is embedded once.
+    """
+    from .models import JobDescription
+
+    normalized = normalize_job_description(text)
+    jd, _ = JobDescription.objects.get_or_create(
+        content_hash=job_description_hash(normalized),
+        defaults={'text': normalized},
+    )
+
+    if jd.embedding is None or jd.embedding_model != EMBEDDING_MODEL:
+        embedding = generate_embedding(normalized[:8000])
+        if embedding:
+            jd.embedding = embedding
+            jd.embedding_model = EMBEDDING_MODEL
+            jd.save(update_fields=['embedding', 'embedding_model'])
+    else:
+        record_cache_hit('gemini', EMBEDDING_MODEL, 'embed', len(normalized[:8000]))
+    return jd
+
+def get_or_create_job_descriptions(texts):
+    """
+    Batch counterpart of get_or_create_job_description: one lookup query, one
+    bulk insert, and batched embedding calls for the rows that still need a vector.
+    Returns JobDescription rows in the order of the (deduplicated) input.
+    """
+    from .models import JobDescription
+
+    by_hash = {}
+    for text in texts:
+        normalized = normalize_job_description(text)
+        if normalized:
+            by_hash.setdefault(job_description_hash(normalized), normalized)
+    if not by_hash:
+        return []
+
+    JobDescription.objects.bulk_create(
+        [JobDescription(content_hash=h, text=t) for h, t in by_hash.items()],
+        ignore_conflicts=True,
+    )
+    rows = {jd.content_hash: jd for jd in JobDescription.objects.filter(content_hash__in=by_hash)}
+    jds = [rows[h] for h in by_hash]
+
+    stale = [jd for jd in jds if jd.embedding is None or jd.embedding_model != EMBEDDING_MODEL]
+    reused = [jd for jd in jds if jd.embedding is not None and jd.embedding_model == EMBEDDING_MODEL]
+    if reused:
+        # Stored vectors reused: logged as a cache hit so the report shows what dedup saves
+        record_cache_hit('gemini', EMBEDDING_MODEL, 'embed_batch',
+                         sum(len(jd.text[:8000]) for jd in reused), len(reused))
+    if stale:
+        vectors = generate_embeddings([jd.text[:8000] for jd in stale])
+        updated = []
+        for jd, vector in zip(stale, vectors):
+            if vector:
+                jd.embedding = vector
+                jd.embedding_model = EMBEDDING_MODEL
+                updated.append(jd)
+        if updated:
+            JobDescription.objects.bulk_update(updated, ['embedding', 'embedding_model'])
+    return jds
+
+def build_gap_prompt(resume_text, jd_text, missing_skills):
+    from .compaction import compact_text
+
+    gaps = ', '.join(missing_skills) or 'None detected'
+    # Keep the resume chunks most relevant to this JD, and the JD's own core
+    # requirements (boilerplate shares few terms with the rest of the posting)
+    resume_excerpt = compact_text(resume_text, jd_text, settings.GAP_PROMPT_RESUME_TOKENS)
+    jd_excerpt = compact_text(jd_text, jd_text, settings.GAP_PROMPT_JD_TOKENS)
+    return f"""
+You are a Senior Hiring Manager reviewing a candidate's resume against a Job Description.
+
+CANDIDATE RESUME (most relevant excerpts):
+{resume_excerpt}
+
+JOB DESCRIPTION:
+{jd_excerpt}
+
+SKILL GAPS ALREADY DETECTED:
+{gaps}
+
+Respond ONLY in this exact JSON format, no extra text outside the JSON:
+{{
+    "interview_questions": [
+        "Interview question 1 targeting their weak area?",
+        "Interview question 2 targeting their weak area?"
+    ],
+    "summary": "One sentence summary of how well this candidate fits the role."
+}}
+"""
+
+def clean_ai_text(text):
+    if not isinstance(text, str): return text
+    # Remove backticks and simple markdown
+    t = re.sub(r'[`*]', '', text)
+    return t.strip()
+
+def analyze_gap(resume_text, jd_text, missing_skills=()):
+    """
+    Asks Groq for interview questions and a one-line summary. Missing skills are
+    detected locally (profiles.skills) and only passed in as context.
+    Returns a dict of cleaned values; raises if the call or JSON parsing fails.
+    """
+    prompt = build_gap_prompt(resume_text, jd_text, missing_skills)
+
+    with ledger_call('groq', GAP_ANALYSIS_MODEL, 'gap_analysis', len(prompt)) as entry:
+        def complete():
+            client = groq_client()
+            with timed('llm'):
+                chat_response = call_with_resilience('groq', lambda timeout: client.chat.completions.create(
+                    model=GAP_ANALYSIS_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    response_format={"type": "json_object"},
+                    max_tokens=GAP_ANALYSIS_MAX_TOKENS,
+                    timeout=timeout,
+                ), entry)
+            if chat_response.usage:
+                entry.prompt_tokens = chat_response.usage.prompt_tokens
+                entry.completion_tokens = chat_response.usage.completion_tokens
+            return chat_response.choices[0].message.content.strip()
+
+        response_text = single_flight(
+            request_key('groq', GAP_ANALYSIS_MODEL, GAP_ANALYSIS_MAX_TOKENS, prompt), complete
+        )
+        entry.output_chars = len(response_text)
+
+    # Clean markdown JSON wrappers if present
+    if response_text.startswith("```"):
+        response_text = re.sub(r'^```(?:json)?\s*', '', response_text)
+        response_text = re.sub(r'\s*```$', '', response_text)
+
+    ai_data = json.loads(response_text)
+
+    return {
+        'interview_questions': [clean_ai_text(q) for q in ai_data.get('interview_questions', [])],
+        'summary': clean_ai_text(ai_data.get('summary', '')),
+    }
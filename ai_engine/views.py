@@ -1,20 +1,33 @@
 import json
-from groq import Groq
 from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from profiles.models import Profile
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.contrib.admin.views.decorators import staff_member_required
+from profiles.models import Profile, Skill
 from profiles.scorer import calculate_ml_score
+from profiles.skills import find_missing_skills
 from .models import GapAnalysisResult
-from .utils import extract_text_from_pdf, generate_embedding, compute_similarity
+from .utils import (
+    compute_similarity, get_or_create_job_description, analyze_gap, blend_match_score
+)
+from .batch import rank_job_descriptions, explain_top_matches
+from .admission import ai_admission, admission_stats
+from .clients import client_stats
+from prepscore_project.pagination import request_page
 
 
+def score_color(score):
+    return 'success' if score >= 70 else ('warning' if score >= 50 else 'danger')
+
 
 @login_required
+@ai_admission
 def gap_analysis_view(request):
     result = None
-    past_results = GapAnalysisResult.objects.filter(user=request.user)[:3]
+    past_results = GapAnalysisResult.objects.filter(user=request.user).only('created_at', 'match_score')[:3]
 
     profile, _ = Profile.objects.get_or_create(user=request.user)
     resume_ready = bool(profile.resume_text)
@@ -33,89 +46,47 @@ def gap_analysis_view(request):
         profile = Profile.objects.get(user=request.user)
         rf_score = calculate_ml_score(profile)
 
-        jd_embedding = generate_embedding(job_description[:8000])
-        
-        if not jd_embedding:
-            messages.error(request, "AI was unable to generate an embedding for that Job Description. Please try again.")
-            return redirect('gap_analysis')
-
-        similarity = compute_similarity(profile.resume_embedding, jd_embedding)
-        vector_score = similarity * 100
-
-        final_score = round((rf_score * 0.6) + (vector_score * 0.4))
-
-        prompt = f"""
-You are a Senior Hiring Manager reviewing a candidate's resume against a Job Description.
-
-CANDIDATE RESUME:
-{profile.resume_text[:3000]}
+        jd = get_or_create_job_description(job_description)
+
+        if jd.embedding is None:
+            # Degrade to the profile-strength score rather than failing the whole analysis
+            messages.warning(request, "Semantic matching is unavailable right now; the score below is based on your profile strength only.")
+            vector_score = None
+            final_score = rf_score
+        else:
+            similarity = compute_similarity(profile.resume_embedding, jd.embedding)
+            vector_score = round(similarity * 100)
+            final_score = blend_match_score(rf_score, similarity)
+
+        skill_names = Skill.objects.filter(profile=profile).values_list('canonical_name', flat=True)
+        ai_data = {
+            'missing_skills': find_missing_skills(jd.text, profile.resume_text, skill_names),
+            'interview_questions': [],
+            'summary': '',
+        }
 
-JOB DESCRIPTION:
-{job_description[:2000]}
-
-Respond ONLY in this exact JSON format, no extra text outside the JSON:
-{{
-    "missing_skills": ["skill1", "skill2", "skill3"],
-    "interview_questions": [
-        "Interview question 1 targeting their weak area?",
-        "Interview question 2 targeting their weak area?"
-    ],
-    "summary": "One sentence summary of how well this candidate fits the role."
-}}
-"""
         try:
-            groq_client = Groq(api_key=settings.GROQ_API_KEY)
-            chat_response = groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            response_text = chat_response.choices[0].message.content.strip()
-
-            # Clean markdown JSON wrappers if present
-            if response_text.startswith("```"):
-                # Remove leading ```json or ``` and trailing ```
-                import re
-                response_text = re.sub(r'^```(?:json)?\s*', '', response_text)
-                response_text = re.sub(r'\s*```$', '', response_text)
-
-            ai_data = json.loads(response_text)
-
-            # --- Aggressive String Cleaning ---
-            def clean_text(text):
-                if not isinstance(text, str): return text
-                # Remove backticks and simple markdown
-                import re
-                t = re.sub(r'[`*]', '', text) 
-                return t.strip()
-
-            clean_skills = [clean_text(s) for s in ai_data.get('missing_skills', [])]
-            clean_questions = [clean_text(q) for q in ai_data.get('interview_questions', [])]
-            clean_summary = clean_text(ai_data.get('summary', ''))
-
-            GapAnalysisResult.objects.create(
-                user=request.user,
-                job_description=job_description,
-                match_score=final_score,
-                missing_skills=clean_skills,
-                interview_questions=clean_questions,
-                summary=clean_summary,
-            )
-
-            result = {
-                'rf_score': rf_score,
-                'vector_score': round(vector_score),
-                'match_score': final_score,
-                'missing_skills': clean_skills,
-                'interview_questions': clean_questions,
-                'summary': clean_summary,
-            }
-
-            # Refresh history to include the latest clean result
-            past_results = GapAnalysisResult.objects.filter(user=request.user)[:3]
-
+            ai_data.update(analyze_gap(profile.resume_text, jd.text, ai_data['missing_skills']))
         except Exception as e:
-            messages.error(request, f"AI Analysis failed: {str(e)}")
+            # The local skill-gap result is still worth showing and saving
+            messages.warning(request, f"AI explanation unavailable, showing skill gaps only: {str(e)}")
+
+        GapAnalysisResult.objects.create(
+            user=request.user,
+            job_description=jd,
+            match_score=final_score,
+            **ai_data,
+        )
+
+        result = {
+            'rf_score': rf_score,
+            'vector_score': vector_score,
+            'match_score': final_score,
+            **ai_data,
+        }
+
+        # Refresh history to include the latest clean result
+        past_results = GapAnalysisResult.objects.filter(user=request.user).only('created_at', 'match_score')[:3]
 
     # Convert to robust dict list - immune to formatter line splits
     history_list = []
@@ -123,12 +94,88 @@ Respond ONLY in this exact JSON format, no extra text outside the JSON:
         history_list.append({
             'date': r.created_at.strftime("%b %d"),
             'score': r.match_score,
-            'color': 'success' if r.match_score >= 70 else ('warning' if r.match_score >= 50 else 'danger')
+            'color': score_color(r.match_score),
         })
 
     context = {
         'result': result,
         'past_results': history_list,
         'resume_ready': resume_ready,
+        # Refills the form when admission control turns a post away
+        'job_description': request.POST.get('job_description', ''),
     }
-    return render(request, 'ai_engine/gap_analysis.html', context)
\ No newline at end of file
+    return render(request, 'ai_engine/gap_analysis.html', context)
+
+
+@login_required
+def gap_history_view(request):
+    """Every past analysis, newest first, a keyset page at a time (gap_user_created_idx)."""
+    results = request_page(
+        request,
+        GapAnalysisResult.objects.filter(user=request.user).only('id', 'created_at', 'match_score', 'missing_skills', 'summary'),
+        ['-created_at', '-id'],
+        settings.LISTING_PAGE_SIZE,
+    )
+    for r in results:
+        r.color = score_color(r.match_score)
+    return render(request, 'ai_engine/gap_history.html', {'results': results})
+
+
+@login_required
+@require_POST
+@ai_admission(json_errors=True)
+def batch_gap_analysis_view(request):
+    """
+    Ranks the user's resume against many JDs at once and returns the ranking immediately.
+    LLM explanations for the top-k run in the background and are saved as GapAnalysisResults.
+
+    Accepts JSON {"job_descriptions": [...], "top_k": 5} or repeated `job_descriptions` form fields.
+    """
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON body.'}, status=400)
+        job_descriptions = payload.get('job_descriptions') or []
+        top_k = payload.get('top_k', settings.AI_BATCH_TOP_K)
+    else:
+        job_descriptions = request.POST.getlist('job_descriptions')
+        top_k = request.POST.get('top_k', settings.AI_BATCH_TOP_K)
+
+    job_descriptions = [jd for jd in job_descriptions if isinstance(jd, str) and jd.strip()]
+    if not job_descriptions:
+        return JsonResponse({'error': 'Provide at least one job description.'}, status=400)
+    if len(job_descriptions) > settings.AI_BATCH_MAX_JOBS:
+        return JsonResponse({'error': f'At most {settings.AI_BATCH_MAX_JOBS} job descriptions per batch.'}, status=400)
+
+    try:
+        top_k = max(0, min(int(top_k), len(job_descriptions)))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'top_k must be an integer.'}, status=400)
+
+    profile, _ = Profile.objects.get_or_create(user=request.user)
+    if not profile.resume_text or profile.resume_embedding is None:
+        return JsonResponse({'error': 'Please upload your resume in the Profile section first.'}, status=400)
+
+    ranked = rank_job_descriptions(profile, job_descriptions)
+    explain_top_matches(request.user, profile.resume_text, ranked, top_k)
+
+    return JsonResponse({
+        'results': [
+            {key: entry[key] for key in ('job_description_id', 'title', 'similarity', 'vector_score', 'match_score', 'missing_skills')}
+            for entry in ranked
+        ],
+        'explaining': [entry['job_description_id'] for entry in ranked[:top_k]],
+    })
+
+
+@staff_member_required
+def admission_stats_view(request):
+    """Queue depth, wait times and rejections of the AI admission gate in this process."""
+    return JsonResponse(admission_stats())
+
+
+@staff_member_required
+def client_stats_view(request):
+    """Requests vs. new connections per AI provider client in this process."""
+    return JsonResponse(client_stats())
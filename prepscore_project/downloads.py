@@ -0,0 +1,112 @@
+# In prepscore_project/downloads.py
+import os
+import re
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def file_version(path):
+    """Cheap validator for a stored file: changes whenever its size or mtime does."""
+    stat = os.stat(path)
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def etag_matches(header, etag):
+    if header.strip() == '*':
+        return True
+    # Weak comparison, as If-None-Match requires
+    tags = [t.strip() for t in header.split(',')]
+    return any(t.removeprefix('W/') == etag for t in tags)
+
+
+def _parse_range(header, size):
+    """
+    (start, end) inclusive for a single satisfiable byte range, None to ignore the
+    header and send the whole file, or 'unsatisfiable' (416). Per RFC 9110 only a
+    valid range the file can't serve is unsatisfiable; an invalid one such as
+    `bytes=5-3` or `bytes=-` is ignored.
+    """
+    match = _RANGE.match(header.replace(' ', ''))
+    if not match:
+        # Multiple ranges or other units: just send the whole file
+        return None
+    first, last = match.groups()
+    if first == '':
+        if last == '':
+            return None
+        if int(last) == 0 or size == 0:
+            return 'unsatisfiable'
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return 'unsatisfiable'
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_protected_file(request, path, name, content_type, cache_control='private, no-cache'):
+    """
+    Sends a media file the caller has already authorized, with an ETag, 304s for
+    If-None-Match, and single byte-range (206) support so PDF viewers can fetch
+    only the pages they show. With PROTECTED_MEDIA_ACCEL_PREFIX (nginx) or
+    PROTECTED_MEDIA_SENDFILE (Apache/lighttpd) the bytes are left to the web server.
+    `name` is the file's path relative to MEDIA_ROOT.
+    """
+    version = file_version(path)
+    etag = f'"{version}"'
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and etag_matches(if_none_match, etag):
+        return finish(HttpResponseNotModified())
+
+    if settings.PROTECTED_MEDIA_ACCEL_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.PROTECTED_MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + name.lstrip('/')
+        return finish(response)
+    if settings.PROTECTED_MEDIA_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = os.path.abspath(path)
+        return finish(response)
+
+    size = os.path.getsize(path)
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, size)
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+
+    if byte_range is None:
+        return finish(FileResponse(open(path, 'rb'), content_type=content_type))
+
+    start, end = byte_range
+    response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206, content_type=content_type)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    return finish(response)
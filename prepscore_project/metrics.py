@@ -0,0 +1,253 @@
+# In prepscore_project/metrics.py
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates
+
+# Phases of a request we time separately. Anything not covered is "other" time
+# (Python view code, middleware, serialization).
+PHASES = ('db', 'pdf', 'embedding', 'llm', 'ml', 'template')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+_current_view = contextvars.ContextVar('current_view', default='')
+
+
+def current_view():
+    """URL name of the view handling the current request ('' outside a request)."""
+    return _current_view.get()
+
+
+@contextmanager
+def using_view(name):
+    """Attributes work done off the request thread (e.g. a worker pool) to `name`."""
+    token = _current_view.set(name)
+    try:
+        yield
+    finally:
+        _current_view.reset(token)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram keyed by a tuple of label values."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+        series['counts'][bisect_left(self.buckets, value)] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def render(self, name, label_names):
+        lines = []
+        for labels, series in sorted(self._series.items()):
+            base = _labels(zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series['counts']):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f'{name}_bucket{{{base},le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{base}}} {series["sum"]:.6f}')
+            lines.append(f'{name}_count{{{base}}} {series["count"]}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return ','.join(f'{k}="{_escape(v)}"' for k, v in pairs)
+
+
+class MetricsRegistry:
+    """Per-process aggregates. Scrape every worker (or use a sidecar) for cluster totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_seconds = Histogram(DURATION_BUCKETS)
+        self.phase_seconds = Histogram(DURATION_BUCKETS)
+        self.db_queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.requests_total = {}
+
+    def observe_request(self, view, method, status, seconds, timings):
+        with self._lock:
+            key = (view, method, str(status))
+            self.requests_total[key] = self.requests_total.get(key, 0) + 1
+            self.request_seconds.observe((view,), seconds)
+            self.db_queries.observe((view,), timings.get('db', (0, 0.0))[0])
+            for phase, (count, phase_seconds) in timings.items():
+                self.phase_seconds.observe((view, phase), phase_seconds)
+
+    def observe_phase(self, view, phase, seconds):
+        with self._lock:
+            self.phase_seconds.observe((view, phase), seconds)
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP prepscore_requests_total Requests handled, by view, method and status.',
+                '# TYPE prepscore_requests_total counter',
+            ]
+            for (view, method, status), count in sorted(self.requests_total.items()):
+                lines.append(f'prepscore_requests_total{{{_labels([("view", view), ("method", method), ("status", status)])}}} {count}')
+            lines += [
+                '# HELP prepscore_request_duration_seconds Wall time per request, by view.',
+                '# TYPE prepscore_request_duration_seconds histogram',
+            ] + self.request_seconds.render('prepscore_request_duration_seconds', ('view',))
+            lines += [
+                '# HELP prepscore_request_phase_seconds Time per request spent in db, pdf, embedding, llm, ml and template.',
+                '# TYPE prepscore_request_phase_seconds histogram',
+            ] + self.phase_seconds.render('prepscore_request_phase_seconds', ('view', 'phase'))
+            lines += [
+                '# HELP prepscore_request_db_queries Database queries per request, by view.',
+                '# TYPE prepscore_request_db_queries histogram',
+            ] + self.db_queries.render('prepscore_request_db_queries', ('view',))
+        return lines
+
+
+REGISTRY = MetricsRegistry()
+
+
+def record_phase(phase, seconds, count=1):
+    timings = _request_timings.get()
+    if timings is None:
+        # Outside a request (background threads, management commands)
+        REGISTRY.observe_phase('-', phase, seconds)
+        return
+    entry = timings.setdefault(phase, [0, 0.0])
+    entry[0] += count
+    entry[1] += seconds
+
+
+@contextmanager
+def timed(phase):
+    """Attributes the wrapped block's wall time to `phase` of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_phase('db', time.perf_counter() - started)
+
+
+class RequestTimingMiddleware:
+    """
+    Times every request and its phases, feeds the /metrics histograms and, with
+    SERVER_TIMING_HEADER on, adds a Server-Timing header for staff (or everyone
+    under DEBUG) so the breakdown shows up in the browser's devtools.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = {}
+        token = _request_timings.set(timings)
+        view_token = _current_view.set('')
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_time_query):
+                response = self.get_response(request)
+        finally:
+            _current_view.reset(view_token)
+            _request_timings.reset(token)
+        total = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.view_name else 'unresolved'
+        REGISTRY.observe_request(view, request.method, response.status_code, total, timings)
+
+        if settings.SERVER_TIMING_HEADER and _is_staff_or_debug(request):
+            parts = [f'{phase};dur={seconds * 1000:.1f};desc="{count}x"' for phase, (count, seconds) in timings.items()]
+            parts.append(f'total;dur={total * 1000:.1f}')
+            response['Server-Timing'] = ', '.join(parts)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = getattr(request, 'resolver_match', None)
+        if match and match.view_name:
+            _current_view.set(match.view_name)
+        return None
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+def _is_staff_or_debug(request):
+    return settings.DEBUG or _is_staff(request)
+
+
+def _has_metrics_token(request):
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return bool(settings.METRICS_TOKEN) and scheme.lower() == 'bearer' and \
+        hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return self.template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose top-level renders count as the "template" phase."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+def _extra_metrics():
+    # AI admission and client pool stats, if those modules are in use
+    from ai_engine.admission import admission_stats
+    from ai_engine.clients import client_stats
+
+    lines = ['# TYPE prepscore_ai_admission gauge']
+    for key, value in admission_stats().items():
+        lines.append(f'prepscore_ai_admission{{{_labels([("stat", key)])}}} {value}')
+    lines.append('# TYPE prepscore_ai_client gauge')
+    for provider, stats in client_stats().items():
+        for key in ('requests', 'connections_opened'):
+            lines.append(f'prepscore_ai_client{{{_labels([("provider", provider), ("stat", key)])}}} {stats[key]}')
+    return lines
+
+
+def metrics_view(request):
+    """Prometheus text exposition for this process. Staff, METRICS_TOKEN or METRICS_ALLOWED_IPS only."""
+    if not (_has_metrics_token(request)
+            or request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+            or _is_staff(request)):
+        return HttpResponseForbidden()
+    body = '\n'.join(REGISTRY.render() + _extra_metrics()) + '\n'
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
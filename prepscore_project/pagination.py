@@ -0,0 +1,104 @@
+# In prepscore_project/pagination.py
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(obj, ordering):
+    """Opaque ?after=/?before= token holding obj's values for the ordering columns."""
+    values = [getattr(obj, field.lstrip('-')) for field in ordering]
+    # isoformat() keeps microseconds (DjangoJSONEncoder would cut them and skip rows)
+    raw = json.dumps(values, default=lambda v: v.isoformat(), separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """The column values inside a cursor, or None if it's malformed (callers show page 1)."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (ValueError, TypeError, FieldDoesNotExist, ValidationError):
+        return None
+
+
+def _seek(ordering, values, forward):
+    """Rows strictly after (forward) or before the cursor row in `ordering`."""
+    condition, equal = Q(), {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') == forward else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def _reverse(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, previous_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_other_pages(self):
+        return bool(self.next_cursor or self.previous_cursor)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_page(queryset, ordering, per_page, after=None, before=None):
+    """
+    One page of `queryset` in `ordering`, which must end in a unique column (id) and
+    should match an index that starts with the queryset's filter columns. Instead
+    of OFFSET, each page seeks past the previous page's last row, so the database
+    reads per_page + 1 index entries however deep the page is.
+    """
+    model = queryset.model
+    after_values = decode_cursor(after, model, ordering) if after else None
+    before_values = decode_cursor(before, model, ordering) if before and not after_values else None
+
+    if before_values:
+        # Walk backwards from the cursor, then flip the rows back into display order
+        queryset = queryset.filter(_seek(ordering, before_values, forward=False)).order_by(*_reverse(ordering))
+    elif after_values:
+        queryset = queryset.filter(_seek(ordering, after_values, forward=True)).order_by(*ordering)
+    else:
+        queryset = queryset.order_by(*ordering)
+
+    rows = list(queryset[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before_values:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows, None, None)
+    # Coming back from a later page there's always a next one; after a cursor, a previous one
+    more_after = has_more if not before_values else True
+    more_before = bool(after_values) or (bool(before_values) and has_more)
+    return KeysetPage(
+        rows,
+        encode_cursor(rows[-1], ordering) if more_after else None,
+        encode_cursor(rows[0], ordering) if more_before else None,
+    )
+
+
+def request_page(request, queryset, ordering, per_page):
+    """keyset_page driven by the request's ?after= / ?before= cursors."""
+    return keyset_page(
+        queryset, ordering, per_page,
+        after=request.GET.get('after') or None, before=request.GET.get('before') or None,
+    )
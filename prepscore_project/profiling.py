@@ -0,0 +1,161 @@
+# In prepscore_project/profiling.py
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
+
+# Frames from these files are bookkeeping, not the request's own work
+_SKIP_FILES = (__file__, threading.__file__)
+
+
+def _frame_label(code):
+    # Collapsed-stack format separates frames with ';' (the count follows the last space)
+    name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name.replace(';', ':')
+
+
+class StackSampler:
+    """
+    One background thread per process that, while any request is being profiled,
+    wakes every PROFILE_INTERVAL_MS and records the current stack of each profiled
+    thread. Unprofiled requests cost nothing; profiled ones pay only for the samples.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._targets = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+
+    def start(self, thread_id):
+        stacks = Counter()
+        with self._lock:
+            self._targets[thread_id] = stacks
+            self._ensure_thread()
+        self._wake.set()
+        return stacks
+
+    def stop(self, thread_id):
+        with self._lock:
+            self._targets.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                targets = dict(self._targets)
+                if not targets:
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            for thread_id, stacks in targets.items():
+                frame = frames.get(thread_id)
+                labels = []
+                while frame is not None and len(labels) < 200:
+                    if frame.f_code.co_filename not in _SKIP_FILES:
+                        labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if labels:
+                    stacks[';'.join(reversed(labels))] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000.0)
+        return _sampler
+
+
+def _rotate(directory, keep):
+    """Deletes the oldest profiles so at most `keep` remain."""
+    files = sorted(
+        (p for p in directory.iterdir() if p.suffix in ('.collapsed', '.prof')),
+        key=lambda p: p.stat().st_mtime,
+    )
+    for path in files[:max(0, len(files) - keep)]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when staff ask for it (X-Profile header or ?_profile query
+    flag) or at random with probability PROFILE_SAMPLE_RATE. Sampled stacks are saved
+    in collapsed format (flamegraph.pl, speedscope); `X-Profile: pstats` or
+    `?_profile=pstats` uses cProfile instead and saves a .prof for pstats/snakeviz.
+    Random samples are only kept when slower than PROFILE_MIN_DURATION_MS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _requested(self, request):
+        flag = request.headers.get('X-Profile') or request.GET.get('_profile')
+        if flag is None or not (request.user.is_authenticated and request.user.is_staff):
+            return None
+        return flag or '1'
+
+    def __call__(self, request):
+        requested = self._requested(request)
+        if requested is None and not (settings.PROFILE_SAMPLE_RATE > 0
+                                      and random.random() < settings.PROFILE_SAMPLE_RATE):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        if requested == 'pstats':
+            profile = cProfile.Profile()
+            response = profile.runcall(self.get_response, request)
+        else:
+            sampler = get_sampler()
+            stacks = sampler.start(threading.get_ident())
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop(threading.get_ident())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if requested is None and elapsed_ms < settings.PROFILE_MIN_DURATION_MS:
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match and match.view_name else 'unresolved').replace(':', '-')
+        directory = Path(settings.PROFILE_DIR)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{view}-{elapsed_ms:.0f}ms-{os.getpid()}"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            if requested == 'pstats':
+                path = directory / f'{name}.prof'
+                profile.dump_stats(path)
+            else:
+                path = directory / f'{name}.collapsed'
+                path.write_text(''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items())))
+            _rotate(directory, settings.PROFILE_MAX_FILES)
+        except OSError as e:
+            print(f"Profile write error: {e}")
+            return response
+
+        if requested is not None:
+            response['X-Profile-File'] = path.name
+        return response
@@ -22,11 +22,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'prepscore_project.metrics.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'prepscore_project.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -35,7 +37,7 @@ ROOT_URLCONF = 'prepscore_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'prepscore_project.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -76,19 +78,160 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# `collectstatic` copies only template-referenced assets from static/. With
+# STATIC_MANIFEST=True it also fingerprints them and writes .gz/.br siblings
+# (prepscore_project.staticfiles); {% static %} then needs that manifest, so only
+# turn it on where collectstatic runs as part of the deploy.
+STATICFILES_FINDERS = [
+    'prepscore_project.staticfiles.ReferencedFilesFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+]
+STATIC_MANIFEST = os.getenv('STATIC_MANIFEST', 'False') == 'True'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': (
+        'prepscore_project.staticfiles.PrecompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    )},
+}
+# Static paths built at runtime (not visible as {% static '...' %} literals)
+STATIC_EXTRA_ASSETS = []
+# Serve STATIC_ROOT from Django with precompressed variants and immutable caching,
+# for local runs with DEBUG off. Production should let nginx/a CDN do this.
+SERVE_STATIC = os.getenv('SERVE_STATIC', 'False') == 'True'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Media is private and only reachable through views that check ownership
+# (prepscore_project.downloads). Let the web server send the bytes with either an
+# internal nginx location (e.g. '/protected-media/' aliased to MEDIA_ROOT) or X-Sendfile.
+PROTECTED_MEDIA_ACCEL_PREFIX = os.getenv('PROTECTED_MEDIA_ACCEL_PREFIX', '')
+PROTECTED_MEDIA_SENDFILE = os.getenv('PROTECTED_MEDIA_SENDFILE', 'False') == 'True'
+# Dashboard preview of an uploaded resume: the first N pages stacked, WIDTH pixels wide.
+# FORMAT is png or jpeg; webp also works when Pillow is installed (else png is used).
+RESUME_THUMBNAIL_PAGES = int(os.getenv('RESUME_THUMBNAIL_PAGES', '1'))
+RESUME_THUMBNAIL_WIDTH = int(os.getenv('RESUME_THUMBNAIL_WIDTH', '480'))
+RESUME_THUMBNAIL_FORMAT = os.getenv('RESUME_THUMBNAIL_FORMAT', 'png')
+
+# Rows per page in the section listings and the gap-analysis history
+# (keyset-paginated, so deep pages cost the same as the first)
+LISTING_PAGE_SIZE = int(os.getenv('LISTING_PAGE_SIZE', '25'))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTHENTICATION_BACKENDS = [
     'profiles.backends.EmailOrUsernameBackend',
-    'django.contrib.auth.backends.ModelBackend',
 ]
+# Scoring weights live in the database, versioned (profiles.scoring_config). Each
+# process re-checks the live version at most this often.
+SCORING_CONFIG_CHECK_SECONDS = float(os.getenv('SCORING_CONFIG_CHECK_SECONDS', '5'))
+
+# Re-hash a password on successful login when its hasher or work factor is outdated.
+# Costs one extra hash per affected login; turn off to keep login throughput flat.
+AUTH_REHASH_ON_LOGIN = os.getenv('AUTH_REHASH_ON_LOGIN', 'True') == 'True'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'home'
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-GROQ_API_KEY = os.getenv('GROQ_API_KEY')
\ No newline at end of file
+GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+
+# Batch gap analysis: how many JDs per request, how many get LLM explanations,
+# and how many Groq calls may run at once per process.
+AI_BATCH_MAX_JOBS = int(os.getenv('AI_BATCH_MAX_JOBS', '50'))
+AI_BATCH_TOP_K = int(os.getenv('AI_BATCH_TOP_K', '5'))
+AI_BATCH_CONCURRENCY = int(os.getenv('AI_BATCH_CONCURRENCY', '4'))
+
+# Token budgets for the resume and JD excerpts sent in the gap-analysis prompt
+GAP_PROMPT_RESUME_TOKENS = int(os.getenv('GAP_PROMPT_RESUME_TOKENS', '700'))
+GAP_PROMPT_JD_TOKENS = int(os.getenv('GAP_PROMPT_JD_TOKENS', '450'))
+
+# 'default' is per-process. Set REDIS_URL (needs the `redis` package) to add a 'shared'
+# alias that every worker sees, for state that has to span processes.
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES['shared'] = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+SHARED_CACHE = 'shared' if REDIS_URL else 'default'
+
+# Single-flight coalescing of identical Gemini/Groq requests (ai_engine.singleflight).
+# Results are shared through this cache alias for AI_SINGLE_FLIGHT_TTL seconds. It must
+# be a shared backend for waiters in other processes to reuse them (`check --deploy`
+# fails on a per-process one).
+AI_SINGLE_FLIGHT_CACHE = os.getenv('AI_SINGLE_FLIGHT_CACHE', SHARED_CACHE)
+AI_SINGLE_FLIGHT_TTL = int(os.getenv('AI_SINGLE_FLIGHT_TTL', '60'))
+AI_SINGLE_FLIGHT_WAIT = float(os.getenv('AI_SINGLE_FLIGHT_WAIT', '30'))
+
+# Outbound AI call resilience (ai_engine.resilience). Base URLs can point the SDKs
+# at a local fake server to exercise slow and failing providers.
+GEMINI_BASE_URL = os.getenv('GEMINI_BASE_URL', '')
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL', '')
+
+# Route both providers to a local fake (`python manage.py run_fake_ai_server`),
+# e.g. AI_FAKE_SERVER=http://127.0.0.1:8765 for load tests and offline development.
+AI_FAKE_SERVER = os.getenv('AI_FAKE_SERVER', '')
+if AI_FAKE_SERVER:
+    GEMINI_BASE_URL = GROQ_BASE_URL = AI_FAKE_SERVER
+    GEMINI_API_KEY = GEMINI_API_KEY or 'fake-key'
+    GROQ_API_KEY = GROQ_API_KEY or 'fake-key'
+AI_REQUEST_TIMEOUT_SECONDS = float(os.getenv('AI_REQUEST_TIMEOUT_SECONDS', '15'))
+AI_CALL_DEADLINE_SECONDS = float(os.getenv('AI_CALL_DEADLINE_SECONDS', '25'))
+AI_MAX_ATTEMPTS = int(os.getenv('AI_MAX_ATTEMPTS', '3'))
+AI_RETRY_BUDGET_RATIO = float(os.getenv('AI_RETRY_BUDGET_RATIO', '0.2'))
+AI_RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv('AI_RETRY_BUDGET_MIN_PER_SECOND', '0.5'))
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv('AI_BREAKER_FAILURE_THRESHOLD', '5'))
+AI_BREAKER_RESET_SECONDS = float(os.getenv('AI_BREAKER_RESET_SECONDS', '30'))
+
+# Admission control for AI-bound requests (ai_engine.admission). The cluster-wide
+# counter and per-user rate counters live in AI_ADMISSION_CACHE, which must be a
+# shared backend with atomic incr (Redis) for those limits to span processes.
+AI_ADMISSION_CACHE = os.getenv('AI_ADMISSION_CACHE', SHARED_CACHE)
+AI_MAX_CONCURRENCY_PER_PROCESS = int(os.getenv('AI_MAX_CONCURRENCY_PER_PROCESS', '4'))
+AI_QUEUE_SIZE = int(os.getenv('AI_QUEUE_SIZE', '8'))
+AI_QUEUE_TIMEOUT_SECONDS = float(os.getenv('AI_QUEUE_TIMEOUT_SECONDS', '5'))
+AI_CLUSTER_MAX_CONCURRENCY = int(os.getenv('AI_CLUSTER_MAX_CONCURRENCY', '32'))
+AI_CLUSTER_COUNTER_TTL = int(os.getenv('AI_CLUSTER_COUNTER_TTL', '300'))
+AI_RETRY_AFTER_SECONDS = int(os.getenv('AI_RETRY_AFTER_SECONDS', '10'))
+AI_USER_RATE_PER_MINUTE = float(os.getenv('AI_USER_RATE_PER_MINUTE', '6'))
+AI_USER_BURST = int(os.getenv('AI_USER_BURST', '3'))
+
+# Shared HTTP connection pools for the Gemini/Groq clients (ai_engine.clients).
+# HTTP/2 is used when the optional `h2` package is installed.
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv('AI_HTTP_MAX_CONNECTIONS', '20'))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv('AI_HTTP_MAX_KEEPALIVE', '10'))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('AI_HTTP_KEEPALIVE_EXPIRY', '60'))
+AI_HTTP2 = os.getenv('AI_HTTP2', 'True') == 'True'
+
+# Request timing (prepscore_project.metrics). The Server-Timing header reveals query
+# counts and timings, so it's opt-in and only sent to staff (or anyone, with DEBUG on).
+# Besides logged-in staff, /metrics is open to scrapers sending
+# "Authorization: Bearer <METRICS_TOKEN>" and to METRICS_ALLOWED_IPS (none by default:
+# behind a same-host proxy every client looks like 127.0.0.1).
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'False') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',') if ip]
+
+# AI call ledger (ai_engine.ledger): one AICallRecord row per Gemini/Groq call or
+# cache hit, written in batches off the request path. `manage.py ai_usage_report`
+# turns it into per-endpoint latency percentiles, cache-hit rates and cost.
+AI_LEDGER_ENABLED = os.getenv('AI_LEDGER_ENABLED', 'True') == 'True'
+AI_LEDGER_BATCH_SIZE = int(os.getenv('AI_LEDGER_BATCH_SIZE', '200'))
+AI_LEDGER_FLUSH_SECONDS = float(os.getenv('AI_LEDGER_FLUSH_SECONDS', '2'))
+AI_LEDGER_MAX_PENDING = int(os.getenv('AI_LEDGER_MAX_PENDING', '10000'))
+# USD per million input/output tokens, used for the report's cost estimate
+AI_PRICING = {
+    'models/gemini-embedding-001': {'input': 0.15, 'output': 0.0},
+    'llama-3.1-8b-instant': {'input': 0.05, 'output': 0.08},
+}
+
+# Request profiling (prepscore_project.profiling). Staff can profile any request with
+# an X-Profile header or ?_profile=1 (=pstats for cProfile output); otherwise a random
+# PROFILE_SAMPLE_RATE of requests is sampled and kept if slower than PROFILE_MIN_DURATION_MS.
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_MIN_DURATION_MS = float(os.getenv('PROFILE_MIN_DURATION_MS', '500'))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', str(BASE_DIR / 'var' / 'profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
@@ -0,0 +1,159 @@
+# In prepscore_project/staticfiles.py
+import gzip
+import functools
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+from django.conf import settings
+from django.contrib.staticfiles.finders import FileSystemFinder
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # optional: gzip siblings are still written
+    brotli = None
+
+_STATIC_TAG = re.compile(r"""\{%\s*static\s+['"]([^'"]+)['"]""")
+_ASSET_REFERENCE = re.compile(r"""url\(\s*['"]?([^'")]+)['"]?\s*\)|sourceMappingURL=(\S+)""")
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico'}
+# Below this, the Content-Encoding header costs more than compression saves
+MIN_COMPRESS_BYTES = 512
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _template_dirs():
+    dirs = [Path(d) for engine in settings.TEMPLATES for d in engine.get('DIRS', [])]
+    # App templates that belong to this project (third-party apps ship their own static)
+    dirs += [p for p in Path(settings.BASE_DIR).glob('*/templates') if p.is_dir()]
+    return dirs
+
+
+def referenced_static_paths(locate):
+    """
+    Static paths named by literal {% static %} tags in the project's templates, plus
+    everything those files pull in via url() or sourceMappingURL, plus
+    STATIC_EXTRA_ASSETS for paths only known at runtime. `locate(path)` returns the
+    file's Path, or None if it isn't a static file.
+    """
+    pending = set(settings.STATIC_EXTRA_ASSETS)
+    for directory in _template_dirs():
+        for template in directory.rglob('*.html'):
+            pending.update(_STATIC_TAG.findall(template.read_text(encoding='utf-8', errors='ignore')))
+
+    found = set()
+    while pending:
+        path = pending.pop()
+        source = locate(path)
+        if path in found or source is None:
+            continue
+        found.add(path)
+        if posixpath.splitext(path)[1] in ('.css', '.js'):
+            for reference in _ASSET_REFERENCE.findall(source.read_text(encoding='utf-8', errors='ignore')):
+                target = (reference[0] or reference[1]).split('?')[0].split('#')[0]
+                if target and not re.match(r'^(data:|[a-z]+://|//|/)', target):
+                    pending.add(posixpath.normpath(posixpath.join(posixpath.dirname(path), target)))
+    return found
+
+
+class ReferencedFilesFinder(FileSystemFinder):
+    """
+    STATICFILES_DIRS finder that hands collectstatic only the assets templates use,
+    so the unused Bootstrap variants (grid, reboot, RTL, ESM...) never ship.
+    find() is unchanged, so runserver can still serve any file during development.
+    """
+
+    def list(self, ignore_patterns):
+        files = {path: storage for path, storage in super().list(ignore_patterns)}
+
+        def locate(path):
+            storage = files.get(path)
+            return Path(storage.path(path)) if storage else None
+
+        for path in sorted(referenced_static_paths(locate)):
+            yield path, files[path]
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Fingerprints file names (css/bootstrap.min.3f2a….css) and writes .gz and .br
+    siblings of every compressible hashed file, for serve_static or a web server's
+    gzip_static/brotli_static to send as-is.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in sorted(set(self.hashed_files.values())):
+            if posixpath.splitext(hashed_name)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            with self.open(hashed_name) as f:
+                content = f.read()
+            if len(content) < MIN_COMPRESS_BYTES:
+                continue
+            variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(content, quality=11)
+            for suffix, compressed in variants.items():
+                # Not worth a separate file when compression barely helps
+                if len(compressed) < len(content) * 0.95:
+                    if self.exists(hashed_name + suffix):
+                        self.delete(hashed_name + suffix)
+                    self._save(hashed_name + suffix, ContentFile(compressed))
+                    yield hashed_name + suffix, hashed_name + suffix, True
+
+
+@functools.lru_cache(maxsize=1)
+def _fingerprinted_names():
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def serve_static(request, path):
+    """
+    Serves collected files from STATIC_ROOT the way the production web server should:
+    the precompressed .br/.gz sibling when the client accepts it (always with
+    Vary: Accept-Encoding), and far-future immutable caching for fingerprinted names.
+    For local runs with DEBUG off (SERVE_STATIC=True); use nginx/a CDN in production.
+    """
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except ValueError:
+        raise Http404("Invalid path")
+    if not fullpath.is_file() or fullpath.suffix in ('.gz', '.br'):
+        raise Http404("File not found")
+
+    stat = fullpath.stat()
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    accepted = {
+        part.split(';')[0].strip() for part in request.headers.get('Accept-Encoding', '').split(',')
+        if not re.search(r';\s*q=0(\.0*)?\s*$', part)
+    }
+    has_variants = False
+    served, encoding = fullpath, None
+    for suffix, name in (('.br', 'br'), ('.gz', 'gzip')):
+        candidate = fullpath.with_name(fullpath.name + suffix)
+        if candidate.is_file():
+            has_variants = True
+            if encoding is None and name in accepted:
+                served, encoding = candidate, name
+
+    content_type, _ = mimetypes.guess_type(fullpath.name)
+    response = FileResponse(
+        served.open('rb'), content_type=content_type or 'application/octet-stream', filename=fullpath.name,
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if has_variants:
+        response['Vary'] = 'Accept-Encoding'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if path in _fingerprinted_names() else 'public, max-age=60'
+    return response
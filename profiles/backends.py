@@ -1,25 +1,67 @@
 # In profiles/backends.py
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import verify_password
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
 
 class EmailOrUsernameBackend(ModelBackend):
+    """
+    The only authentication backend. Resolves the login as a username or an email in
+    one case-insensitive query (auth_user_username_lower_idx / auth_user_email_lower_idx)
+    and runs exactly one password hash per attempt, whether or not a user was found,
+    so response time doesn't reveal which accounts exist. Permissions and get_user()
+    come from ModelBackend.
+    """
+
+    @staticmethod
+    def lookup_queryset(login):
+        """
+        Up to two users whose username or email matches `login`: an exact-case username
+        first (so legacy 'Bob' and 'bob' can both sign in), then a case-insensitive
+        username, then an email.
+        """
+        login = login.strip()
+        lowered = login.lower()
+        precedence = Case(
+            When(username=login, then=Value(0)),
+            When(username_lower=lowered, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+        return (
+            get_user_model().objects
+            .alias(username_lower=Lower('username'), email_lower=Lower('email'))
+            .filter(Q(username_lower=lowered) | Q(email_lower=lowered))
+            .order_by(precedence, 'pk')[:2]
+        )
+
+    def _find_user(self, login):
+        candidates = list(self.lookup_queryset(login))
+        if not candidates:
+            return None
+        first = candidates[0]
+        # Usernames win over emails, so a username that looks like an email still works
+        if first.username.lower() == login.strip().lower() or len(candidates) == 1:
+            return first
+        # The same email on several accounts: ambiguous, they must sign in by username
+        return None
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        UserModel = get_user_model()
-        user = None
-        
-        # Try to find a user matching either the username or the email
-        if '@' in username:
-            kwargs = {'email': username}
-        else:
-            kwargs = {'username': username}
-        
-        try:
-            user = UserModel.objects.get(**kwargs)
-        except UserModel.DoesNotExist:
-            return None # No user found, authentication fails
+        if username is None:
+            username = kwargs.get(get_user_model().USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = self._find_user(username)
+        # With no user, verify_password hashes a random password once to keep timing flat
+        is_correct, must_update = verify_password(password, user.password if user else None)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
 
-        # Check the password and that the user is active
-        if user.check_password(password) and self.user_can_authenticate(user):
-            return user
-        
-        return None
\ No newline at end of file
+        if must_update and settings.AUTH_REHASH_ON_LOGIN:
+            # Upgrades hashes after PASSWORD_HASHERS or iteration changes (one extra hash)
+            user.set_password(password)
+            user.save(update_fields=['password'])
+        return user
@@ -1,5 +1,8 @@
 # In profiles/config.py
 
+# The weights below seed the scoring config: the live, versioned copy is in the
+# database (profiles.scoring_config) and is changed with `manage.py set_scoring_weights`.
+
 # This single dictionary now holds the score for every recognized skill.
 # High-value skills get more points. All other skills will get a default score.
 SKILL_SCORES = {
@@ -31,7 +34,63 @@ BASE_POINTS = {
     'education': 20,
     'experience': 25,
     'certification': 15,
+    'project': 15,
+    'skill_avg': 5,  # assumed average skill value when sizing the 100-point profile
+    'resume': 20,
     'linkedin': 10,
     'github': 10,
     'bio': 5,
-}
\ No newline at end of file
+}
+
+# Skills recognised in job descriptions for gap detection, on top of SKILL_SCORES.
+# These score DEFAULT_SKILL_SCORE like any other unlisted skill.
+EXTRA_SKILLS = [
+    'java', 'typescript', 'c++', 'c#', 'node.js', 'flask', 'fastapi',
+    'html', 'css', 'rest api', 'graphql',
+    'postgresql', 'mysql', 'mongodb', 'redis',
+    'docker', 'kubernetes', 'terraform', 'linux', 'ci/cd',
+    'deep learning', 'nlp', 'computer vision', 'tensorflow', 'pytorch',
+    'scikit-learn', 'pandas', 'numpy', 'tableau', 'power bi', 'microsoft excel', 'statistics',
+    'agile', 'scrum', 'teamwork', 'time management',
+]
+
+# Alternate spellings mapped to their canonical skill name.
+SKILL_ALIASES = {
+    'ml': 'machine learning',
+    'data analytics': 'data analysis',
+    'amazon web services': 'aws',
+    'microsoft azure': 'azure',
+    'google cloud': 'gcp',
+    'google cloud platform': 'gcp',
+    'python3': 'python',
+    'python 3': 'python',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'js': 'javascript',
+    'ecmascript': 'javascript',
+    'nodejs': 'node.js',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'github': 'git',
+    'gitlab': 'git',
+    'restful api': 'rest api',
+    'restful apis': 'rest api',
+    'rest apis': 'rest api',
+    'natural language processing': 'nlp',
+    'sklearn': 'scikit-learn',
+    'continuous integration': 'ci/cd',
+    'ms excel': 'microsoft excel',
+    'team player': 'teamwork',
+    'communication skills': 'communication',
+    'problem-solving': 'problem solving',
+}
+
+# Display names for skills whose title case reads wrong (e.g. 'Aws').
+SKILL_LABELS = {
+    'aws': 'AWS', 'gcp': 'GCP', 'sql': 'SQL', 'html': 'HTML', 'css': 'CSS',
+    'nlp': 'NLP', 'ci/cd': 'CI/CD', 'rest api': 'REST API', 'graphql': 'GraphQL',
+    'javascript': 'JavaScript', 'typescript': 'TypeScript', 'node.js': 'Node.js',
+    'postgresql': 'PostgreSQL', 'mysql': 'MySQL', 'mongodb': 'MongoDB',
+    'fastapi': 'FastAPI', 'pytorch': 'PyTorch', 'tensorflow': 'TensorFlow',
+    'numpy': 'NumPy', 'power bi': 'Power BI', 'c#': 'C#', 'c++': 'C++',
+}
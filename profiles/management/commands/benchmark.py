@@ -0,0 +1,223 @@
+import json
+import platform
+import random
+import statistics
+import timeit
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+import joblib
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ai_engine.utils import compute_similarity, compute_similarities, extract_text_from_pdf
+from profiles import scorer
+from profiles.models import Profile, Skill, Experience, Education, Certification, Project
+
+# Stored vectors are VectorField(dimensions=768)
+EMBEDDING_DIMENSIONS = 768
+BULK_PROFILES = 1000
+
+
+def _measure(fn, repeat):
+    """Median/min seconds per call of fn(), timeit-style (auto-ranged to ~0.2s per round)."""
+    fn()
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_call = [t / number for t in timer.repeat(repeat, number)]
+    return {
+        'median_us': round(statistics.median(per_call) * 1e6, 3),
+        'min_us': round(min(per_call) * 1e6, 3),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def _sample_profile(rng):
+    # Unsaved instance: enough for the scorer, which only reads the counters
+    return Profile(
+        num_skills=rng.randint(0, 15), num_experiences=rng.randint(0, 4),
+        num_educations=rng.randint(0, 3), num_certifications=rng.randint(0, 4),
+        num_projects=rng.randint(0, 5),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the scorer, similarity, PDF extraction, model loading and the dashboard "
+        "(with its query count). Writes JSON results; with --baseline, exits non-zero if "
+        "anything got slower than --tolerance or issues more queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(Path(settings.BASE_DIR, 'var', 'benchmark.json')))
+        parser.add_argument('--baseline', default=None, help='Previous results JSON to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed slowdown of the median before failing (0.25 = 25%%).')
+        parser.add_argument('--min-delta-us', type=float, default=5.0,
+                            help='Ignore slowdowns smaller than this many microseconds (timer noise).')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--only', default='', help='Comma-separated benchmark name prefixes to run.')
+        parser.add_argument('--no-db', action='store_true', help='Skip the benchmarks that need the database.')
+        parser.add_argument('--max-dashboard-queries', type=int, default=10)
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        self.only = [p for p in options['only'].split(',') if p]
+        self.results = {}
+        # Limits the run broke; reported (and failed on) only after the results are saved
+        self.failures = []
+
+        self._bench_pure()
+        if not options['no_db']:
+            try:
+                connection.ensure_connection()
+            except DatabaseError as e:
+                raise CommandError(f"Database unavailable ({e}); rerun with --no-db to skip those benchmarks.")
+            self._bench_db(options['max_dashboard_queries'])
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'processor': platform.processor(),
+                'numpy': np.__version__,
+            },
+            'benchmarks': self.results,
+        }, indent=2))
+        self.stdout.write(f"\nWrote {len(self.results)} results to {output}")
+
+        if options['baseline']:
+            self._compare(options['baseline'], options['tolerance'], options['min_delta_us'])
+
+        if self.failures:
+            raise CommandError('\n'.join(self.failures))
+
+    def _wanted(self, name):
+        return not self.only or any(name.startswith(prefix) for prefix in self.only)
+
+    def _run(self, name, fn, **extra):
+        if not self._wanted(name):
+            return
+        result = _measure(fn, self.repeat)
+        result.update(extra)
+        self.results[name] = result
+        queries = f"  ({extra['queries']} queries)" if 'queries' in extra else ''
+        self.stdout.write(f"{name:<52}{result['median_us']:>14.1f} us  (min {result['min_us']:.1f}){queries}")
+
+    def _bench_pure(self):
+        if Path(scorer.MODEL_PATH).exists():
+            self._run('model_load', lambda: joblib.load(scorer.MODEL_PATH))
+        else:
+            self.stderr.write(f"Skipping model_load: {scorer.MODEL_PATH} not found.")
+
+        if scorer.PREPSCORE_MODEL is not None:
+            rng = random.Random(42)
+            profile = Profile(num_skills=8, num_experiences=2, num_educations=1, num_certifications=2, num_projects=3)
+            self._bench_ml_score(profile, [_sample_profile(rng) for _ in range(BULK_PROFILES)])
+        else:
+            # Without a trained model the scorer falls back to the rule-based score,
+            # which reads skills from the database; see _bench_db
+            self.stderr.write("No trained model loaded (scripts/train_model.py); "
+                              "calculate_ml_score is benchmarked with database fixtures.")
+
+        vectors = np.random.default_rng(42).standard_normal((101, EMBEDDING_DIMENSIONS))
+        a, b = vectors[0].tolist(), vectors[1].tolist()
+        self._run(f'compute_similarity.{EMBEDDING_DIMENSIONS}d', lambda: compute_similarity(a, b))
+        self._run(f'compute_similarities.{EMBEDDING_DIMENSIONS}d_x100',
+                  lambda: compute_similarities(vectors[0], vectors[1:]))
+
+        pdfs = sorted(Path(settings.MEDIA_ROOT, 'resumes').glob('*.pdf'))
+        for pdf in pdfs:
+            self._run(f'extract_text_from_pdf.{pdf.stem}', lambda pdf=pdf: extract_text_from_pdf(str(pdf)))
+        if not pdfs:
+            self.stderr.write("Skipping extract_text_from_pdf: no PDFs in media/resumes.")
+
+    def _bench_ml_score(self, profile, profiles):
+        model = scorer.PREPSCORE_MODEL is not None
+        self._run('calculate_ml_score.single', lambda: scorer.calculate_ml_score(profile), model=model)
+        self._run(f'calculate_ml_score.bulk_{len(profiles)}',
+                  lambda: [scorer.calculate_ml_score(p) for p in profiles], model=model)
+
+    def _bench_db(self, max_dashboard_queries):
+        # Fixtures live only inside this transaction, which is rolled back at the end
+        with transaction.atomic():
+            # Unique, so a user left behind by an interrupted run can't collide with this one
+            username = f'benchmark_{uuid.uuid4().hex[:12]}'
+            user = User.objects.create_user(username, f'{username}@example.com', 'benchmark-pass')
+            profile, _ = Profile.objects.get_or_create(user=user)
+            for name in ('Python', 'Django', 'SQL', 'Docker', 'Git', 'React', 'Communication', 'AWS'):
+                Skill.objects.create(profile=profile, name=name)
+            for i in range(2):
+                Experience.objects.create(profile=profile, title=f'Engineer {i}', company='Acme')
+                Certification.objects.create(profile=profile, name=f'Certificate {i}')
+            Education.objects.create(profile=profile, school='State University', degree='B.Tech')
+            for i in range(3):
+                Project.objects.create(profile=profile, title=f'Project {i}')
+            profile.refresh_from_db()
+            score = scorer.calculate_ml_score(profile)
+
+            if scorer.PREPSCORE_MODEL is None:
+                self._bench_ml_score(profile, [profile] * BULK_PROFILES)
+
+            self._run('get_score_contributions', lambda: scorer.get_score_contributions(profile))
+            self._run('get_suggestions', lambda: scorer.get_suggestions(profile, score))
+
+            if self._wanted('dashboard_view'):
+                client = Client()
+                client.force_login(user)
+                url = reverse('dashboard')
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"dashboard_view returned {response.status_code}")
+                with CaptureQueriesContext(connection) as ctx:
+                    client.get(url)
+                queries = len(ctx.captured_queries)
+                self._run('dashboard_view', lambda: client.get(url), queries=queries)
+                if queries > max_dashboard_queries:
+                    self.failures.append(
+                        f"dashboard_view ran {queries} queries (limit {max_dashboard_queries}):\n"
+                        + '\n'.join(q['sql'] for q in ctx.captured_queries)
+                    )
+
+            transaction.set_rollback(True)
+
+    def _compare(self, baseline_path, tolerance, min_delta_us):
+        try:
+            baseline = json.loads(Path(baseline_path).read_text())['benchmarks']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read baseline {baseline_path}: {e}")
+
+        regressions = []
+        self.stdout.write(f"\n{'benchmark':<52}{'baseline us':>14}{'current us':>14}{'change':>9}")
+        for name, current in self.results.items():
+            before = baseline.get(name)
+            if before is None:
+                self.stdout.write(f"{name:<52}{'-':>14}{current['median_us']:>14.1f}{'new':>9}")
+                continue
+            change = current['median_us'] / before['median_us'] - 1 if before['median_us'] else 0.0
+            slower = (change > tolerance and current['median_us'] - before['median_us'] > min_delta_us)
+            more_queries = current.get('queries', 0) > before.get('queries', current.get('queries', 0))
+            flag = ''
+            if slower:
+                flag = '  SLOWER'
+                regressions.append(f"{name}: {before['median_us']:.1f}us -> {current['median_us']:.1f}us ({change:+.0%})")
+            if more_queries:
+                flag += '  MORE QUERIES'
+                regressions.append(f"{name}: {before['queries']} -> {current['queries']} queries")
+            self.stdout.write(
+                f"{name:<52}{before['median_us']:>14.1f}{current['median_us']:>14.1f}{change:>+9.0%}{flag}"
+            )
+
+        if regressions:
+            self.failures.append("Performance regressions against baseline:\n  " + '\n  '.join(regressions))
+        else:
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,247 @@
+import random
+import time
+from datetime import timedelta
+import numpy as np
+from faker import Faker
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from ai_engine.models import GapAnalysisResult, JobDescription
+from ai_engine.utils import job_description_hash, normalize_job_description
+from profiles import scorer
+from profiles.config import SKILL_SCORES, EXTRA_SKILLS
+from profiles.models import Profile, Skill, Experience, Education, Certification, Project, ScoreHistory
+from profiles.scoring_config import get_scoring_config
+from profiles.skills import skill_label, skill_points
+
+SKILL_POOL = list(SKILL_SCORES) + EXTRA_SKILLS
+DEGREES = ['B.Tech', 'B.Sc', 'BCA', 'M.Tech', 'M.Sc', 'MCA', 'MBA', 'Diploma']
+FIELDS = ['Computer Science', 'Information Technology', 'Electronics', 'Data Science', 'Mathematics', 'Mechanical']
+CERTIFICATIONS = [
+    ('AWS Certified Cloud Practitioner', 'Amazon Web Services'), ('Azure Fundamentals', 'Microsoft'),
+    ('Google Data Analytics', 'Google'), ('Professional Scrum Master I', 'Scrum.org'),
+    ('TensorFlow Developer', 'Google'), ('CCNA', 'Cisco'), ('Oracle Certified Java Programmer', 'Oracle'),
+]
+# Faker is the slow part; draw from pools generated once instead of per row
+POOL_SIZE = 5000
+
+
+def _insert_backdated(model, rows, batch_size=5000):
+    """
+    Multi-row INSERTs that keep every value as given. bulk_create would stamp
+    auto_now_add fields with the current time, and the backdated timestamps are the
+    point; the rows' primary keys are not read back.
+    """
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(f.column) for f in fields)
+    placeholders = f"({', '.join(['%s'] * len(fields))})"
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            params = [f.get_db_prep_save(getattr(row, f.attname), connection) for row in batch for f in fields]
+            cursor.execute(
+                f"INSERT INTO {qn(model._meta.db_table)} ({columns}) VALUES {', '.join([placeholders] * len(batch))}",
+                params,
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a realistic population of users with profiles, skills, experience, education, "
+        "projects, score history and gap analyses, using chunked bulk inserts. Meant for "
+        "exercising query plans, indexes and caches at production-like volumes locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, required=True)
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Users per transaction.')
+        parser.add_argument('--prefix', default='seed_', help='Username prefix for generated users.')
+        parser.add_argument('--password', default='seed-pass-123', help='Shared password (hashed once).')
+        parser.add_argument('--job-descriptions', type=int, default=200, help='Shared JD pool for gap analyses.')
+        parser.add_argument('--max-history', type=int, default=8, help='Max score history rows per profile.')
+        parser.add_argument('--max-analyses', type=int, default=4, help='Max gap analyses per user.')
+        parser.add_argument('--with-signals', action='store_true',
+                            help='Save section rows one by one so the counter signals run (much slower).')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['users'] <= 0:
+            raise CommandError("--users must be positive.")
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker()
+        if options['seed'] is not None:
+            Faker.seed(options['seed'])
+        self.options = options
+        self.now = timezone.now()
+        self._build_pools()
+
+        password = make_password(options['password'])
+        start = User.objects.filter(username__startswith=options['prefix']).count()
+        jds = self._job_descriptions(options['job_descriptions'])
+
+        started = time.monotonic()
+        created = 0
+        while created < options['users']:
+            size = min(options['chunk_size'], options['users'] - created)
+            with transaction.atomic():
+                self._seed_chunk(start + created, size, password, jds)
+            created += size
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"{created}/{options['users']} users ({created / elapsed:.0f}/s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {created} users in {time.monotonic() - started:.1f}s."
+        ))
+
+    def _build_pools(self):
+        fake = self.fake
+        self.first_names = [fake.first_name() for _ in range(POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(POOL_SIZE)]
+        self.cities = [fake.city() for _ in range(POOL_SIZE // 10)]
+        self.companies = [fake.company() for _ in range(POOL_SIZE // 5)]
+        self.jobs = [fake.job() for _ in range(POOL_SIZE // 10)]
+        self.sentences = [fake.paragraph(nb_sentences=3) for _ in range(POOL_SIZE // 5)]
+        self.phrases = [fake.catch_phrase() for _ in range(POOL_SIZE // 5)]
+        self.schools = [f"{city} University" for city in self.cities[:200]]
+
+    def _job_descriptions(self, count):
+        rows = {}
+        for _ in range(count):
+            skills = self.rng.sample(SKILL_POOL, 6)
+            text = normalize_job_description(
+                f"{self.rng.choice(self.jobs)}\n{self.rng.choice(self.companies)} is hiring.\n"
+                f"Requirements: {', '.join(skill_label(s) for s in skills)}.\n{self.rng.choice(self.sentences)}"
+            )
+            rows[job_description_hash(text)] = text
+        JobDescription.objects.bulk_create(
+            [JobDescription(content_hash=h, text=t) for h, t in rows.items()], ignore_conflicts=True,
+        )
+        return list(JobDescription.objects.filter(content_hash__in=rows).only('id', 'text'))
+
+    def _scores(self, counters, skill_names):
+        """Current PrepScore per profile: one batched model predict, or the rule-based estimate."""
+        features = np.array(counters)
+        if scorer.PREPSCORE_MODEL is not None:
+            return [max(0, min(100, round(float(p)))) for p in scorer.PREPSCORE_MODEL.predict(features)]
+        # Same weights and ceiling as scorer.calculate_rule_based_score
+        weights = get_scoring_config()
+        points = weights.base_points
+        scores = []
+        for (_, exp, edu, cert, proj), names in zip(counters, skill_names):
+            raw = (sum(weights.skill_points(n) for n in names)
+                   + exp * points['experience'] + edu * points['education']
+                   + cert * points['certification'] + proj * points['project'])
+            scores.append(min(100, round(raw / weights.max_raw * 100)))
+        return scores
+
+    def _seed_chunk(self, offset, size, password, jds):
+        rng, opts = self.rng, self.options
+        users = []
+        for i in range(size):
+            first, last = rng.choice(self.first_names), rng.choice(self.last_names)
+            username = f"{opts['prefix']}{offset + i}"
+            users.append(User(
+                username=username, first_name=first, last_name=last,
+                email=f"{first}.{last}.{offset + i}@example.com".lower(), password=password,
+                date_joined=self.now - timedelta(days=rng.randint(0, 720)),
+            ))
+        users = User.objects.bulk_create(users)
+
+        # Decide every profile's contents first so its counters are written with the row
+        plans = []
+        for _ in users:
+            plans.append({
+                'skills': rng.sample(SKILL_POOL, rng.randint(0, 12)),
+                'experiences': rng.choice((0, 0, 1, 1, 2, 2, 3, 4)),
+                'educations': rng.choice((0, 1, 1, 1, 2, 3)),
+                'certifications': rng.choice((0, 0, 0, 1, 1, 2, 3)),
+                'projects': rng.choice((0, 1, 2, 2, 3, 4, 5)),
+            })
+
+        with_signals = opts['with_signals']
+        profiles = Profile.objects.bulk_create([
+            Profile(
+                user=user, location=rng.choice(self.cities),
+                num_skills=0 if with_signals else len(plan['skills']),
+                num_experiences=0 if with_signals else plan['experiences'],
+                num_educations=0 if with_signals else plan['educations'],
+                num_certifications=0 if with_signals else plan['certifications'],
+                num_projects=0 if with_signals else plan['projects'],
+            )
+            for user, plan in zip(users, plans)
+        ])
+
+        sections = {Skill: [], Experience: [], Education: [], Certification: [], Project: []}
+        for profile, plan in zip(profiles, plans):
+            sections[Skill] += [
+                Skill(profile=profile, name=skill_label(name), canonical_name=name, points=skill_points(name))
+                for name in plan['skills']
+            ]
+            for _ in range(plan['experiences']):
+                sections[Experience].append(Experience(
+                    profile=profile, title=rng.choice(self.jobs), company=rng.choice(self.companies),
+                    description=rng.choice(self.sentences),
+                ))
+            for _ in range(plan['educations']):
+                sections[Education].append(Education(
+                    profile=profile, school=rng.choice(self.schools), degree=rng.choice(DEGREES),
+                    field_of_study=rng.choice(FIELDS),
+                    date_graduated=(self.now - timedelta(days=rng.randint(0, 3650))).date(),
+                ))
+            for _ in range(plan['certifications']):
+                name, issuer = rng.choice(CERTIFICATIONS)
+                sections[Certification].append(Certification(
+                    profile=profile, name=name, issuing_organization=issuer,
+                    date_issued=(self.now - timedelta(days=rng.randint(0, 1500))).date(),
+                ))
+            for _ in range(plan['projects']):
+                sections[Project].append(Project(
+                    profile=profile, title=rng.choice(self.phrases), description=rng.choice(self.sentences),
+                    technologies_used=', '.join(skill_label(s) for s in rng.sample(SKILL_POOL, 3)),
+                ))
+
+        for model, rows in sections.items():
+            if with_signals:
+                for row in rows:
+                    row.save()
+            else:
+                model.objects.bulk_create(rows, batch_size=5000)
+
+        counters = [
+            (len(p['skills']), p['experiences'], p['educations'], p['certifications'], p['projects'])
+            for p in plans
+        ]
+        scores = self._scores(counters, [p['skills'] for p in plans])
+
+        history = []
+        analyses = []
+        for user, profile, plan, score in zip(users, profiles, plans, scores):
+            # A profile's score climbs to its current value over past edits
+            days_ago = (self.now - user.date_joined).days
+            points = rng.randint(0, opts['max_history']) if score > 0 else 0
+            value = max(1, score - rng.randint(0, 30))
+            for step in range(points):
+                value = score if step == points - 1 else min(score, value + rng.randint(0, 8))
+                history.append(ScoreHistory(
+                    profile=profile, score=value,
+                    date_calculated=self.now - timedelta(days=days_ago * (points - step) / points),
+                ))
+
+            for _ in range(rng.randint(0, opts['max_analyses']) if jds else 0):
+                jd = rng.choice(jds)
+                missing = [skill_label(s) for s in rng.sample(SKILL_POOL, rng.randint(0, 4))
+                           if s not in plan['skills']]
+                analyses.append(GapAnalysisResult(
+                    user=user, job_description=jd,
+                    match_score=max(0, min(100, score + rng.randint(-25, 10))),
+                    missing_skills=missing,
+                    interview_questions=[f"How have you used {m} in a project?" for m in missing[:3]],
+                    summary=rng.choice(self.sentences),
+                    created_at=self.now - timedelta(days=rng.randint(0, max(days_ago, 0))),
+                ))
+
+        _insert_backdated(ScoreHistory, history)
+        _insert_backdated(GapAnalysisResult, analyses)
@@ -0,0 +1,62 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from profiles.scoring_config import get_scoring_config, publish_scoring_config
+from profiles.skills import canonical_skill
+
+
+def _pair(value):
+    name, sep, points = value.rpartition('=')
+    if not sep or not name:
+        raise CommandError(f"Expected NAME=POINTS, got '{value}'.")
+    if points == 'none':
+        return name, None
+    try:
+        return name, int(points)
+    except ValueError:
+        raise CommandError(f"Points must be an integer (or 'none' to remove a skill), got '{points}'.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish a new version of the scoring weights and rescore only the profiles it affects. "
+        "With no changes, print the live weights."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skill', action='append', default=[], metavar='NAME=POINTS',
+                            help="Points for a skill (aliases allowed); 'NAME=none' drops it to the default.")
+        parser.add_argument('--base', action='append', default=[], metavar='KEY=POINTS',
+                            help='Section points: education, experience, certification, project, skill_avg, resume.')
+        parser.add_argument('--default-skill-score', type=int, default=None)
+        parser.add_argument('--note', default='', help='Why the weights changed (stored with the version).')
+
+    def handle(self, *args, **options):
+        live = get_scoring_config(fresh=True)
+        skill_scores = dict(_pair(v) for v in options['skill'])
+        base_points = dict(_pair(v) for v in options['base'])
+
+        if not (skill_scores or base_points or options['default_skill_score'] is not None):
+            self.stdout.write(f"Scoring config v{live.version}")
+            self.stdout.write(json.dumps({
+                'skill_scores': live.skill_scores,
+                'default_skill_score': live.default_skill_score,
+                'base_points': live.base_points,
+            }, indent=2, sort_keys=True))
+            return
+
+        unknown = set(base_points) - set(live.base_points)
+        if unknown:
+            raise CommandError(f"Unknown base points: {', '.join(sorted(unknown))}.")
+        if None in base_points.values():
+            raise CommandError("Base points can't be removed, only changed.")
+
+        weights, affected = publish_scoring_config(
+            skill_scores={canonical_skill(name): points for name, points in skill_scores.items()},
+            default_skill_score=options['default_skill_score'],
+            base_points=base_points,
+            note=options['note'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Published scoring config v{weights.version}; {affected} profiles affected."
+        ))
+        self.stdout.write("Run scripts/train_model.py to retrain the model on the new weights.")
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0012_scorehistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scorehistory',
+            index=models.Index(fields=['profile', '-date_calculated'], name='scorehist_profile_date_idx'),
+        ),
+        # auth.User belongs to another app, so its login lookup index is created in SQL.
+        # Matches queries filtering on Lower('email') (profiles.backends).
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email));',
+            'DROP INDEX IF EXISTS auth_user_email_lower_idx;',
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0013_lookup_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Case-insensitive username half of the login lookup (profiles.backends)
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_username_lower_idx ON auth_user (LOWER(username));',
+            'DROP INDEX IF EXISTS auth_user_username_lower_idx;',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0014_user_username_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='resume_thumbnail',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
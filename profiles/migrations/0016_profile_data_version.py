@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0015_profile_resume_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:18
+
+import re
+
+from django.db import migrations, models
+
+
+# Frozen copies of profiles.skills.canonical_skill's vocabulary and of the skill
+# scores as of this migration, so replaying it never depends on the current app code
+# (or on the scoring config table, which doesn't exist yet at this point).
+_SEPARATORS = re.compile(r'[\s\-_]+')
+
+CANONICAL_NAMES = {
+    'amazon web services': 'aws',
+    'communication skills': 'communication',
+    'continuous integration': 'ci/cd',
+    'data analytics': 'data analysis',
+    'ecmascript': 'javascript',
+    'github': 'git',
+    'gitlab': 'git',
+    'google cloud': 'gcp',
+    'google cloud platform': 'gcp',
+    'js': 'javascript',
+    'k8s': 'kubernetes',
+    'microsoft azure': 'azure',
+    'ml': 'machine learning',
+    'ms excel': 'microsoft excel',
+    'natural language processing': 'nlp',
+    'nodejs': 'node.js',
+    'postgres': 'postgresql',
+    'python 3': 'python',
+    'python3': 'python',
+    'react.js': 'react',
+    'reactjs': 'react',
+    'rest apis': 'rest api',
+    'restful api': 'rest api',
+    'restful apis': 'rest api',
+    'scikit learn': 'scikit-learn',
+    'sklearn': 'scikit-learn',
+    'team player': 'teamwork',
+}
+
+SKILL_SCORES = {
+    'machine learning': 15,
+    'data analysis': 12,
+    'aws': 10,
+    'azure': 10,
+    'gcp': 10,
+    'python': 10,
+    'django': 8,
+    'react': 8,
+    'javascript': 7,
+    'sql': 8,
+    'git': 7,
+    'project management': 10,
+    'communication': 5,
+    'leadership': 6,
+    'problem solving': 5,
+}
+DEFAULT_SKILL_SCORE = 3
+
+
+def canonical_skill(name):
+    key = _SEPARATORS.sub(' ', name.strip().lower())
+    return CANONICAL_NAMES.get(key, key)
+
+
+def canonicalize_skills(apps, schema_editor):
+    Skill = apps.get_model('profiles', 'Skill')
+    last_pk = 0
+    while True:
+        batch = list(Skill.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'name')[:5000])
+        if not batch:
+            break
+        for skill in batch:
+            skill.canonical_name = canonical_skill(skill.name)
+            skill.points = SKILL_SCORES.get(skill.canonical_name, DEFAULT_SKILL_SCORE)
+        Skill.objects.bulk_update(batch, ['canonical_name', 'points'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0017_section_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='canonical_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='points',
+            field=models.IntegerField(default=0),
+        ),
+        # Backfill before the indexes exist, so the updates don't maintain them
+        migrations.RunPython(canonicalize_skills, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['profile', 'canonical_name'], name='skill_profile_canonical_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['canonical_name'], name='skill_canonical_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0018_skill_canonical_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringConfig',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True)),
+                ('skill_scores', models.JSONField()),
+                ('default_skill_score', models.IntegerField()),
+                ('base_points', models.JSONField()),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-version'],
+            },
+        ),
+    ]
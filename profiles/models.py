@@ -2,12 +2,16 @@
 
 from django.db import models
 from django.contrib.auth.models import User # Import Django's built-in User
+from .scoring_config import get_scoring_config
+from .skills import canonical_skill
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     profile_picture = models.CharField(max_length=255, default='images/avatar1.jpg')
     location = models.CharField(max_length=255, blank=True)
     resume_pdf = models.FileField(upload_to='resumes/', null=True, blank=True)
+    # MEDIA_ROOT-relative preview image, named by content hash (profiles.thumbnails)
+    resume_thumbnail = models.CharField(max_length=255, blank=True)
 
     # Professional Data (Extracted from Resume)
     resume_text = models.TextField(blank=True)
@@ -20,21 +24,56 @@ class Profile(models.Model):
     num_experiences = models.IntegerField(default=0)
     num_educations = models.IntegerField(default=0)
     num_certifications = models.IntegerField(default=0)
+    # Bumped whenever anything the dashboard shows changes; the /api/dashboard/ ETag
+    data_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.user.username
 
+    def bump_data_version(self):
+        Profile.objects.filter(pk=self.pk).update(data_version=models.F('data_version') + 1)
+
 class Skill(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
+    # Filled from `name` on every save: "Python3" and "python 3" both become 'python'
+    canonical_name = models.CharField(max_length=100, blank=True)
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # A profile's canonical names (index-only), and cross-user counts/sums per skill
+            models.Index(fields=['profile', 'canonical_name'], name='skill_profile_canonical_idx'),
+            models.Index(fields=['canonical_name'], name='skill_canonical_idx'),
+            models.Index(fields=['profile', 'id'], name='skill_profile_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def canonicalize(self):
+        """Sets canonical_name and points from name. save() does this; bulk_create callers must."""
+        self.canonical_name = canonical_skill(self.name)
+        # Stored points outlive the cache window, so check for a newly published version first
+        self.points = get_scoring_config(fresh=True).skill_points(self.canonical_name)
+
+    def save(self, *args, **kwargs):
+        self.canonicalize()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'canonical_name', 'points'}
+        super().save(*args, **kwargs)
+
 class Experience(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
     company = models.CharField(max_length=200)
     description = models.TextField(blank=True)
+
+    class Meta:
+        # Keyset-paginated listings (manage_* views) seek on (profile, id)
+        indexes = [models.Index(fields=['profile', 'id'], name='experience_profile_id_idx')]
+
     def __str__(self):
         return self.title
 
@@ -45,6 +84,7 @@ class ScoreHistory(models.Model):
 
     class Meta:
         ordering = ['-date_calculated']
+        indexes = [models.Index(fields=['profile', '-date_calculated'], name='scorehist_profile_date_idx')]
 
     def __str__(self):
         return f"{self.profile.user.username} - {self.score} on {self.date_calculated.strftime('%Y-%m-%d')}"
@@ -55,6 +95,9 @@ class Certification(models.Model):
     issuing_organization = models.CharField(max_length=200, blank=True)
     date_issued = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['profile', 'id'], name='cert_profile_id_idx')]
+
     def __str__(self):
         return self.name
 
@@ -65,6 +108,9 @@ class Education(models.Model):
     field_of_study = models.CharField(max_length=200, blank=True)
     date_graduated = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['profile', 'id'], name='education_profile_id_idx')]
+
     def __str__(self):
         return f"{self.degree} at {self.school}"
 
@@ -75,5 +121,23 @@ class Project(models.Model):
     link = models.URLField(max_length=500, blank=True)
     technologies_used = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['profile', 'id'], name='project_profile_id_idx')]
+
+    def __str__(self):
+        return self.title
+
+class ScoringConfig(models.Model):
+    """A published version of the scoring weights; the highest version is live (profiles.scoring_config)."""
+    version = models.PositiveIntegerField(unique=True)
+    skill_scores = models.JSONField()
+    default_skill_score = models.IntegerField()
+    base_points = models.JSONField()
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-version']
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"Scoring config v{self.version}"
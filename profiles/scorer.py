@@ -1,16 +1,22 @@
 # In profiles/scorer.py
+import functools
+import hashlib
 import os
 import joblib
-import random
 import numpy as np
 from django.conf import settings
-from .models import Profile, Skill, Experience, Certification
-from .config import SKILL_SCORES, DEFAULT_SKILL_SCORE, BASE_POINTS
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from .models import Profile, Skill, Experience, Certification, ScoreHistory
+from .scoring_config import SECTION_COUNTERS, get_scoring_config
+from .skills import skill_label, skill_points
+from prepscore_project.downloads import file_version
+from prepscore_project.metrics import timed
 
 
 # --- 1. THE RULE-BASED SCORING ENGINE (for Data Generation & Charts) ---
 
-def get_score_contributions(profile):
+def get_score_contributions(profile, weights=None):
     """
     Calculates the raw points contributed by each profile category using the rule-based system.
     """
@@ -20,43 +26,45 @@ def get_score_contributions(profile):
     }
     if not profile:
         return contributions
+    points = (weights or get_scoring_config()).base_points
 
     # Score Core Profile Details
     # (Bio, Headline, Sites removed for AI optimization)
-    if profile.resume_pdf: contributions["Profile Details"] += 20 # Bonus for resume?
+    if profile.resume_pdf: contributions["Profile Details"] += points['resume'] # Bonus for resume?
 
     # Score other sections
-    contributions["Education"] = profile.num_educations * BASE_POINTS['education']
-    contributions["Experience"] = profile.num_experiences * BASE_POINTS['experience']
-    contributions["Certifications"] = profile.num_certifications * BASE_POINTS['certification']
-    contributions["Projects"] = profile.num_projects * BASE_POINTS.get('project', 15)
-
-    # Balanced skill scoring
-    for skill in profile.skill_set.all():
-        contributions["Skills"] += SKILL_SCORES.get(skill.name.lower(), DEFAULT_SKILL_SCORE)
+    contributions["Education"] = profile.num_educations * points['education']
+    contributions["Experience"] = profile.num_experiences * points['experience']
+    contributions["Certifications"] = profile.num_certifications * points['certification']
+    contributions["Projects"] = profile.num_projects * points['project']
+
+    # Balanced skill scoring: points are stored per skill at save time, so one SUM
+    # (rescore_profiles annotates the total for a whole batch instead)
+    skill_total = getattr(profile, 'skill_points_total', None)
+    if skill_total is None:
+        skill_total = profile.skill_set.aggregate(total=Sum('points'))['total'] or 0
+    contributions["Skills"] = skill_total
         
     return contributions
 
-def calculate_rule_based_score(profile):
+def rule_max_score(weights=None):
+    """Raw points of a "perfect" 100-point profile."""
+    return (weights or get_scoring_config()).max_raw
+
+def calculate_rule_based_score(profile, weights=None):
     """
     Calculates a more realistic, percentage-based score.
     This is the "ground truth" for training the ML model.
     """
     if not profile:
         return 0
+    weights = weights or get_scoring_config()
     
     # --- Define the score for a "perfect" 100-point profile ---
-    # You can adjust these targets if you want to change the scoring weight
-    MAX_POSSIBLE_SCORE = (
-        (10 * 5) + # Approx. score for 10 skills
-        (2 * BASE_POINTS['education']) +
-        (3 * BASE_POINTS['experience']) +
-        (2 * BASE_POINTS['certification']) +
-        (3 * BASE_POINTS.get('project', 15))
-    )
+    MAX_POSSIBLE_SCORE = rule_max_score(weights)
     
     # Get the user's current raw score
-    contributions = get_score_contributions(profile)
+    contributions = get_score_contributions(profile, weights)
     current_raw_score = sum(contributions.values())
     
     if MAX_POSSIBLE_SCORE == 0:
@@ -72,10 +80,13 @@ def calculate_rule_based_score(profile):
 
 MODEL_PATH = os.path.join(settings.BASE_DIR, 'profiles', 'ml_models', 'prepscore_model.joblib')
 PREPSCORE_MODEL = None
+# Identifies what produced the scores (part of the dashboard ETag): the model file, or the rules
+MODEL_VERSION = 'rules'
 
 try:
     if os.path.exists(MODEL_PATH):
         PREPSCORE_MODEL = joblib.load(MODEL_PATH)
+        MODEL_VERSION = file_version(MODEL_PATH)
 except Exception as e:
     print(f"Error loading ML model: {e}")
 
@@ -117,7 +128,8 @@ def calculate_ml_score(profile):
 
     try:
         feature_vector = profile_to_vector(profile)
-        predicted_score = PREPSCORE_MODEL.predict(feature_vector)[0]
+        with timed('ml'):
+            predicted_score = PREPSCORE_MODEL.predict(feature_vector)[0]
         
         # Use standard rounding
         final_score = round(float(predicted_score))
@@ -127,29 +139,127 @@ def calculate_ml_score(profile):
         return calculate_rule_based_score(profile)
 
 
+# Feature counts the model was trained on (scripts/train_model.py), in FEATURES order:
+# the what-if grid covers exactly this range, so the browser never extrapolates
+GRID_SHAPE = (15, 8, 4, 6, 6)
+
+@functools.lru_cache(maxsize=1)
+def score_grid():
+    """
+    (version, scores) for every feature combination inside GRID_SHAPE, predicted in
+    one batch. Scores are uint8 bytes in row-major FEATURES order, rounded and
+    clipped exactly like calculate_ml_score, so the dashboard's what-if sliders
+    can look scores up without a server round-trip. None while no model is loaded.
+    """
+    if PREPSCORE_MODEL is None:
+        return None
+    vectors = np.indices(GRID_SHAPE).reshape(len(GRID_SHAPE), -1).T
+    with timed('ml'):
+        scores = np.clip(np.rint(PREPSCORE_MODEL.predict(vectors)), 0, 100).astype(np.uint8)
+    scores[0] = 0  # an empty profile scores 0 (see calculate_ml_score)
+    data = scores.tobytes()
+    return hashlib.sha256(data).hexdigest()[:16], data
+
+
 # --- 3. THE RECOMMENDATION & ANALYSIS ENGINES ---
 
+# Model features in profile_to_vector order, and how to suggest one more of each
+FEATURES = ['num_skills', 'num_experiences', 'num_educations', 'num_certifications', 'num_projects']
+SUGGESTION_TEXT = {
+    'num_skills': "Add {skill} to your skills: about +{gain} points.",
+    'num_experiences': "Add an internship or work experience: about +{gain} points.",
+    'num_educations': "Add your academic background: about +{gain} points.",
+    'num_certifications': "Earn and add a certification: about +{gain} points.",
+    'num_projects': "Showcase another technical project: about +{gain} points.",
+}
+
+@functools.lru_cache(maxsize=4096)
+def counterfactual_gains(vector):
+    """
+    Model score gain from one more of each feature, as ((feature, gain), ...), biggest
+    first (ties in FEATURES order). `vector` is a profile_to_vector row as a tuple;
+    it and all its "+1" variants are scored in one batched predict. Depends only on
+    the vector, so profiles with the same counts share the cached result.
+    """
+    base = np.array(vector, dtype=float)
+    variants = np.vstack([base, base + np.eye(len(FEATURES))])
+    with timed('ml'):
+        predictions = np.clip(PREPSCORE_MODEL.predict(variants), 0, 100)
+    gains = predictions[1:] - predictions[0]
+    order = sorted(range(len(FEATURES)), key=lambda i: (-gains[i], i))
+    return tuple((FEATURES[i], float(gains[i])) for i in order)
+
+def rule_based_gains(profile, next_skill_points):
+    """counterfactual_gains for the rule-based score, used while no model is loaded."""
+    weights = get_scoring_config()
+    max_score = rule_max_score(weights)
+    raw = sum(get_score_contributions(profile, weights).values())
+    points = {counter: weights.base_points[key] for key, counter in SECTION_COUNTERS.items()}
+    points['num_skills'] = next_skill_points
+    current = min(raw / max_score * 100, 100)
+    gains = [(f, min((raw + points[f]) / max_score * 100, 100) - current) for f in FEATURES]
+    return tuple(sorted(gains, key=lambda g: (-g[1], FEATURES.index(g[0]))))
+
+def next_skill(profile):
+    """The highest-value scored skill the profile doesn't list yet (ties alphabetical), or None."""
+    have = set(Skill.objects.filter(profile=profile).values_list('canonical_name', flat=True))
+    missing = sorted((-points, name) for name, points in get_scoring_config().skill_scores.items() if name not in have)
+    return missing[0][1] if missing else None
+
 def get_suggestions(profile, score):
-    """Analyzes profile and score to return prioritized, actionable suggestions."""
+    """
+    Up to three deterministic suggestions, ranked by how much one more skill,
+    experience, education, certification or project would raise the score.
+    """
     if score >= 95:
         return ["Your profile is outstanding! Keep it updated with your latest achievements."]
     if not profile: return ["Start by building your profile! Add your skills, education, and any experience you have."]
-    
-    suggestions = []
-    num_experiences = profile.num_experiences
-    skill_names = {skill.name.lower() for skill in Skill.objects.filter(profile=profile)}
-    
-    if num_experiences == 0: suggestions.append({ "priority": 1, "text": "Gaining practical experience through an internship or personal project is the most impactful way to boost your score." })
-    if profile.num_projects == 0: suggestions.append({ "priority": 1.5, "text": "Showcase your practical skills by adding your key technical projects." })
-    if profile.num_educations == 0: suggestions.append({ "priority": 3, "text": "Add your academic background to build a more complete profile and boost your score." })
-    
-    missing_keywords = [k for k in SKILL_SCORES.keys() if k not in skill_names]
-    if missing_keywords: suggestions.append({ "priority": 2, "text": f"Consider learning a high-demand skill like '{random.choice(missing_keywords).title()}'." })
-    
-    if len(skill_names) < 5: suggestions.append({ "priority": 4, "text": "Broaden your skillset. Aim to list at least 5-7 relevant technical and soft skills." })
-    
-    sorted_suggestions = sorted(suggestions, key=lambda x: x['priority'])
-    final_suggestions = [s['text'] for s in sorted_suggestions[:3]]
-    
+
+    skill = next_skill(profile)
+    gains = None
+    if PREPSCORE_MODEL is not None:
+        try:
+            gains = counterfactual_gains(tuple(int(v) for v in profile_to_vector(profile)[0]))
+        except Exception as e:
+            print(f"Error during ML prediction: {e}")
+    if gains is None:
+        gains = rule_based_gains(profile, skill_points(skill) if skill else get_scoring_config().default_skill_score)
+
+    skill_text = f"a high-demand skill like '{skill_label(skill)}'" if skill else "another relevant skill"
+    final_suggestions = [
+        SUGGESTION_TEXT[feature].format(skill=skill_text, gain=round(gain))
+        for feature, gain in gains if round(gain) >= 1
+    ][:3]
+
     if not final_suggestions: return ["Your profile is very well-rounded! Consider adding more detail to your project descriptions."]
-    return final_suggestions
\ No newline at end of file
+    return final_suggestions
+
+def rescore_profiles(profiles, weights, batch_size=2000):
+    """
+    Records new rule-based scores for `profiles` (a Profile queryset) after a weight
+    change, a batch at a time: one query per batch for skill totals and last scores,
+    one bulk insert for the ScoreHistory rows that changed. Model-based scores don't
+    depend on the weights until the model is retrained, so nothing is recorded then.
+    Returns how many scores changed.
+    """
+    if PREPSCORE_MODEL is not None:
+        return 0
+    last_score = ScoreHistory.objects.filter(profile=OuterRef('pk')).order_by('-date_calculated').values('score')[:1]
+    batches = (
+        profiles.order_by('pk')
+        .only('pk', 'resume_pdf', *FEATURES)
+        .annotate(skill_points_total=Coalesce(Sum('skill__points'), 0), last_score=Subquery(last_score))
+    )
+    changed, last_pk = 0, 0
+    while True:
+        batch = list(batches.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return changed
+        history = []
+        for profile in batch:
+            score = calculate_rule_based_score(profile, weights)
+            if score > 0 and score != profile.last_score:
+                history.append(ScoreHistory(profile=profile, score=score))
+        ScoreHistory.objects.bulk_create(history)
+        changed += len(history)
+        last_pk = batch[-1].pk
@@ -0,0 +1,168 @@
+# In profiles/scoring_config.py
+import time
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from .config import SKILL_SCORES, DEFAULT_SKILL_SCORE, BASE_POINTS
+
+# How many of each section a "perfect" 100-point profile has (skills at the average skill value)
+PERFECT_PROFILE = {'skill_avg': 10, 'education': 2, 'experience': 3, 'certification': 2, 'project': 3}
+
+# Base-point keys and the Profile counter each one multiplies
+SECTION_COUNTERS = {
+    'education': 'num_educations',
+    'experience': 'num_experiences',
+    'certification': 'num_certifications',
+    'project': 'num_projects',
+}
+
+
+class ScoringWeights:
+    """One version of the scoring weights. Treat as read-only: it's shared by every request."""
+
+    def __init__(self, version, skill_scores, default_skill_score, base_points):
+        self.version = version
+        self.skill_scores = skill_scores
+        self.default_skill_score = default_skill_score
+        self.base_points = base_points
+
+    def skill_points(self, canonical_name):
+        return self.skill_scores.get(canonical_name, self.default_skill_score)
+
+    @property
+    def max_raw(self):
+        """Raw points of a "perfect" 100-point profile."""
+        return sum(count * self.base_points[key] for key, count in PERFECT_PROFILE.items())
+
+
+# Version 0: the constants in profiles/config.py, used until a version is published
+# (and by anything running without a database)
+DEFAULT_WEIGHTS = ScoringWeights(0, dict(SKILL_SCORES), DEFAULT_SKILL_SCORE, dict(BASE_POINTS))
+
+_current = None
+_checked_at = 0.0
+
+# Advisory lock held by publish_scoring_config for its transaction (any fixed 64-bit id)
+_PUBLISH_LOCK_ID = 0x5072657053636F72
+
+
+def _from_row(row):
+    return ScoringWeights(row.version, row.skill_scores, row.default_skill_score, row.base_points)
+
+
+def get_scoring_config(fresh=False):
+    """
+    The live weights (the highest published version). Cached in-process; at most once
+    every SCORING_CONFIG_CHECK_SECONDS (or always, with `fresh`) an indexed query
+    compares version numbers, and the row is only re-read when another process has
+    published a newer one.
+    """
+    global _current, _checked_at
+    from .models import ScoringConfig
+
+    now = time.monotonic()
+    if not fresh and _current is not None and now - _checked_at < settings.SCORING_CONFIG_CHECK_SECONDS:
+        return _current
+    _checked_at = now
+    try:
+        latest = ScoringConfig.objects.order_by('-version').values_list('version', flat=True).first()
+        if latest is None:
+            _current = DEFAULT_WEIGHTS
+        elif _current is None or _current.version != latest:
+            _current = _from_row(ScoringConfig.objects.get(version=latest))
+    except DatabaseError as e:
+        print(f"Scoring config unavailable, using defaults: {e}")
+        if _current is None:
+            _current = DEFAULT_WEIGHTS
+    return _current
+
+
+def reset_scoring_config():
+    """Drops the in-process copy, so the next get_scoring_config() reads the database."""
+    _set_current(None)
+
+
+def _set_current(weights):
+    global _current, _checked_at
+    _current, _checked_at = weights, time.monotonic()
+
+
+def _changed_skills(old, new):
+    """Canonical names whose points differ between two versions (removed entries included)."""
+    return {k for k in old.skill_scores.keys() | new.skill_scores.keys() if old.skill_points(k) != new.skill_points(k)}
+
+
+def affected_profiles(old, new):
+    """
+    Q over Profile for every profile whose rule-based score differs between two
+    weight versions: owners of skills whose points changed, profiles with a section
+    whose points changed, or everyone with content if the 100-point ceiling moved.
+    """
+    from .models import Skill
+
+    if old.max_raw != new.max_raw:
+        return Q(num_skills__gt=0) | Q(num_experiences__gt=0) | Q(num_educations__gt=0) | \
+            Q(num_certifications__gt=0) | Q(num_projects__gt=0)
+
+    condition = Q(pk__in=[])
+    for key, counter in SECTION_COUNTERS.items():
+        if old.base_points[key] != new.base_points[key]:
+            condition |= Q(**{f'{counter}__gt': 0})
+    if old.base_points['resume'] != new.base_points['resume']:
+        condition |= Q(resume_pdf__gt='')
+
+    changed = _changed_skills(old, new)
+    if changed:
+        condition |= Q(pk__in=Skill.objects.filter(canonical_name__in=changed).values('profile_id'))
+    if old.default_skill_score != new.default_skill_score:
+        condition |= Q(pk__in=Skill.objects.exclude(canonical_name__in=new.skill_scores).values('profile_id'))
+    return condition
+
+
+def _update_skill_points(old, new):
+    """Rewrites Skill.points only for the canonical names whose value changed (skill_canonical_idx)."""
+    from .models import Skill
+
+    for name in _changed_skills(old, new):
+        Skill.objects.filter(canonical_name=name).update(points=new.skill_points(name))
+    if old.default_skill_score != new.default_skill_score:
+        Skill.objects.exclude(canonical_name__in=new.skill_scores).update(points=new.default_skill_score)
+
+
+def publish_scoring_config(skill_scores=None, default_skill_score=None, base_points=None, note=''):
+    """
+    Saves the live weights with the given changes as a new version, then brings only
+    the affected profiles up to date: their stored skill points, their dashboard
+    data_version, and (while scores are rule-based) a ScoreHistory entry for the new
+    score. A skill score of None removes the skill from the table (it then scores
+    the default). Returns (new weights, number of affected profiles).
+    """
+    from .models import Profile, ScoringConfig
+    from .scorer import rescore_profiles
+
+    with transaction.atomic():
+        # Publishers queue on an advisory lock (a row lock would guard nothing while the
+        # table is empty), so each diff is taken against its predecessor
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [_PUBLISH_LOCK_ID])
+        row = ScoringConfig.objects.order_by('-version').first()
+        old = _from_row(row) if row else DEFAULT_WEIGHTS
+
+        merged = {**old.skill_scores, **(skill_scores or {})}
+        new = ScoringWeights(
+            old.version + 1,
+            {name: points for name, points in merged.items() if points is not None},
+            old.default_skill_score if default_skill_score is None else default_skill_score,
+            {**old.base_points, **(base_points or {})},
+        )
+        ScoringConfig.objects.create(
+            version=new.version, skill_scores=new.skill_scores,
+            default_skill_score=new.default_skill_score, base_points=new.base_points, note=note,
+        )
+
+        _update_skill_points(old, new)
+        affected = Profile.objects.filter(affected_profiles(old, new))
+        count = affected.update(data_version=F('data_version') + 1)
+        rescore_profiles(affected, new)
+        transaction.on_commit(lambda: _set_current(new))
+    return new, count
@@ -1,33 +1,34 @@
+from django.db.models import F
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Skill, Experience, Certification, Education, Project
+from .models import Profile, Skill, Experience, Certification, Education, Project
 
 @receiver([post_save, post_delete], sender=Project)
 def update_project_count(sender, instance, **kwargs):
     profile = instance.profile
     profile.num_projects = Project.objects.filter(profile=profile).count()
-    profile.save(update_fields=['num_projects'])
+    Profile.objects.filter(pk=profile.pk).update(num_projects=profile.num_projects, data_version=F('data_version') + 1)
 
 @receiver([post_save, post_delete], sender=Skill)
 def update_skill_count(sender, instance, **kwargs):
     profile = instance.profile
     profile.num_skills = Skill.objects.filter(profile=profile).count()
-    profile.save(update_fields=['num_skills'])
+    Profile.objects.filter(pk=profile.pk).update(num_skills=profile.num_skills, data_version=F('data_version') + 1)
 
 @receiver([post_save, post_delete], sender=Experience)
 def update_experience_count(sender, instance, **kwargs):
     profile = instance.profile
     profile.num_experiences = Experience.objects.filter(profile=profile).count()
-    profile.save(update_fields=['num_experiences'])
+    Profile.objects.filter(pk=profile.pk).update(num_experiences=profile.num_experiences, data_version=F('data_version') + 1)
 
 @receiver([post_save, post_delete], sender=Certification)
 def update_certification_count(sender, instance, **kwargs):
     profile = instance.profile
     profile.num_certifications = Certification.objects.filter(profile=profile).count()
-    profile.save(update_fields=['num_certifications'])
+    Profile.objects.filter(pk=profile.pk).update(num_certifications=profile.num_certifications, data_version=F('data_version') + 1)
 
 @receiver([post_save, post_delete], sender=Education)
 def update_education_count(sender, instance, **kwargs):
     profile = instance.profile
     profile.num_educations = Education.objects.filter(profile=profile).count()
-    profile.save(update_fields=['num_educations'])
+    Profile.objects.filter(pk=profile.pk).update(num_educations=profile.num_educations, data_version=F('data_version') + 1)
@@ -0,0 +1,118 @@
+# In profiles/skills.py
+import re
+from .config import SKILL_SCORES, EXTRA_SKILLS, SKILL_ALIASES, SKILL_LABELS
+
+# Skill names are compared after lowercasing and collapsing spaces/hyphens,
+# so "Problem-Solving", "problem  solving" and "problem solving" are one key.
+_SEPARATORS = re.compile(r'[\s\-_]+')
+
+# (compiled regex, normalized key -> canonical name), built on first use and
+# swapped in as one object so threads never see a half-built pair
+_VOCABULARY = None
+
+
+def _key(name):
+    return _SEPARATORS.sub(' ', name.strip().lower())
+
+
+def _trie_pattern(terms):
+    """
+    Builds a regex from a character trie of `terms`, so the engine follows shared
+    prefixes once instead of retrying every alternative at each position.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def render(node):
+        ends_here = '' in node
+        branches = []
+        for char in sorted(k for k in node if k):
+            atom = r'[\s\-_]+' if char == ' ' else re.escape(char)
+            branches.append(atom + render(node[char]))
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        # Greedy optional tail: the longest term wins ("javascript" over "java")
+        return group + '?' if ends_here else group
+
+    return render(trie)
+
+
+def _build_vocabulary():
+    """Compiles every known skill and alias into one case-insensitive alternation."""
+    lookup = {}
+    for name in list(SKILL_SCORES) + list(EXTRA_SKILLS):
+        lookup[_key(name)] = name
+    for alias, canonical in SKILL_ALIASES.items():
+        lookup[_key(alias)] = canonical
+
+    pattern = _trie_pattern(lookup)
+
+    # Every term starts with a letter, so the leading \b lets the engine skip mid-word
+    # positions cheaply; the look-arounds handle terms like "c++", "c#" and "node.js".
+    matcher = re.compile(rf'\b(?<![\w+#.])(?:{pattern})(?![\w+#])', re.IGNORECASE)
+    return matcher, lookup
+
+
+def _vocabulary():
+    global _VOCABULARY
+    vocabulary = _VOCABULARY
+    if vocabulary is None:
+        # Concurrent first calls may each build it; they produce identical results
+        vocabulary = _VOCABULARY = _build_vocabulary()
+    return vocabulary
+
+
+def reset_skill_matcher():
+    """Forces a rebuild after the vocabulary in config has been changed at runtime."""
+    global _VOCABULARY
+    _VOCABULARY = None
+
+
+def canonical_skill(name):
+    """Maps a skill name (or alias) to its canonical vocabulary entry, else its normalized form."""
+    _, lookup = _vocabulary()
+    key = _key(name)
+    return lookup.get(key, key)
+
+
+def skill_points(canonical_name):
+    """Points for a canonical skill name under the live weights (Skill.points stores this at save time)."""
+    from .scoring_config import get_scoring_config
+
+    return get_scoring_config().skill_points(canonical_name)
+
+
+def skill_label(name):
+    return SKILL_LABELS.get(name, name.title())
+
+
+def extract_skills(text):
+    """
+    Returns the canonical skills mentioned in `text`, in order of first appearance.
+    One regex pass over the text, no network calls.
+    """
+    if not text:
+        return []
+    matcher, lookup = _vocabulary()
+
+    found = {}
+    for match in matcher.finditer(text):
+        found.setdefault(lookup[_key(match.group(0))], None)
+    return list(found)
+
+
+def find_missing_skills(job_description, resume_text='', skill_names=()):
+    """
+    Skills the job description asks for that appear neither in the resume text
+    nor in the user's listed skills. Deterministic; returns display labels.
+    """
+    have = set(extract_skills(resume_text))
+    have.update(canonical_skill(name) for name in skill_names)
+    return [skill_label(s) for s in extract_skills(job_description) if s not in have]
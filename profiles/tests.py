@@ -1,3 +1,612 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+import fitz
+import numpy as np
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import Lower
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ai_engine.models import GapAnalysisResult
+from prepscore_project.downloads import _parse_range, serve_protected_file
+from prepscore_project.pagination import _seek, decode_cursor, encode_cursor, keyset_page
+from prepscore_project.staticfiles import ReferencedFilesFinder, serve_static
+from . import scorer, skills, thumbnails
+from .management.commands import benchmark
+from .scoring_config import get_scoring_config, publish_scoring_config, reset_scoring_config
+from .backends import EmailOrUsernameBackend
+from .models import Profile, Skill, ScoreHistory
 
-# Create your tests here.
+# Tables that grow with the user base; a sequential scan on any of them is a bug
+LARGE_TABLES = (
+    'auth_user', 'profiles_profile', 'profiles_skill', 'profiles_scorehistory',
+    'ai_engine_gapanalysisresult',
+)
+
+
+class LookupIndexTests(TestCase):
+    """EXPLAIN the hot lookups against seeded data and check each is served by an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_population', users=300, chunk_size=300, seed=7, job_descriptions=20, verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user = User.objects.filter(username__startswith='seed_').order_by('pk').last()
+        cls.profile = Profile.objects.get(user=cls.user)
+
+    def assertUsesIndex(self, queryset, *indexes):
+        # Pricing seq scans out alone proves nothing: the FK or primary key indexes would
+        # still serve these queries, so check the plan names the index each one is meant to use
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        for table in LARGE_TABLES:
+            self.assertNotIn(f'Seq Scan on {table}', plan, plan)
+        for index in indexes:
+            self.assertIn(index, plan, plan)
+
+    def test_skill_by_profile_and_canonical_name(self):
+        self.assertUsesIndex(
+            Skill.objects.filter(profile=self.profile, canonical_name='python'), 'skill_profile_canonical_idx',
+        )
+
+    def test_skill_totals_across_users(self):
+        self.assertUsesIndex(
+            Skill.objects.filter(canonical_name='python').values('canonical_name').annotate(total=Sum('points')),
+            'skill_canonical_idx',
+        )
+
+    def test_recent_gap_analyses_for_user(self):
+        self.assertUsesIndex(GapAnalysisResult.objects.filter(user=self.user)[:3], 'gap_user_created_idx')
+
+    def test_recent_score_history_for_profile(self):
+        self.assertUsesIndex(ScoreHistory.objects.filter(profile=self.profile)[:7], 'scorehist_profile_date_idx')
+
+    def test_user_by_lowercase_email(self):
+        self.assertUsesIndex(
+            User.objects.alias(email_lower=Lower('email')).filter(email_lower=self.user.email.lower()),
+            'auth_user_email_lower_idx',
+        )
+
+    def test_login_lookup_by_username_or_email(self):
+        self.assertUsesIndex(
+            EmailOrUsernameBackend.lookup_queryset(self.user.email.upper()),
+            'auth_user_username_lower_idx', 'auth_user_email_lower_idx',
+        )
+
+    def test_deep_keyset_pages(self):
+        first = GapAnalysisResult.objects.filter(user=self.user).order_by('-created_at', '-id').first()
+        if first is None:
+            self.skipTest("seeded user has no analyses")
+        cursor = encode_cursor(first, ['-created_at', '-id'])
+        self.assertUsesIndex(
+            GapAnalysisResult.objects.filter(user=self.user)
+            .filter(_seek(['-created_at', '-id'], decode_cursor(cursor, GapAnalysisResult, ['-created_at', '-id']), True))
+            .order_by('-created_at', '-id')[:26],
+            'gap_user_created_idx',
+        )
+        skill = Skill.objects.filter(profile=self.profile).order_by('id').first()
+        self.assertUsesIndex(
+            Skill.objects.filter(profile=self.profile, id__gt=skill.id).order_by('id')[:26], 'skill_profile_id_idx',
+        )
+
+
+class EmailOrUsernameBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('Minna', 'minna@example.com', 'correct-horse')
+        User.objects.create_user('dup1', 'shared@example.com', 'pw-one')
+        User.objects.create_user('dup2', 'Shared@example.com', 'pw-two')
+
+    def authenticate(self, login, password):
+        return EmailOrUsernameBackend().authenticate(None, username=login, password=password)
+
+    def test_username_and_email_are_case_insensitive(self):
+        self.assertEqual(self.authenticate('minna', 'correct-horse'), self.user)
+        self.assertEqual(self.authenticate('MINNA@example.com', 'correct-horse'), self.user)
+
+    def test_exact_case_username_wins_over_a_case_insensitive_match(self):
+        # Legacy accounts that differ only in case
+        older = User.objects.create_user('Bob', 'bob-upper@example.com', 'upper-pw')
+        newer = User.objects.create_user('bob', 'bob-lower@example.com', 'lower-pw')
+        self.assertEqual(self.authenticate('bob', 'lower-pw'), newer)
+        self.assertEqual(self.authenticate('Bob', 'upper-pw'), older)
+        self.assertEqual(self.authenticate('BOB', 'upper-pw'), older)  # no exact match: lowest pk
+
+    def test_wrong_password_and_unknown_user_fail(self):
+        self.assertIsNone(self.authenticate('minna', 'wrong'))
+        self.assertIsNone(self.authenticate('nobody@example.com', 'correct-horse'))
+
+    def test_shared_email_is_ambiguous_but_usernames_still_work(self):
+        self.assertIsNone(self.authenticate('shared@example.com', 'pw-one'))
+        self.assertEqual(self.authenticate('dup1', 'pw-one').username, 'dup1')
+
+    def test_one_query_and_one_hash_per_attempt(self):
+        for login in ('minna', 'nobody'):
+            with mock.patch.object(PBKDF2PasswordHasher, 'encode', autospec=True,
+                                   side_effect=PBKDF2PasswordHasher.encode) as encode:
+                with self.assertNumQueries(1):
+                    self.authenticate(login, 'wrong')
+            self.assertEqual(encode.call_count, 1, login)
+
+
+class DashboardApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('api-user', 'api@example.com', 'pw')
+        cls.profile = Profile.objects.create(user=cls.user)
+        Skill.objects.create(profile=cls.profile, name='Python')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_matching_etag_is_304_without_scoring(self):
+        first = self.client.get(reverse('dashboard_api'))
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(set(first.json()), {'score', 'contributions', 'suggestions', 'history'})
+
+        with mock.patch('profiles.views.calculate_ml_score') as score:
+            with self.assertNumQueries(3):  # session, user, then only the version lookup
+                again = self.client.get(reverse('dashboard_api'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        score.assert_not_called()
+
+    def test_published_weights_change_every_etag(self):
+        reset_scoring_config()
+        self.addCleanup(reset_scoring_config)
+        etag = self.client.get(reverse('dashboard_api'))['ETag']
+        # Not one of this profile's skills, but it can change everyone's suggestions
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_scoring_config(skill_scores={'rust': 20})
+        response = self.client.get(reverse('dashboard_api'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_section_change_changes_etag(self):
+        etag = self.client.get(reverse('dashboard_api'))['ETag']
+        Skill.objects.create(profile=self.profile, name='Django')
+        response = self.client.get(reverse('dashboard_api'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        profile = Profile.objects.create(user=User.objects.create_user('pager', 'pager@example.com', 'pw'))
+        Skill.objects.bulk_create([Skill(profile=profile, name=f'skill {i}') for i in range(7)])
+        cls.skills = Skill.objects.filter(profile=profile)
+
+    def test_forward_and_back_cover_every_row_once(self):
+        seen, page = [], keyset_page(self.skills, ['id'], 3)
+        while True:
+            seen += [s.id for s in page]
+            if not page.next_cursor:
+                break
+            page = keyset_page(self.skills, ['id'], 3, after=page.next_cursor)
+        all_ids = list(self.skills.order_by('id').values_list('id', flat=True))
+        self.assertEqual(seen, all_ids)
+        self.assertEqual([s.id for s in page], all_ids[6:])
+
+        back = keyset_page(self.skills, ['id'], 3, before=page.previous_cursor)
+        self.assertEqual([s.id for s in back], all_ids[3:6])
+        self.assertEqual([s.id for s in keyset_page(self.skills, ['id'], 3, before=back.previous_cursor)], all_ids[:3])
+
+    def test_bad_cursor_shows_first_page(self):
+        page = keyset_page(self.skills, ['id'], 3, after='not-a-cursor')
+        self.assertEqual(len(page), 3)
+        self.assertIsNone(page.previous_cursor)
+
+
+class LinearModel:
+    """Stands in for the trained forest: a score linear in the feature counts."""
+    weights = [1.0, 6.0, 4.0, 2.0, 3.0]
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return [sum(w * x for w, x in zip(self.weights, row)) for row in X]
+
+
+class CounterfactualSuggestionTests(SimpleTestCase):
+    def setUp(self):
+        scorer.counterfactual_gains.cache_clear()
+        self.model = LinearModel()
+        patcher = mock.patch.object(scorer, 'PREPSCORE_MODEL', self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(scorer.counterfactual_gains.cache_clear)
+
+    def test_ranked_by_gain_in_one_predict_per_vector(self):
+        gains = scorer.counterfactual_gains((2, 1, 1, 0, 0))
+        self.assertEqual([f for f, _ in gains][:3], ['num_experiences', 'num_educations', 'num_projects'])
+        self.assertAlmostEqual(dict(gains)['num_experiences'], 6.0)
+        scorer.counterfactual_gains((2, 1, 1, 0, 0))
+        self.assertEqual(self.model.calls, 1)
+
+    def test_suggestions_are_deterministic(self):
+        profile = Profile(num_skills=2, num_experiences=1, num_educations=1)
+        with mock.patch.object(scorer, 'next_skill', return_value='machine learning'):
+            first = scorer.get_suggestions(profile, 40)
+            self.assertEqual(first, scorer.get_suggestions(profile, 40))
+        self.assertEqual(first[0], "Add an internship or work experience: about +6 points.")
+        self.assertEqual(len(first), 3)
+
+
+class ScoreGridTests(SimpleTestCase):
+    def setUp(self):
+        scorer.score_grid.cache_clear()
+        patcher = mock.patch.object(scorer, 'PREPSCORE_MODEL', LinearModel())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(scorer.score_grid.cache_clear)
+
+    def test_grid_matches_live_scores(self):
+        version, data = scorer.score_grid()
+        self.assertEqual(len(data), np.prod(scorer.GRID_SHAPE))
+        grid = np.frombuffer(data, dtype=np.uint8).reshape(scorer.GRID_SHAPE)
+        for counts in [(0, 0, 0, 0, 0), (3, 1, 1, 0, 2), (14, 7, 3, 5, 5)]:
+            profile = Profile(**dict(zip(scorer.FEATURES, counts)))
+            self.assertEqual(grid[counts], scorer.calculate_ml_score(profile), counts)
+
+
+class SkillCanonicalizationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(user=User.objects.create_user('canon', 'canon@example.com', 'pw'))
+
+    def test_aliases_share_a_canonical_name_and_points(self):
+        for name in ('Python3', 'ML', 'Postgres', 'Basket Weaving'):
+            Skill.objects.create(profile=self.profile, name=name)
+        self.assertEqual(
+            dict(Skill.objects.filter(profile=self.profile).values_list('name', 'canonical_name')),
+            {'Python3': 'python', 'ML': 'machine learning', 'Postgres': 'postgresql', 'Basket Weaving': 'basket weaving'},
+        )
+        self.assertEqual(scorer.get_score_contributions(self.profile)['Skills'], 10 + 15 + 3 + 3)
+
+    def test_rename_recomputes_points(self):
+        skill = Skill.objects.create(profile=self.profile, name='Basket Weaving')
+        skill.name = 'AWS'
+        skill.save(update_fields=['name'])
+        skill.refresh_from_db()
+        self.assertEqual((skill.canonical_name, skill.points), ('aws', 10))
+
+
+class ScoringConfigTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pythonista = Profile.objects.create(user=User.objects.create_user('py', 'py@example.com', 'pw'))
+        cls.gitter = Profile.objects.create(user=User.objects.create_user('git', 'git@example.com', 'pw'))
+        Skill.objects.create(profile=cls.pythonista, name='Python3')
+        Skill.objects.create(profile=cls.gitter, name='Git')
+
+    def setUp(self):
+        reset_scoring_config()
+        self.addCleanup(reset_scoring_config)
+
+    def publish(self, **changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            return publish_scoring_config(**changes)
+
+    def versions(self):
+        return dict(Profile.objects.values_list('pk', 'data_version'))
+
+    def test_skill_weight_change_only_touches_owners(self):
+        before = self.versions()
+        weights, affected = self.publish(skill_scores={'python': 12})
+
+        self.assertEqual((weights.version, affected), (1, 1))
+        self.assertEqual(get_scoring_config().version, 1)
+        self.assertEqual(Skill.objects.get(profile=self.pythonista).points, 12)
+        self.assertEqual(Skill.objects.get(profile=self.gitter).points, 7)
+        after = self.versions()
+        self.assertEqual(after[self.pythonista.pk], before[self.pythonista.pk] + 1)
+        self.assertEqual(after[self.gitter.pk], before[self.gitter.pk])
+
+    def test_rule_based_scores_are_rescored_in_bulk(self):
+        with mock.patch.object(scorer, 'PREPSCORE_MODEL', None):
+            self.publish(skill_scores={'git': 20})
+            gitter = Profile.objects.get(pk=self.gitter.pk)
+            self.assertEqual(
+                ScoreHistory.objects.filter(profile=gitter).first().score,
+                scorer.calculate_rule_based_score(gitter),
+            )
+        self.assertFalse(ScoreHistory.objects.filter(profile=self.pythonista).exists())
+
+    def test_skill_saved_before_the_cache_refreshes_gets_published_points(self):
+        self.assertEqual(get_scoring_config().version, 0)
+        # Published elsewhere: this process's cached copy still holds version 0
+        publish_scoring_config(skill_scores={'docker': 19})
+        skill = Skill.objects.create(profile=self.gitter, name='Docker')
+        self.assertEqual(skill.points, 19)
+
+    def test_publishers_serialize_on_an_advisory_lock(self):
+        # The table starts empty, so there is no row for a FOR UPDATE to lock
+        with CaptureQueriesContext(connection) as queries:
+            self.publish(skill_scores={'git': 9})
+        self.assertTrue(any('pg_advisory_xact_lock' in q['sql'] for q in queries))
+        self.assertEqual(self.publish(skill_scores={'git': 8})[0].version, 2)
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def write(self, relative, content):
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    def test_finder_lists_only_referenced_assets(self):
+        self.write('app/templates/page.html', b"{% load static %}<link href=\"{% static 'css/site.css' %}\">")
+        self.write('static/css/site.css', b"body { background: url('../img/bg.png'); }")
+        self.write('static/img/bg.png', b'png')
+        self.write('static/css/unused.css', b'p {}')
+
+        with override_settings(BASE_DIR=self.root, STATICFILES_DIRS=[self.root / 'static'],
+                               TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': []}]):
+            listed = {path for path, _ in ReferencedFilesFinder().list([])}
+        self.assertEqual(listed, {'css/site.css', 'img/bg.png'})
+
+    def test_serve_static_picks_precompressed_variant_and_varies(self):
+        self.write('css/site.css', b'body {}' * 200)
+        self.write('css/site.css.gz', gzip.compress(b'body {}' * 200))
+        self.write('css/plain.css', b'p {}')
+        factory = RequestFactory()
+
+        with override_settings(STATIC_ROOT=self.root):
+            gzipped = serve_static(factory.get('/', HTTP_ACCEPT_ENCODING='br, gzip'), 'css/site.css')
+            identity = serve_static(factory.get('/', HTTP_ACCEPT_ENCODING='gzip;q=0'), 'css/site.css')
+            plain = serve_static(factory.get('/', HTTP_ACCEPT_ENCODING='gzip'), 'css/plain.css')
+            with self.assertRaises(Http404):
+                serve_static(factory.get('/'), 'css/site.css.gz')
+
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzipped['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertEqual(identity['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Vary', plain)
+        for response in (gzipped, identity, plain):
+            response.close()
+
+
+@override_settings(DEBUG=False, METRICS_TOKEN='scrape-me', METRICS_ALLOWED_IPS=[])
+class MetricsAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('ops', 'ops@example.com', 'pw', is_staff=True)
+        cls.member = User.objects.create_user('member', 'member@example.com', 'pw')
+
+    def test_metrics_needs_staff_or_token_even_from_localhost(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-me').status_code, 200)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    def test_server_timing_is_opt_in_and_staff_only(self):
+        self.client.force_login(self.staff)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('metrics')))
+        with self.settings(SERVER_TIMING_HEADER=True):
+            self.assertIn('db;dur=', self.client.get(reverse('metrics'))['Server-Timing'])
+            self.client.force_login(self.member)
+            self.assertNotIn('Server-Timing', self.client.get(reverse('login')))
+
+
+class SkillExtractionTests(SimpleTestCase):
+    def test_aliases_resolve_in_order_of_first_mention(self):
+        text = "Built ReactJS and Node.js apps on K8S; JS, Python 3, C++ and C#. Also js again and postgres."
+        self.assertEqual(
+            skills.extract_skills(text),
+            ['react', 'node.js', 'kubernetes', 'javascript', 'python', 'c++', 'c#', 'postgresql'],
+        )
+
+    def test_longest_term_and_word_boundaries_win(self):
+        self.assertEqual(skills.extract_skills("JavaScript, not Java; MLOps isn't ML."), ['javascript', 'java', 'machine learning'])
+        self.assertEqual(skills.extract_skills("htmlx gitops sqlite"), [])
+        self.assertEqual(skills.extract_skills("Problem-Solving and problem  solving"), ['problem solving'])
+
+    def test_missing_skills_use_resume_and_listed_skills(self):
+        jd = "We need Python, AWS, Docker and machine learning experience."
+        self.assertEqual(
+            skills.find_missing_skills(jd, resume_text="Python developer", skill_names=['ML']),
+            ['AWS', 'Docker'],
+        )
+
+    def test_concurrent_first_use_after_reset(self):
+        skills.reset_skill_matcher()
+        results, errors, start = [], [], threading.Barrier(8)
+
+        def extract():
+            start.wait()
+            try:
+                results.append(skills.extract_skills("python and k8s"))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=extract) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [['python', 'kubernetes']] * 8)
+
+
+class ProtectedDownloadTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / 'resume.pdf'
+        self.path.write_bytes(b'0123456789')
+        self.factory = RequestFactory()
+
+    def serve(self, **headers):
+        request = self.factory.get('/profile/resume/', **headers)
+        response = serve_protected_file(request, str(self.path), 'resumes/resume.pdf', 'application/pdf')
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_parse_range(self):
+        cases = {
+            'bytes=2-5': (2, 5), 'bytes=7-': (7, 9), 'bytes=-3': (7, 9), 'bytes=4-99': (4, 9),
+            'bytes=5-3': None, 'bytes=-': None, 'bytes=0-1,4-5': None, 'items=0-1': None,
+            'bytes=10-': 'unsatisfiable', 'bytes=-0': 'unsatisfiable',
+        }
+        for header, expected in cases.items():
+            self.assertEqual(_parse_range(header, 10), expected, header)
+        self.assertEqual(_parse_range('bytes=-5', 0), 'unsatisfiable')
+
+    def test_full_response_and_etag_revalidation(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.serve(HTTP_IF_NONE_MATCH=f'W/{response["ETag"]}').status_code, 304)
+
+    def test_ranges(self):
+        etag = self.serve()['ETag']
+        partial = self.serve(HTTP_RANGE='bytes=2-5')
+        self.assertEqual((partial.status_code, self.body(partial)), (206, b'2345'))
+        self.assertEqual(partial['Content-Range'], 'bytes 2-5/10')
+
+        self.assertEqual(self.serve(HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self.serve(HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"').status_code, 200)
+        self.assertEqual(self.serve(HTTP_RANGE='bytes=5-3').status_code, 200)
+
+        unsatisfiable = self.serve(HTTP_RANGE='bytes=10-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable['Content-Range'], 'bytes */10')
+
+    @override_settings(PROTECTED_MEDIA_ACCEL_PREFIX='/protected/')
+    def test_accel_redirect_leaves_the_bytes_to_nginx(self):
+        response = self.serve(HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/resumes/resume.pdf')
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
+
+
+def write_pdf(path, text):
+    with fitz.open() as doc:
+        doc.new_page(width=200, height=280).insert_text((20, 40), text)
+        doc.save(path)
+
+
+class ResumeThumbnailTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        settings_patch = override_settings(
+            MEDIA_ROOT=str(self.dir / 'media'), RESUME_THUMBNAIL_PAGES=1, RESUME_THUMBNAIL_WIDTH=60,
+            RESUME_THUMBNAIL_FORMAT='png',
+        )
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+
+    def test_identical_resumes_share_one_rendered_thumbnail(self):
+        # The same file uploaded twice, e.g. by two accounts
+        write_pdf(self.dir / 'a.pdf', 'Jane Doe, Python developer')
+        (self.dir / 'b.pdf').write_bytes((self.dir / 'a.pdf').read_bytes())
+        with mock.patch.object(thumbnails, 'render_thumbnail', wraps=thumbnails.render_thumbnail) as render:
+            first = thumbnails.ensure_resume_thumbnail(str(self.dir / 'a.pdf'))
+            second = thumbnails.ensure_resume_thumbnail(str(self.dir / 'b.pdf'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(os.listdir(self.dir / 'media' / thumbnails.THUMBNAIL_DIR), [Path(first).name])
+
+    def test_concurrent_renders_of_one_resume_use_separate_temp_files(self):
+        write_pdf(self.dir / 'a.pdf', 'Jane Doe')
+        both_written, replace = threading.Barrier(2), os.replace
+
+        def replace_together(src, dst):
+            both_written.wait(2)  # neither rename happens until both temp files are written
+            replace(src, dst)
+
+        with mock.patch.object(os, 'replace', side_effect=replace_together):
+            names = []
+            threads = [
+                threading.Thread(target=lambda: names.append(thumbnails.ensure_resume_thumbnail(str(self.dir / 'a.pdf'))))
+                for _ in range(2)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(5)
+
+        self.assertEqual(len(names), 2)
+        self.assertEqual(len(set(names)), 1)
+        self.assertNotIn('', names)
+        path = self.dir / 'media' / names[0]
+        self.assertEqual(path.read_bytes()[:8], b'\x89PNG\r\n\x1a\n')
+        self.assertEqual(path.stat().st_mode & 0o777, 0o644)
+        self.assertEqual(os.listdir(path.parent), [path.name])  # no temp files left behind
+
+    def test_webp_falls_back_to_png_without_pillow(self):
+        write_pdf(self.dir / 'a.pdf', 'Jane Doe')
+        with override_settings(RESUME_THUMBNAIL_FORMAT='webp'), mock.patch.object(thumbnails, 'Image', None):
+            name = thumbnails.ensure_resume_thumbnail(str(self.dir / 'a.pdf'))
+
+        self.assertTrue(name.endswith('.png'), name)
+        self.assertEqual((self.dir / 'media' / name).read_bytes()[:8], b'\x89PNG\r\n\x1a\n')
+
+    def test_unreadable_pdf_gives_no_thumbnail(self):
+        (self.dir / 'broken.pdf').write_bytes(b'not a pdf')
+        self.assertEqual(thumbnails.ensure_resume_thumbnail(str(self.dir / 'broken.pdf')), '')
+
+
+class UnusedThumbnailTests(TestCase):
+    def test_a_thumbnail_shared_with_another_profile_is_kept(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            name = f'{thumbnails.THUMBNAIL_DIR}/shared.png'
+            path = Path(media) / name
+            path.parent.mkdir()
+            path.write_bytes(b'png')
+            Profile.objects.create(user=User.objects.create_user('keeps', 'keeps@example.com', 'pw'), resume_thumbnail=name)
+
+            thumbnails.remove_unused_thumbnail(name)
+            self.assertTrue(path.exists())
+
+            Profile.objects.filter(resume_thumbnail=name).update(resume_thumbnail='')
+            thumbnails.remove_unused_thumbnail(name)
+            self.assertFalse(path.exists())
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    def test_broken_limits_fail_only_after_results_are_saved_and_compared(self):
+        def over_query_limit(command, max_queries):
+            command._run('dashboard_view', lambda: None, queries=max_queries + 4)
+            command.failures.append('dashboard_view ran too many queries')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output, baseline = Path(tmp, 'current.json'), Path(tmp, 'baseline.json')
+            baseline.write_text(json.dumps({'benchmarks': {'dashboard_view': {'median_us': 1e9, 'queries': 3}}}))
+            with mock.patch.object(benchmark.Command, '_bench_db', over_query_limit), \
+                    mock.patch.object(benchmark.connection, 'ensure_connection'), \
+                    self.assertRaisesMessage(CommandError, 'dashboard_view ran too many queries') as raised:
+                call_command('benchmark', output=str(output), baseline=str(baseline), only='dashboard', repeat=1,
+                             max_dashboard_queries=3, stdout=StringIO(), stderr=StringIO())
+
+            self.assertEqual(json.loads(output.read_text())['benchmarks']['dashboard_view']['queries'], 7)
+        self.assertIn('dashboard_view: 3 -> 7 queries', str(raised.exception))
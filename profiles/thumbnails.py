@@ -0,0 +1,100 @@
+# In profiles/thumbnails.py
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+import fitz
+from django.conf import settings
+
+try:
+    from PIL import Image
+except ImportError:  # optional: only needed for WebP output
+    Image = None
+
+THUMBNAIL_DIR = 'resume_thumbs'
+CONTENT_TYPES = {'png': 'image/png', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def thumbnail_format():
+    fmt = settings.RESUME_THUMBNAIL_FORMAT.lower()
+    if fmt == 'webp' and Image is None:
+        # PyMuPDF can't encode WebP itself
+        return 'png'
+    return fmt if fmt in CONTENT_TYPES else 'png'
+
+
+def render_thumbnail(pdf_path, pages, width, fmt):
+    """First `pages` pages of the PDF stacked vertically, `width` pixels wide, as image bytes."""
+    with fitz.open(pdf_path) as src:
+        count = min(pages, src.page_count)
+        if count == 0:
+            raise ValueError("PDF has no pages")
+        rects = [src[i].rect for i in range(count)]
+        page_width = max(r.width for r in rects)
+
+        # Lay the pages out on one tall page so a single pixmap covers all of them
+        with fitz.open() as sheet:
+            canvas = sheet.new_page(width=page_width, height=sum(r.height for r in rects))
+            top = 0
+            for i, rect in enumerate(rects):
+                canvas.show_pdf_page(fitz.Rect(0, top, rect.width, top + rect.height), src, i)
+                top += rect.height
+            zoom = width / page_width
+            pixmap = canvas.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+
+    if fmt == 'jpeg':
+        return pixmap.tobytes('jpg', jpg_quality=80)
+    if fmt == 'webp':
+        image = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+        out = BytesIO()
+        image.save(out, 'WEBP', quality=80, method=6)
+        return out.getvalue()
+    return pixmap.tobytes('png')
+
+
+def ensure_resume_thumbnail(pdf_path):
+    """
+    Returns the MEDIA_ROOT-relative name of the thumbnail for this PDF, rendering it
+    only if no thumbnail exists for the same content and settings. '' on failure.
+    """
+    pages, width, fmt = settings.RESUME_THUMBNAIL_PAGES, settings.RESUME_THUMBNAIL_WIDTH, thumbnail_format()
+    try:
+        name = f"{THUMBNAIL_DIR}/{file_sha256(pdf_path)[:40]}-{pages}p{width}w.{fmt}"
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.exists(path):
+            data = render_thumbnail(pdf_path, pages, width, fmt)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename, so concurrent uploads of the same file never see a partial
+            # image; each writer (thread or process) gets its own uniquely named temp file
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as f:
+                f.write(data)
+            try:
+                # NamedTemporaryFile creates it 0600; give it the permissions of any other media file
+                os.chmod(f.name, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+                os.replace(f.name, path)
+            except OSError:
+                os.remove(f.name)
+                raise
+        return name
+    except Exception as e:
+        print(f"Thumbnail error: {e}")
+        return ''
+
+
+def remove_unused_thumbnail(name):
+    """Deletes a thumbnail no profile points at any more (identical resumes share one)."""
+    from .models import Profile
+
+    if name and not Profile.objects.filter(resume_thumbnail=name).exists():
+        try:
+            os.remove(os.path.join(settings.MEDIA_ROOT, name))
+        except OSError:
+            pass
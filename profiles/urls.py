@@ -6,6 +6,8 @@ urlpatterns = [
     path('register/', views.register_view, name='register'),
     path('login/', views.login_view, name='login'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('api/dashboard/', views.dashboard_api_view, name='dashboard_api'),
+    path('api/score-grid/<str:version>/', views.score_grid_view, name='score_grid'),
     path('about/', views.about_view, name='about'),
     path('features/', views.features_view, name='features'),
     path('skill/<int:pk>/edit/', views.edit_skill_view, name='edit_skill'),
@@ -13,6 +15,8 @@ urlpatterns = [
     path('skill/<int:pk>/delete/', views.delete_skill_view, name='delete_skill'),
     path('experience/<int:pk>/delete/', views.delete_experience_view, name='delete_experience'),
     path('profile/', views.manage_profile_view, name='manage_profile'),
+    path('profile/resume.pdf', views.resume_pdf_view, name='resume_pdf'),
+    path('profile/resume-thumbnail/', views.resume_thumbnail_view, name='resume_thumbnail'),
     path('skills/', views.manage_skills_view, name='manage_skills'),
     path('experience/', views.manage_experience_view, name='manage_experience'),
     path('certifications/', views.manage_certifications_view, name='manage_certifications'),
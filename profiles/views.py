@@ -1,21 +1,49 @@
 # In profiles/views.py
 
+import functools
+import gzip
+import os
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.utils import timezone
 from .models import Profile, Skill, Experience, Certification, Education, Project, ScoreHistory
 from .forms import (
     LoginForm, ProfileForm, SkillForm, ExperienceForm,
     CertificationForm, CustomUserCreationForm, EducationForm, ProjectForm
 )
 from django.contrib.auth.views import PasswordResetConfirmView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from . import scorer
 from .scorer import calculate_ml_score, get_suggestions,get_score_contributions
+from ai_engine.admission import ai_admission
+from prepscore_project.pagination import request_page
+from prepscore_project.downloads import etag_matches, file_version, serve_protected_file
+from .scoring_config import get_scoring_config
+from .thumbnails import CONTENT_TYPES, ensure_resume_thumbnail, remove_unused_thumbnail
 
 # --- VIEWS ---
 
+def resume_url(profile):
+    """URL of the owner's resume, versioned so browsers can cache each upload for good."""
+    if not profile.resume_pdf:
+        return None
+    try:
+        return f"{reverse('resume_pdf')}?v={file_version(profile.resume_pdf.path)}"
+    except OSError:
+        return None
+
+def resume_thumbnail_url(profile):
+    """URL of the resume preview image; its stored name is a content hash, so it doubles as the version."""
+    if not profile.resume_pdf:
+        return None
+    url = reverse('resume_thumbnail')
+    return f"{url}?v={os.path.basename(profile.resume_thumbnail)}" if profile.resume_thumbnail else url
+
 def home_view(request):
     return render(request, 'profiles/home.html')
 
@@ -72,38 +100,146 @@ def about_view(request):
 def features_view(request):
     return render(request, 'profiles/features.html')
 
-@login_required
-def dashboard_view(request):
-    profile, created = Profile.objects.get_or_create(user=request.user)
-    
-    skills = Skill.objects.filter(profile=profile)
-    experiences = Experience.objects.filter(profile=profile)
-    certifications = Certification.objects.filter(profile=profile)
-    
+def dashboard_etag(profile_id, data_version):
+    # The weights version covers what a publish changes for everyone (e.g. next_skill suggestions)
+    return f'"{profile_id}-{data_version}-{get_scoring_config().version}-{scorer.MODEL_VERSION}"'
+
+def dashboard_data(profile):
+    """Score, contributions, suggestions and recent history: what the dashboard charts show."""
     score = calculate_ml_score(profile)
-    suggestions = get_suggestions(profile, score)
-    score_contributions = get_score_contributions(profile)
 
     # Record History
     if score > 0:
         last_record = ScoreHistory.objects.filter(profile=profile).first()
         if not last_record or last_record.score != score:
             ScoreHistory.objects.create(profile=profile, score=score)
-            
-    history = list(ScoreHistory.objects.filter(profile=profile).order_by('date_calculated')[:7])
-    history.reverse() # Order for chart: oldest to newest
+
+    # Latest 7 (newest first, via scorehist_profile_date_idx), then oldest to newest for the chart
+    history = list(
+        ScoreHistory.objects.filter(profile=profile).order_by('-date_calculated')
+        .values_list('date_calculated', 'score')[:7]
+    )
+    history.reverse()
+    return {
+        'score': score,
+        'contributions': get_score_contributions(profile),
+        'suggestions': get_suggestions(profile, score),
+        'history': [[timezone.localdate(date).isoformat(), value] for date, value in history],
+    }
+
+@login_required
+def dashboard_view(request):
+    profile, created = Profile.objects.get_or_create(user=request.user)
+    
+    skills = Skill.objects.filter(profile=profile)
+    experiences = Experience.objects.filter(profile=profile)
+    certifications = Certification.objects.filter(profile=profile)
+    data = dashboard_data(profile)
 
     context = {
         'profile': profile, 'skills': skills,
         'experiences': experiences, 'certifications': certifications,
         'educations': Education.objects.filter(profile=profile),
         'projects': Project.objects.filter(profile=profile),
-        'score': score, 'suggestions': suggestions,
-        'score_contributions': score_contributions,
-        'history': history,
+        'score': data['score'], 'suggestions': data['suggestions'],
+        'dashboard_data': data,
+        'dashboard_etag': dashboard_etag(profile.pk, profile.data_version),
+        'what_if': what_if_config(profile),
+        'resume_url': resume_url(profile),
+        'resume_thumbnail_url': resume_thumbnail_url(profile),
     }
     return render(request, 'profiles/dashboard.html', context)
 
+@login_required
+def dashboard_api_view(request):
+    """
+    The dashboard's data as compact JSON. The ETag only depends on the profile's
+    data_version and the scoring model, so a matching If-None-Match costs one
+    indexed lookup and nothing is scored.
+    """
+    row = Profile.objects.filter(user=request.user).values_list('pk', 'data_version').first()
+    if row:
+        etag = dashboard_etag(*row)
+        if etag_matches(request.headers.get('If-None-Match', ''), etag):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+    profile, created = Profile.objects.get_or_create(user=request.user)
+    response = JsonResponse(dashboard_data(profile), json_dumps_params={'separators': (',', ':')})
+    response['ETag'] = dashboard_etag(profile.pk, profile.data_version)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@functools.lru_cache(maxsize=1)
+def _gzipped(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+@login_required
+def score_grid_view(request, version):
+    """The what-if score grid (scorer.score_grid). Versioned URL, so cached for good."""
+    grid = scorer.score_grid()
+    if grid is None or grid[0] != version:
+        raise Http404("Unknown score grid version")
+    data = grid[1]
+    accepts_gzip = any(
+        part.split(';')[0].strip() == 'gzip' for part in request.headers.get('Accept-Encoding', '').split(',')
+    )
+    response = HttpResponse(_gzipped(data) if accepts_gzip else data, content_type='application/octet-stream')
+    if accepts_gzip:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+def what_if_config(profile):
+    """What the dashboard's what-if sliders need, or None while no model is loaded."""
+    grid = scorer.score_grid()
+    if grid is None:
+        return None
+    return {
+        'url': reverse('score_grid', args=[grid[0]]),
+        'features': scorer.FEATURES,
+        'shape': scorer.GRID_SHAPE,
+        'current': [getattr(profile, feature) for feature in scorer.FEATURES],
+    }
+
+@login_required
+def resume_pdf_view(request):
+    """Streams the logged-in user's own resume (ranges, ETag/304, optional web-server offload)."""
+    profile = get_object_or_404(Profile.objects.only('id', 'user_id', 'resume_pdf'), user=request.user)
+    if not profile.resume_pdf:
+        raise Http404("No resume uploaded")
+    path = profile.resume_pdf.path
+    try:
+        version = file_version(path)
+    except OSError:
+        raise Http404("Resume file missing")
+    # A ?v= matching the current file means the URL changes with every upload
+    cache_control = 'private, max-age=31536000, immutable' if request.GET.get('v') == version else 'private, no-cache'
+    return serve_protected_file(request, path, profile.resume_pdf.name, 'application/pdf', cache_control)
+
+@login_required
+def resume_thumbnail_view(request):
+    """The preview image of the user's own resume, rendered on first request if it's missing."""
+    profile = get_object_or_404(
+        Profile.objects.only('id', 'user_id', 'resume_pdf', 'resume_thumbnail'), user=request.user
+    )
+    if not profile.resume_pdf:
+        raise Http404("No resume uploaded")
+    name = profile.resume_thumbnail
+    if not name or not os.path.exists(os.path.join(settings.MEDIA_ROOT, name)):
+        # Resumes uploaded before thumbnails existed, or a wiped media volume
+        name = ensure_resume_thumbnail(profile.resume_pdf.path)
+        if not name:
+            raise Http404("No preview available")
+        Profile.objects.filter(pk=profile.pk).update(resume_thumbnail=name)
+    # Content-addressed name: the image behind a given ?v= never changes
+    immutable = request.GET.get('v') == os.path.basename(name)
+    cache_control = 'private, max-age=31536000, immutable' if immutable else 'private, no-cache'
+    content_type = CONTENT_TYPES.get(name.rsplit('.', 1)[-1], 'application/octet-stream')
+    return serve_protected_file(request, os.path.join(settings.MEDIA_ROOT, name), name, content_type, cache_control)
+
 # --- UPDATE VIEWS ---
 
 @login_required
@@ -180,6 +316,7 @@ def delete_experience_view(request, pk):
     return render(request, 'profiles/confirm_delete.html', {'object': experience, 'type': 'Experience Entry'})
 
 @login_required
+@ai_admission(when=lambda request: 'resume_pdf' in request.FILES)
 def manage_profile_view(request):
     # Get or create the profile for the logged-in user
     profile, created = Profile.objects.get_or_create(user=request.user)
@@ -189,12 +326,19 @@ def manage_profile_view(request):
         new_resume_uploaded = 'resume_pdf' in request.FILES
 
         # Populate the form with submitted data AND the existing profile instance
+        old_thumbnail = profile.resume_thumbnail
         form = ProfileForm(request.POST, request.FILES, instance=profile)
         if form.is_valid():
             form.save()
             
             # If a new PDF was uploaded, process it for AI Gap Analysis right now
             if new_resume_uploaded and profile.resume_pdf:
+                # Render the dashboard preview once, here, instead of on every view
+                profile.resume_thumbnail = ensure_resume_thumbnail(profile.resume_pdf.path)
+                profile.save(update_fields=['resume_thumbnail'])
+                profile.bump_data_version()
+                if old_thumbnail != profile.resume_thumbnail:
+                    remove_unused_thumbnail(old_thumbnail)
                 try:
                     from ai_engine.utils import extract_text_from_pdf, generate_embedding
                     
@@ -222,7 +366,7 @@ def manage_profile_view(request):
         # For a GET request, populate the form with the profile's current data
         form = ProfileForm(instance=profile)
 
-    return render(request, 'profiles/manage_profile.html', {'form': form})
+    return render(request, 'profiles/manage_profile.html', {'form': form, 'resume_url': resume_url(profile)})
 
 @login_required
 def manage_skills_view(request):
@@ -239,8 +383,8 @@ def manage_skills_view(request):
     else:
         form = SkillForm() # A blank form for GET requests
 
-    # Get the list of all existing skills for this user
-    skills = Skill.objects.filter(profile=profile)
+    # Get this user's skills a page at a time, seeking on (profile, id) so deep pages are as cheap as the first
+    skills = request_page(request, Skill.objects.filter(profile=profile).only('id', 'name'), ['id'], settings.LISTING_PAGE_SIZE)
     
     context = {
         'form': form,
@@ -261,7 +405,9 @@ def manage_experience_view(request):
             return redirect('manage_experience')
     else:
         form = ExperienceForm()
-    experiences = Experience.objects.filter(profile=profile)
+    experiences = request_page(
+        request, Experience.objects.filter(profile=profile).only('id', 'title', 'company'), ['id'], settings.LISTING_PAGE_SIZE
+    )
     context = {'form': form, 'experiences': experiences}
     return render(request, 'profiles/manage_experience.html', context)
 
@@ -278,7 +424,10 @@ def manage_certifications_view(request):
             return redirect('manage_certifications')
     else:
         form = CertificationForm()
-    certifications = Certification.objects.filter(profile=profile)
+    certifications = request_page(
+        request, Certification.objects.filter(profile=profile).only('id', 'name', 'issuing_organization', 'date_issued'),
+        ['id'], settings.LISTING_PAGE_SIZE,
+    )
     context = {'form': form, 'certifications': certifications}
     return render(request, 'profiles/manage_certifications.html', context)
 
@@ -319,8 +468,6 @@ def delete_certification_view(request, pk):
 @login_required
 def manage_education_view(request):
     profile, created = Profile.objects.get_or_create(user=request.user)
-    educations = Education.objects.filter(profile=profile)
-    
     if request.method == 'POST':
         form = EducationForm(request.POST)
         if form.is_valid():
@@ -331,6 +478,10 @@ def manage_education_view(request):
             return redirect('manage_education')
     else:
         form = EducationForm()
+    educations = request_page(
+        request, Education.objects.filter(profile=profile).only('id', 'degree', 'school', 'date_graduated'),
+        ['id'], settings.LISTING_PAGE_SIZE,
+    )
     
     return render(request, 'profiles/manage_education.html', {
         'educations': educations,
@@ -379,7 +530,10 @@ def manage_projects_view(request):
             return redirect('manage_projects')
     else:
         form = ProjectForm()
-    projects = Project.objects.filter(profile=profile)
+    projects = request_page(
+        request, Project.objects.filter(profile=profile).only('id', 'title', 'technologies_used', 'link'),
+        ['id'], settings.LISTING_PAGE_SIZE,
+    )
     context = {'form': form, 'projects': projects}
     return render(request, 'profiles/manage_projects.html', context)
 
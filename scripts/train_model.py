@@ -6,21 +6,25 @@ import joblib
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 
-# Ensure we can import from the profiles app if needed, 
-# but for synthetic data generation we'll just replicate the logic.
-BASE_POINTS = {
-    'education': 20,
-    'experience': 25,
-    'certification': 15,
-    'project': 15,
-    'skill_avg': 5
-}
+# Use the project's live scoring weights (profiles.scoring_config), the same ones
+# the rule-based scorer uses, instead of a copy of them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prepscore_project.settings')
 
-def generate_synthetic_data(num_samples=5000):
+import django
+django.setup()
+
+from profiles.scoring_config import get_scoring_config
+
+def generate_synthetic_data(weights, num_samples=5000):
     """
     Generates synthetic profile data for training.
     Features: num_skills, num_experiences, num_educations, num_certifications, num_projects
     """
+    points = weights.base_points
+    # Calculate a "perfect" raw score for normalization (consistent with scorer.py)
+    MAX_RAW = weights.max_raw
+
     data = []
     for _ in range(num_samples):
         num_skills = np.random.randint(0, 15)
@@ -29,16 +33,13 @@ def generate_synthetic_data(num_samples=5000):
         num_certs = np.random.randint(0, 6)
         num_projs = np.random.randint(0, 6)
         
-        # Calculate a "perfect" raw score for normalization
-        MAX_RAW = (10 * 5) + (2 * 20) + (3 * 25) + (2 * 15) + (3 * 15) # Consistent with scorer.py
-        
         # Calculate raw score for this sample
         raw_score = (
-            (num_skills * 5) + 
-            (num_edu * 20) + 
-            (num_exp * 25) + 
-            (num_certs * 15) + 
-            (num_projs * 15)
+            (num_skills * points['skill_avg']) + 
+            (num_edu * points['education']) + 
+            (num_exp * points['experience']) + 
+            (num_certs * points['certification']) + 
+            (num_projs * points['project'])
         )
         
         # Target score (percentage)
@@ -54,8 +55,9 @@ def generate_synthetic_data(num_samples=5000):
     return pd.DataFrame(data, columns=columns)
 
 def train_and_save_model():
-    print("Generating synthetic data...")
-    df = generate_synthetic_data()
+    weights = get_scoring_config(fresh=True)
+    print(f"Generating synthetic data with scoring config v{weights.version}...")
+    df = generate_synthetic_data(weights)
     
     X = df.drop('score', axis=1)
     y = df['score']
@@ -71,6 +73,8 @@ def train_and_save_model():
     print(f"Model R^2 Score: {score:.4f}")
     
     # Save model
+    # Which weights the model learned, for anyone inspecting it later
+    model.scoring_config_version_ = weights.version
     model_path = os.path.join('profiles', 'ml_models', 'prepscore_model.joblib')
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
     joblib.dump(model, model_path)